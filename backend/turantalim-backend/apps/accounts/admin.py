@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.utils.translation import gettext_lazy as _
-from apps.accounts.models import User, UserVerification, PasswordResetToken
+from apps.accounts.models import User, UserVerification, PasswordResetToken, StudentDashboardSnapshot
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -70,3 +70,12 @@ class PasswordResetTokenAdmin(admin.ModelAdmin):
     list_display = ['user', 'is_used', 'created_at', 'expires_at']
     list_filter = ['is_used', 'created_at']
 
+
+
+@admin.register(StudentDashboardSnapshot)
+class StudentDashboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['student', 'coins', 'completed_lessons', 'total_lessons', 'pending_homework', 'average_score', 'updated_at']
+    search_fields = ['student__username', 'student__email', 'student__first_name', 'student__last_name']
+    readonly_fields = ['updated_at']
+    raw_id_fields = ['student']
+    ordering = ['-updated_at']
@@ -0,0 +1,260 @@
+"""
+Student dashboard snapshot maintenance.
+
+Every section is computed with grouped queries over a batch of students,
+so refreshing one student or a whole group costs the same number of queries.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apps.accounts.models import User, StudentDashboardSnapshot
+
+UPCOMING_LESSONS_LIMIT = 5
+RECENT_SUBMISSIONS_LIMIT = 5
+
+SECTION_FIELDS = {
+    'coins': ['coins', 'coins_this_month', 'coins_last_month'],
+    'lessons': ['total_lessons', 'completed_lessons', 'course_progress', 'upcoming_lessons'],
+    'homework': ['pending_homework', 'average_score', 'recent_submissions'],
+}
+ALL_SECTIONS = tuple(SECTION_FIELDS)
+
+
+def _coins_section(student_ids):
+    from apps.gamification.models import StudentCoin, CoinTransaction
+
+    balances = dict(
+        StudentCoin.objects.filter(student_id__in=student_ids).values_list('student_id', 'total_coins')
+    )
+
+    last_month = timezone.now() - timedelta(days=30)
+    two_months_ago = timezone.now() - timedelta(days=60)
+    trends = {
+        row['student_id']: row
+        for row in CoinTransaction.objects.filter(
+            student_id__in=student_ids,
+            transaction_type='earned',
+            created_at__gte=two_months_ago
+        ).values('student_id').annotate(
+            this_month=Count('id', filter=Q(created_at__gte=last_month)),
+            last_month=Count('id', filter=Q(created_at__lt=last_month))
+        )
+    }
+
+    result = {}
+    for student_id in student_ids:
+        trend = trends.get(student_id, {})
+        result[student_id] = {
+            'coins': balances.get(student_id, 0),
+            'coins_this_month': trend.get('this_month', 0),
+            'coins_last_month': trend.get('last_month', 0),
+        }
+    return result
+
+
+def _lessons_section(student_ids):
+    from apps.courses.models import Group
+    from apps.lessons.models import Lesson
+
+    memberships = Group.students.through.objects.filter(
+        user_id__in=student_ids,
+        group__status='active'
+    )
+
+    totals = {
+        row['user_id']: row
+        for row in memberships.values('user_id').annotate(
+            total=Count('group__lessons'),
+            completed=Count('group__lessons', filter=Q(group__lessons__status='completed'))
+        )
+    }
+
+    # Course progress is shown for the newest active group of each student
+    first_groups = {
+        row['user_id']: row
+        for row in memberships.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('user_id'),
+                order_by=F('group__created_at').desc()
+            )
+        ).filter(row_number=1).values('user_id', 'group_id', 'group__name')
+    }
+    group_counts = {
+        row['group_id']: row
+        for row in Lesson.objects.filter(
+            group_id__in={row['group_id'] for row in first_groups.values()}
+        ).values('group_id').annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed'))
+        )
+    }
+
+    upcoming = {}
+    today = timezone.now().date()
+    upcoming_rows = memberships.filter(
+        group__lessons__scheduled_date__gte=today,
+        group__lessons__status__in=['scheduled', 'rescheduled']
+    ).annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=F('user_id'),
+            order_by=[F('group__lessons__scheduled_date'), F('group__lessons__start_time')]
+        )
+    ).filter(row_number__lte=UPCOMING_LESSONS_LIMIT).values(
+        'user_id', 'group_id', 'group__name', 'group__lessons__id', 'group__lessons__title',
+        'group__lessons__scheduled_date', 'group__lessons__start_time', 'row_number'
+    ).order_by('user_id', 'row_number')
+    for row in upcoming_rows:
+        upcoming.setdefault(row['user_id'], []).append({
+            'id': row['group__lessons__id'],
+            'title': row['group__lessons__title'],
+            'date': row['group__lessons__scheduled_date'].strftime('%Y-%m-%d'),
+            'time': row['group__lessons__start_time'].strftime('%H:%M'),
+            'group': row['group__name'],
+            'group_id': row['group_id']
+        })
+
+    result = {}
+    for student_id in student_ids:
+        total = totals.get(student_id, {})
+        course_progress = None
+        first_group = first_groups.get(student_id)
+        if first_group is not None:
+            counts = group_counts.get(first_group['group_id'], {})
+            group_total = counts.get('total', 0)
+            group_completed = counts.get('completed', 0)
+            course_progress = {
+                'group_name': first_group['group__name'],
+                'group_id': first_group['group_id'],
+                'total_lessons': group_total,
+                'completed_lessons': group_completed,
+                'progress_percent': int((group_completed / group_total * 100)) if group_total > 0 else 0
+            }
+        result[student_id] = {
+            'total_lessons': total.get('total', 0),
+            'completed_lessons': total.get('completed', 0),
+            'course_progress': course_progress,
+            'upcoming_lessons': upcoming.get(student_id, []),
+        }
+    return result
+
+
+def _homework_section(student_ids):
+    from apps.homework.models import Homework
+
+    stats = {
+        row['student_id']: row
+        for row in Homework.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+            pending=Count('id', filter=Q(status__in=['assigned', 'second_chance'])),
+            avg_score=Avg('similarity_score', filter=Q(status='approved', similarity_score__isnull=False))
+        )
+    }
+
+    recent = {}
+    recent_rows = Homework.objects.filter(
+        student_id__in=student_ids
+    ).exclude(
+        status='assigned'
+    ).annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=F('student_id'),
+            order_by=[F('submission_date').desc(), F('updated_at').desc()]
+        )
+    ).filter(row_number__lte=RECENT_SUBMISSIONS_LIMIT).values(
+        'id', 'student_id', 'status', 'similarity_score', 'coins_earned',
+        'lesson_id', 'lesson__title', 'row_number'
+    ).order_by('student_id', 'row_number')
+    for row in recent_rows:
+        score = int(row['similarity_score'] * 100) if row['similarity_score'] else 0
+        recent.setdefault(row['student_id'], []).append({
+            'id': row['id'],
+            'lesson': row['lesson__title'],
+            'lesson_id': row['lesson_id'],
+            'status': 'accepted' if row['status'] == 'approved' else ('rejected' if row['status'] == 'rejected' else 'pending'),
+            'score': score,
+            'coins': row['coins_earned']
+        })
+
+    result = {}
+    for student_id in student_ids:
+        stat = stats.get(student_id, {})
+        avg_score = stat.get('avg_score')
+        result[student_id] = {
+            'pending_homework': stat.get('pending', 0),
+            'average_score': int(avg_score * 100) if avg_score is not None else 0,
+            'recent_submissions': recent.get(student_id, []),
+        }
+    return result
+
+
+SECTION_BUILDERS = {
+    'coins': _coins_section,
+    'lessons': _lessons_section,
+    'homework': _homework_section,
+}
+
+
+def refresh_dashboard_snapshots(student_ids, sections=ALL_SECTIONS):
+    """
+    Recompute the given dashboard sections for a batch of students and
+    upsert their snapshot rows. Students without a snapshot get all sections.
+    """
+    student_ids = list(
+        User.objects.filter(id__in=set(student_ids), role='student').values_list('id', flat=True)
+    )
+    if not student_ids:
+        return 0
+
+    existing = set(
+        StudentDashboardSnapshot.objects.filter(student_id__in=student_ids).values_list('student_id', flat=True)
+    )
+    if len(existing) < len(student_ids):
+        sections = ALL_SECTIONS
+
+    values = {student_id: {} for student_id in student_ids}
+    update_fields = ['updated_at']
+    for section in sections:
+        update_fields += SECTION_FIELDS[section]
+        for student_id, data in SECTION_BUILDERS[section](student_ids).items():
+            values[student_id].update(data)
+
+    snapshots = [
+        StudentDashboardSnapshot(student_id=student_id, **data)
+        for student_id, data in values.items()
+    ]
+    StudentDashboardSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=update_fields
+    )
+    return len(snapshots)
+
+
+def schedule_snapshot_refresh(student_ids, sections=ALL_SECTIONS):
+    """Refresh snapshots once the current transaction commits"""
+    student_ids = set(student_ids)
+    if student_ids:
+        transaction.on_commit(lambda: refresh_dashboard_snapshots(student_ids, sections))
+
+
+def rebuild_all_snapshots(chunk_size=500):
+    """Rebuild snapshots for every active student in chunks"""
+    student_ids = User.objects.filter(role='student', is_active=True).values_list('id', flat=True).order_by('id')
+
+    rebuilt = 0
+    chunk = []
+    for student_id in student_ids.iterator(chunk_size=chunk_size):
+        chunk.append(student_id)
+        if len(chunk) >= chunk_size:
+            rebuilt += refresh_dashboard_snapshots(chunk)
+            chunk = []
+    if chunk:
+        rebuilt += refresh_dashboard_snapshots(chunk)
+    return rebuilt
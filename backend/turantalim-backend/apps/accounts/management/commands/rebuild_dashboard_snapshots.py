@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.dashboard import rebuild_all_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Rebuild student dashboard snapshots in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of students refreshed per batch'
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_all_snapshots(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} dashboard snapshots'))
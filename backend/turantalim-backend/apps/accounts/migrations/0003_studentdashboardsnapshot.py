@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentDashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coins', models.PositiveIntegerField(default=0)),
+                ('coins_this_month', models.PositiveIntegerField(default=0, help_text='Earned transactions in the last 30 days')),
+                ('coins_last_month', models.PositiveIntegerField(default=0, help_text='Earned transactions 30-60 days ago')),
+                ('total_lessons', models.PositiveIntegerField(default=0)),
+                ('completed_lessons', models.PositiveIntegerField(default=0)),
+                ('course_progress', models.JSONField(blank=True, null=True)),
+                ('upcoming_lessons', models.JSONField(blank=True, default=list)),
+                ('pending_homework', models.PositiveIntegerField(default=0)),
+                ('average_score', models.PositiveIntegerField(default=0)),
+                ('recent_submissions', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshot', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Student Dashboard Snapshot',
+                'verbose_name_plural': 'Student Dashboard Snapshots',
+                'db_table': 'student_dashboard_snapshots',
+            },
+        ),
+    ]
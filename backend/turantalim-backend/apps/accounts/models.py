@@ -135,3 +135,54 @@ class PasswordResetToken(models.Model):
     
     def __str__(self):
         return f"Reset token for {self.user.email}"
+
+
+class StudentDashboardSnapshot(models.Model):
+    """Precomputed student dashboard data, one row per student"""
+    
+    student = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='dashboard_snapshot',
+        limit_choices_to={'role': 'student'}
+    )
+    
+    # Coins
+    coins = models.PositiveIntegerField(default=0)
+    coins_this_month = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Earned transactions in the last 30 days")
+    )
+    coins_last_month = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Earned transactions 30-60 days ago")
+    )
+    
+    # Lessons
+    total_lessons = models.PositiveIntegerField(default=0)
+    completed_lessons = models.PositiveIntegerField(default=0)
+    course_progress = models.JSONField(null=True, blank=True)
+    upcoming_lessons = models.JSONField(default=list, blank=True)
+    
+    # Homework
+    pending_homework = models.PositiveIntegerField(default=0)
+    average_score = models.PositiveIntegerField(default=0)
+    recent_submissions = models.JSONField(default=list, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'student_dashboard_snapshots'
+        verbose_name = _('Student Dashboard Snapshot')
+        verbose_name_plural = _('Student Dashboard Snapshots')
+    
+    def __str__(self):
+        return f"Dashboard snapshot for {self.student.email}"
+    
+    @property
+    def coins_trend(self):
+        if self.coins_last_month > 0:
+            return int(((self.coins_this_month - self.coins_last_month) / self.coins_last_month) * 100)
+        elif self.coins_this_month > 0:
+            return 100
+        return 0
@@ -0,0 +1,49 @@
+"""Keep student dashboard snapshots current on domain writes"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.accounts.dashboard import schedule_snapshot_refresh
+from apps.courses.models import Group
+from apps.lessons.models import Lesson
+from apps.homework.models import Homework
+from apps.gamification.models import StudentCoin, CoinTransaction
+
+
+@receiver(post_save, sender=Homework)
+@receiver(post_delete, sender=Homework)
+def homework_changed(sender, instance, **kwargs):
+    schedule_snapshot_refresh([instance.student_id], ['homework'])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    student_ids = Group.students.through.objects.filter(
+        group_id=instance.group_id
+    ).values_list('user_id', flat=True)
+    schedule_snapshot_refresh(student_ids, ['lessons'])
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, created, **kwargs):
+    if not created:
+        schedule_snapshot_refresh(instance.students.values_list('id', flat=True), ['lessons'])
+
+
+@receiver(m2m_changed, sender=Group.students.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance is the student
+        schedule_snapshot_refresh([instance.pk], ['lessons'])
+    elif action == 'pre_clear':
+        schedule_snapshot_refresh(instance.students.values_list('id', flat=True), ['lessons'])
+    else:
+        schedule_snapshot_refresh(pk_set or [], ['lessons'])
+
+
+@receiver(post_save, sender=StudentCoin)
+@receiver(post_save, sender=CoinTransaction)
+def coins_changed(sender, instance, **kwargs):
+    schedule_snapshot_refresh([instance.student_id], ['coins'])
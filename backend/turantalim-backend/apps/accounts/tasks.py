@@ -0,0 +1,13 @@
+from celery import shared_task
+
+
+@shared_task
+def rebuild_dashboard_snapshots():
+    """Rebuild all student dashboard snapshots (rolls coin trend windows and upcoming lessons)"""
+    from apps.accounts.dashboard import rebuild_all_snapshots
+    
+    try:
+        rebuilt = rebuild_all_snapshots()
+        return {'status': 'success', 'snapshots_rebuilt': rebuilt}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.dashboard import refresh_dashboard_snapshots
+from apps.accounts.models import StudentDashboardSnapshot, User
+from apps.courses.models import Course, Group
+from apps.gamification.models import StudentCoin
+from apps.homework.models import Homework
+from apps.lessons.models import Lesson
+
+
+class StudentDashboardQueryTests(TestCase):
+    """Query counts must not grow with the number of students, lessons or homeworks"""
+
+    def setUp(self):
+        self.course = Course.objects.create(name='Turkish A1')
+        self.today = timezone.localdate()
+
+    def make_students(self, count, lessons):
+        group = Group.objects.create(
+            name=f'Group {count}x{lessons}', course=self.course,
+            start_date=self.today, end_date=self.today + timedelta(days=90)
+        )
+        students = [
+            User.objects.create_user(
+                email=f'student-{count}-{lessons}-{i}@example.com', username=f'student-{count}-{lessons}-{i}',
+                password='x', role='student'
+            )
+            for i in range(count)
+        ]
+        group.students.add(*students)
+        for number in range(lessons):
+            lesson = Lesson.objects.create(
+                group=group, title=f'Lesson {number}', scheduled_date=self.today + timedelta(days=number - lessons // 2),
+                start_time='10:00', status='completed' if number < lessons // 2 else 'scheduled'
+            )
+            for student in students:
+                Homework.objects.create(
+                    lesson=lesson, student=student, description='Bugün hava güzel', status='approved',
+                    similarity_score=0.8, coins_earned=10, deadline=timezone.now() + timedelta(days=1),
+                    submission_date=timezone.now()
+                )
+        for student in students:
+            StudentCoin.objects.create(student=student).add_coins(10 * lessons, 'Homework approved')
+        return students
+
+    def test_refresh_is_constant_in_students_and_rows(self):
+        one = self.make_students(1, lessons=2)
+        many = self.make_students(8, lessons=12)
+
+        with self.assertNumQueries(11):
+            refresh_dashboard_snapshots([student.id for student in one])
+        with self.assertNumQueries(11):
+            refresh_dashboard_snapshots([student.id for student in many])
+
+        snapshot = StudentDashboardSnapshot.objects.get(student=many[0])
+        self.assertEqual((snapshot.total_lessons, snapshot.completed_lessons), (12, 6))
+        self.assertEqual(snapshot.coins, 120)
+        self.assertEqual(len(snapshot.recent_submissions), 5)
+
+    def test_dashboard_reads_one_snapshot_row(self):
+        for student in self.make_students(1, lessons=2) + self.make_students(1, lessons=12):
+            refresh_dashboard_snapshots([student.id])
+            client = APIClient()
+            client.force_authenticate(student)
+
+            with self.assertNumQueries(1):
+                response = client.get(reverse('student-dashboard'))
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['stats']['coins'], StudentCoin.objects.get(student=student).total_coins)
@@ -5,11 +5,11 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import authenticate
 from django.utils import timezone
-from django.db.models import Count, Avg, Q
 from datetime import timedelta, datetime
 import secrets
 
-from apps.accounts.models import User, UserVerification, PasswordResetToken
+from apps.accounts.models import User, UserVerification, PasswordResetToken, StudentDashboardSnapshot
+from apps.accounts.dashboard import refresh_dashboard_snapshots
 from apps.accounts.serializers import (
     UserSerializer, UserListSerializer, LoginSerializer, ChangePasswordSerializer,
     ForgotPasswordSerializer, ResetPasswordSerializer, CustomTokenObtainPairSerializer,
@@ -190,116 +190,22 @@ class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 class StudentDashboardView(generics.GenericAPIView):
-    """Student dashboard data endpoint"""
+    """Student dashboard data endpoint, served from the student's snapshot row"""
     permission_classes = [IsAuthenticated, IsStudent]
     
     def get(self, request):
         user = request.user
         
-        # Get student's groups
-        from apps.courses.models import Group
-        from apps.lessons.models import Lesson
-        from apps.homework.models import Homework
-        from apps.gamification.models import StudentCoin
-        from apps.attendance.models import Attendance
+        snapshot = StudentDashboardSnapshot.objects.filter(student=user).first()
+        if snapshot is None:
+            refresh_dashboard_snapshots([user.id])
+            snapshot = StudentDashboardSnapshot.objects.get(student=user)
         
-        # Get coin balance
-        coin_balance, _ = StudentCoin.objects.get_or_create(student=user)
-        coins = coin_balance.total_coins
-        
-        # Get student's groups
-        student_groups = Group.objects.filter(students=user, status='active')
-        
-        # Get all lessons for student's groups
-        all_lessons = Lesson.objects.filter(group__in=student_groups)
-        total_lessons = all_lessons.count()
-        completed_lessons = all_lessons.filter(status='completed').count()
-        
-        # Get homework stats
-        all_homeworks = Homework.objects.filter(student=user)
-        pending_homework = all_homeworks.filter(status__in=['assigned', 'second_chance']).count()
-        
-        # Calculate average score from approved homeworks
-        approved_homeworks = all_homeworks.filter(status='approved', similarity_score__isnull=False)
-        if approved_homeworks.exists():
-            average_score = int(approved_homeworks.aggregate(avg=Avg('similarity_score'))['avg'] * 100)
-        else:
-            average_score = 0
-        
-        # Get upcoming lessons
-        today = timezone.now().date()
-        upcoming_lessons = all_lessons.filter(
-            scheduled_date__gte=today,
-            status__in=['scheduled', 'rescheduled']
-        ).order_by('scheduled_date', 'start_time')[:5]
-        
-        upcoming_lessons_data = []
-        for lesson in upcoming_lessons:
-            upcoming_lessons_data.append({
-                'id': lesson.id,
-                'title': lesson.title,
-                'date': lesson.scheduled_date.strftime('%Y-%m-%d'),
-                'time': lesson.start_time.strftime('%H:%M'),
-                'group': lesson.group.name,
-                'group_id': lesson.group.id
-            })
-        
-        # Get recent submissions
-        recent_submissions = all_homeworks.exclude(
-            status='assigned'
-        ).order_by('-submission_date', '-updated_at')[:5]
-        
-        recent_submissions_data = []
-        for hw in recent_submissions:
-            score = int(hw.similarity_score * 100) if hw.similarity_score else 0
-            recent_submissions_data.append({
-                'id': hw.id,
-                'lesson': hw.lesson.title,
-                'lesson_id': hw.lesson.id,
-                'status': 'accepted' if hw.status == 'approved' else ('rejected' if hw.status == 'rejected' else 'pending'),
-                'score': score,
-                'coins': hw.coins_earned
-            })
-        
-        # Get course progress (first active group)
-        course_progress = None
-        if student_groups.exists():
-            first_group = student_groups.first()
-            group_lessons = Lesson.objects.filter(group=first_group)
-            group_total = group_lessons.count()
-            group_completed = group_lessons.filter(status='completed').count()
-            progress_percent = int((group_completed / group_total * 100)) if group_total > 0 else 0
-            
-            course_progress = {
-                'group_name': first_group.name,
-                'group_id': first_group.id,
-                'total_lessons': group_total,
-                'completed_lessons': group_completed,
-                'progress_percent': progress_percent
-            }
-        
-        # Calculate coins trend (compare with last month)
-        from apps.gamification.models import CoinTransaction
-        last_month = timezone.now() - timedelta(days=30)
-        coins_this_month = CoinTransaction.objects.filter(
-            student=user,
-            transaction_type='earned',
-            created_at__gte=last_month
-        ).aggregate(total=Count('amount'))['total'] or 0
-        
-        two_months_ago = timezone.now() - timedelta(days=60)
-        coins_last_month = CoinTransaction.objects.filter(
-            student=user,
-            transaction_type='earned',
-            created_at__gte=two_months_ago,
-            created_at__lt=last_month
-        ).aggregate(total=Count('amount'))['total'] or 0
-        
-        coins_trend = 0
-        if coins_last_month > 0:
-            coins_trend = int(((coins_this_month - coins_last_month) / coins_last_month) * 100)
-        elif coins_this_month > 0:
-            coins_trend = 100
+        # Lessons dated before today drop out until the nightly rebuild
+        today = timezone.now().date().strftime('%Y-%m-%d')
+        upcoming_lessons_data = [
+            lesson for lesson in snapshot.upcoming_lessons if lesson['date'] >= today
+        ]
         
         return Response({
             'user': {
@@ -310,14 +216,14 @@ class StudentDashboardView(generics.GenericAPIView):
                 'avatar': user.avatar.url if user.avatar else None
             },
             'stats': {
-                'coins': coins,
-                'coins_trend': coins_trend,
-                'completed_lessons': completed_lessons,
-                'total_lessons': total_lessons,
-                'pending_homework': pending_homework,
-                'average_score': average_score
+                'coins': snapshot.coins,
+                'coins_trend': snapshot.coins_trend,
+                'completed_lessons': snapshot.completed_lessons,
+                'total_lessons': snapshot.total_lessons,
+                'pending_homework': snapshot.pending_homework,
+                'average_score': snapshot.average_score
             },
-            'course_progress': course_progress,
+            'course_progress': snapshot.course_progress,
             'upcoming_lessons': upcoming_lessons_data,
-            'recent_submissions': recent_submissions_data
+            'recent_submissions': snapshot.recent_submissions
         })
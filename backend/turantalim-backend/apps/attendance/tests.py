@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.attendance.models import Attendance
+from apps.courses.models import Course, Group
+from apps.lessons.models import Lesson
+
+
+class BulkMarkAttendanceTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='x', role='teacher'
+        )
+        self.group = Group.objects.create(
+            name='A1', course=Course.objects.create(name='Turkish A1'), teacher=self.teacher,
+            start_date=today, end_date=today + timedelta(days=90)
+        )
+        self.students = [
+            User.objects.create_user(
+                email=f'student-{i}@example.com', username=f'student-{i}', password='x', role='student'
+            )
+            for i in range(3)
+        ]
+        self.group.students.add(*self.students[:2])
+        self.lesson = Lesson.objects.create(
+            group=self.group, title='Lesson 1', scheduled_date=today, start_time='10:00'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def mark(self, entries):
+        return self.client.post(
+            reverse('bulk-mark-attendance'),
+            {'lesson_id': self.lesson.id, 'attendance_data': entries},
+            format='json'
+        )
+
+    def test_marks_members_and_reports_the_rest(self):
+        response = self.mark([
+            {'student': self.students[0].id, 'status': 'present'},
+            {'student': self.students[1].id, 'status': 'late'},
+            {'student': self.students[2].id, 'status': 'present'},
+            {'student': self.students[0].id, 'status': 'absent'},
+        ])
+
+        self.assertEqual(response.data['marked_count'], 2)
+        self.assertEqual(response.data['errors'], [f'Student {self.students[2].id} not found in this group'])
+        self.assertEqual(
+            dict(Attendance.objects.values_list('student_id', 'status')),
+            {self.students[0].id: 'absent', self.students[1].id: 'late'}
+        )
+
+    def test_membership_is_checked_inside_the_transaction(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.mark([{'student': self.students[0].id, 'status': 'present'}])
+
+        sql = [query['sql'] for query in queries.captured_queries]
+        savepoint = next(i for i, statement in enumerate(sql) if statement.startswith('SAVEPOINT'))
+        membership = next(i for i, statement in enumerate(sql) if '"groups_students"' in statement)
+        self.assertLess(savepoint, membership)
@@ -1,15 +1,18 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from apps.attendance.models import Attendance
 from apps.attendance.serializers import (
     AttendanceSerializer, AttendanceListSerializer, BulkAttendanceSerializer
 )
+from apps.courses.models import Group
 from apps.lessons.models import Lesson
 from apps.accounts.models import User
 from apps.accounts.permissions import IsTeacher, IsAdmin
+from apps.gamification.leaderboard import mark_groups_dirty
 from core.filters import AttendanceFilter
 
 class AttendanceListView(generics.ListCreateAPIView):
@@ -93,29 +96,64 @@ class BulkMarkAttendanceView(generics.GenericAPIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        marked_count = 0
         errors = []
+        valid_statuses = dict(Attendance.STATUS_CHOICES)
         
+        student_ids = set()
         for att_data in attendance_data:
-            student_id = att_data.get('student')
-            att_status = att_data.get('status')
-            
             try:
-                student = User.objects.get(id=student_id, role='student')
-                attendance, created = Attendance.objects.update_or_create(
+                student_ids.add(int(att_data.get('student')))
+            except (TypeError, ValueError):
+                pass
+        
+        with transaction.atomic():
+            # Validate every student against the lesson's group in one query,
+            # locking the memberships so nobody leaves before the batch is written
+            group_student_ids = set(
+                Group.students.through.objects.select_for_update(of=('self',)).filter(
+                    group_id=lesson.group_id,
+                    user_id__in=student_ids,
+                    user__role='student'
+                ).values_list('user_id', flat=True)
+            )
+            
+            attendances = {}
+            for att_data in attendance_data:
+                student_id = att_data.get('student')
+                att_status = att_data.get('status')
+                
+                try:
+                    student_id = int(student_id)
+                except (TypeError, ValueError):
+                    errors.append(f'Student {student_id} not found')
+                    continue
+                if student_id not in group_student_ids:
+                    errors.append(f'Student {student_id} not found in this group')
+                    continue
+                if att_status not in valid_statuses:
+                    errors.append(f'Invalid status "{att_status}" for student {student_id}')
+                    continue
+                
+                # A repeated student keeps the last submitted entry
+                attendances[student_id] = Attendance(
                     lesson=lesson,
-                    student=student,
-                    defaults={
-                        'status': att_status,
-                        'marked_by': request.user,
-                        'notes': att_data.get('notes', '')
-                    }
+                    student_id=student_id,
+                    status=att_status,
+                    marked_by=request.user,
+                    notes=att_data.get('notes', '')
                 )
-                marked_count += 1
-            except User.DoesNotExist:
-                errors.append(f'Student {student_id} not found')
+            
+            Attendance.objects.bulk_create(
+                attendances.values(),
+                update_conflicts=True,
+                unique_fields=['lesson', 'student'],
+                update_fields=['status', 'marked_by', 'notes']
+            )
+            # bulk_create skips post_save, so queue the leaderboard explicitly
+            if attendances:
+                mark_groups_dirty([lesson.group_id])
         
         return Response({
-            'marked_count': marked_count,
+            'marked_count': len(attendances),
             'errors': errors
         })
@@ -40,6 +40,10 @@ class GroupAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_stats()
+    
     def student_count(self, obj):
-        return obj.students.count()
+        return obj.student_count
     student_count.short_description = 'Students'
+    student_count.admin_order_field = 'num_students'
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from apps.accounts.models import User
 
@@ -52,6 +54,26 @@ class Course(models.Model):
         return self.name
 
 
+class GroupQuerySet(models.QuerySet):
+    """Group queryset helpers"""
+    
+    def with_stats(self):
+        """Annotate student count and fullness, and join course and teacher"""
+        # Counted in a subquery so filters on students (e.g. students=user) don't skew it
+        student_count = Group.students.through.objects.filter(
+            group_id=OuterRef('pk')
+        ).values('group_id').annotate(count=Count('*')).values('count')
+        
+        return self.select_related('course', 'teacher').annotate(
+            num_students=Coalesce(Subquery(student_count), 0)
+        ).annotate(
+            has_max_students=ExpressionWrapper(
+                Q(num_students__gte=F('max_students')),
+                output_field=BooleanField()
+            )
+        )
+
+
 class Group(models.Model):
     """Student group model"""
     
@@ -117,6 +139,8 @@ class Group(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = GroupQuerySet.as_manager()
+    
     class Meta:
         db_table = 'groups'
         ordering = ['-created_at']
@@ -129,8 +153,12 @@ class Group(models.Model):
     
     @property
     def student_count(self):
+        if hasattr(self, 'num_students'):
+            return self.num_students
         return self.students.count()
     
     @property
     def is_full(self):
+        if hasattr(self, 'has_max_students'):
+            return self.has_max_students
         return self.student_count >= self.max_students
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.courses.models import Course, Group
+
+
+class GroupDetailViewTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.group = Group.objects.create(
+            name='A1', course=Course.objects.create(name='Turkish A1'), max_students=5,
+            start_date=today, end_date=today + timedelta(days=90)
+        )
+        self.group.students.add(*[
+            User.objects.create_user(
+                email=f'student-{i}@example.com', username=f'student-{i}', password='x', role='student'
+            )
+            for i in range(2)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', username='admin', password='x', role='admin'
+        ))
+
+    def test_update_returns_fresh_stats(self):
+        url = reverse('group-detail', args=[self.group.id])
+
+        response = self.client.patch(url, {'max_students': 2}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['student_count'], 2)
+        self.assertTrue(response.data['is_full'])
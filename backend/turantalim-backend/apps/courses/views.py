@@ -43,11 +43,11 @@ class GroupListView(generics.ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.is_admin:
-            return Group.objects.all()
+            return Group.objects.with_stats()
         elif user.is_teacher:
-            return Group.objects.filter(teacher=user)
+            return Group.objects.filter(teacher=user).with_stats()
         else:  # student
-            return Group.objects.filter(students=user)
+            return Group.objects.filter(students=user).with_stats()
     
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -66,11 +66,16 @@ class GroupDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.is_admin:
-            return Group.objects.all()
+            return Group.objects.with_stats()
         elif user.is_teacher:
-            return Group.objects.filter(teacher=user)
+            return Group.objects.filter(teacher=user).with_stats()
         else:
-            return Group.objects.filter(students=user)
+            return Group.objects.filter(students=user).with_stats()
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # The stats were annotated before the save; re-read them for the response
+        serializer.instance = Group.objects.with_stats().get(id=serializer.instance.id)
 
 class GroupStudentsView(generics.ListAPIView):
     """List students in a group"""
@@ -79,7 +84,7 @@ class GroupStudentsView(generics.ListAPIView):
     
     def get_object(self):
         group_id = self.kwargs['pk']
-        return get_object_or_404(Group, id=group_id)
+        return get_object_or_404(Group.objects.with_stats(), id=group_id)
     
     def get(self, request, *args, **kwargs):
         group = self.get_object()
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class GamificationConfig(AppConfig):
+    name = 'apps.gamification'
+
+    def ready(self):
+        from apps.gamification import signals  # noqa: F401
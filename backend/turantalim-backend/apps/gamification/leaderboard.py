@@ -0,0 +1,201 @@
+"""
+Set-based leaderboard recomputation.
+
+Stats for every (group, student) membership come from one query with
+correlated counts, ranks from RANK() OVER (PARTITION BY group), and rows
+are written back with a single upsert.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Exists, F, Func, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, Rank
+
+from apps.courses.models import Group
+from apps.gamification.models import Leaderboard, LeaderboardDirtyGroup, StudentCoin
+
+LEADERBOARD_FIELDS = ['rank', 'coins', 'lessons_completed', 'homeworks_completed', 'attendance_percentage']
+
+# Leaderboards of these groups only change on an explicit rebuild
+FROZEN_GROUP_STATUSES = ('completed', 'cancelled')
+
+LEADERBOARD_CACHE_KEY = 'group_leaderboard:{group_id}'
+
+
+def _subquery_count(queryset):
+    """COUNT(*) of a correlated queryset as an expression (0 when empty)"""
+    return Coalesce(
+        Subquery(queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count')),
+        0
+    )
+
+
+def leaderboard_rows(group_ids):
+    """Ranked leaderboard stats for all memberships of the given groups"""
+    from apps.attendance.models import Attendance
+    from apps.homework.models import Homework
+    from apps.lessons.models import Lesson
+
+    student = OuterRef('user_id')
+    group = OuterRef('group_id')
+    attendances = Attendance.objects.filter(student_id=student, lesson__group_id=group)
+
+    return Group.students.through.objects.filter(
+        group_id__in=group_ids
+    ).annotate(
+        coins=Coalesce(
+            Subquery(StudentCoin.objects.filter(student_id=student).values('total_coins')[:1]),
+            0
+        ),
+        lessons_completed=_subquery_count(
+            Lesson.objects.filter(group_id=group, status='completed')
+        ),
+        homeworks_completed=_subquery_count(
+            Homework.objects.filter(
+                student_id=student,
+                lesson__group_id=group,
+                status__in=['approved', 'second_chance']
+            )
+        ),
+        attendance_total=_subquery_count(attendances),
+        attendance_present=_subquery_count(attendances.filter(status='present')),
+    ).annotate(
+        rank=Window(
+            Rank(),
+            partition_by=F('group_id'),
+            order_by=[F('coins').desc(), F('lessons_completed').desc(), F('homeworks_completed').desc()]
+        )
+    ).values(
+        'group_id', 'user_id', 'rank', 'coins', 'lessons_completed', 'homeworks_completed',
+        'attendance_total', 'attendance_present'
+    )
+
+
+def rebuild_leaderboards(group_ids, batch_size=1000):
+    """Recompute and upsert leaderboard rows for the given groups"""
+    entries = []
+    for row in leaderboard_rows(group_ids):
+        if row['attendance_total']:
+            attendance_percentage = (row['attendance_present'] / row['attendance_total']) * 100
+        else:
+            attendance_percentage = 0.0
+        entries.append(Leaderboard(
+            group_id=row['group_id'],
+            student_id=row['user_id'],
+            rank=row['rank'],
+            coins=row['coins'],
+            lessons_completed=row['lessons_completed'],
+            homeworks_completed=row['homeworks_completed'],
+            attendance_percentage=attendance_percentage
+        ))
+
+    Leaderboard.objects.bulk_create(
+        entries,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['student', 'group'],
+        update_fields=LEADERBOARD_FIELDS + ['last_updated']
+    )
+
+    # Drop entries of students who left the group
+    Leaderboard.objects.filter(group_id__in=group_ids).exclude(
+        Exists(Group.students.through.objects.filter(
+            group_id=OuterRef('group_id'),
+            user_id=OuterRef('student_id')
+        ))
+    ).delete()
+
+    return len(entries)
+
+
+def mark_groups_dirty(group_ids):
+    """Queue the given groups for the next leaderboard run"""
+    group_ids = set(group_ids)
+    if not group_ids:
+        return
+    LeaderboardDirtyGroup.objects.bulk_create(
+        [LeaderboardDirtyGroup(group_id=group_id) for group_id in group_ids],
+        update_conflicts=True,
+        unique_fields=['group'],
+        update_fields=['marked_at']
+    )
+
+
+def mark_student_groups_dirty(student_ids):
+    """Queue every non-frozen group of the given students"""
+    mark_groups_dirty(
+        Group.students.through.objects.filter(
+            user_id__in=set(student_ids)
+        ).exclude(
+            group__status__in=FROZEN_GROUP_STATUSES
+        ).values_list('group_id', flat=True)
+    )
+
+
+def claim_dirty_groups(chunk_size):
+    """
+    Remove up to chunk_size dirty marks, oldest first, and return their group
+    ids. It is a single DELETE ... RETURNING committed on its own, so marks
+    are locked only for that statement and mark_groups_dirty in request
+    transactions never waits for a rebuild; SKIP LOCKED keeps concurrent
+    runs from claiming the same marks.
+    """
+    table = connection.ops.quote_name(LeaderboardDirtyGroup._meta.db_table)
+    skip_locked = ' FOR UPDATE SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else ''
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE group_id IN ("
+            f"SELECT group_id FROM {table} ORDER BY marked_at LIMIT %s{skip_locked}"
+            ") RETURNING group_id",
+            [chunk_size]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def rebuild_dirty_leaderboards(chunk_size=500):
+    """
+    Drain the dirty set in chunks. Each chunk is claimed first and rebuilt
+    outside the claim; a group marked again meanwhile gets a fresh mark and
+    is rebuilt on the next run, and a failed chunk is marked dirty again.
+    """
+    groups_processed = 0
+    updated_count = 0
+    while True:
+        group_ids = claim_dirty_groups(chunk_size)
+        if not group_ids:
+            break
+        
+        try:
+            with transaction.atomic():
+                active_ids = list(
+                    Group.objects.filter(id__in=group_ids).exclude(
+                        status__in=FROZEN_GROUP_STATUSES
+                    ).values_list('id', flat=True)
+                )
+                if active_ids:
+                    updated_count += rebuild_leaderboards(active_ids)
+        except Exception:
+            mark_groups_dirty(group_ids)
+            raise
+        groups_processed += len(active_ids)
+    
+    return groups_processed, updated_count
+
+
+def leaderboard_cache_key(group_id):
+    return LEADERBOARD_CACHE_KEY.format(group_id=group_id)
+
+
+def invalidate_leaderboard_cache(group_ids):
+    """Drop cached live leaderboards of the given groups once the transaction commits"""
+    keys = [leaderboard_cache_key(group_id) for group_id in set(group_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_student_leaderboard_cache(student_ids):
+    """Drop cached live leaderboards of every group of the given students"""
+    invalidate_leaderboard_cache(
+        Group.students.through.objects.filter(
+            user_id__in=set(student_ids)
+        ).values_list('group_id', flat=True)
+    )
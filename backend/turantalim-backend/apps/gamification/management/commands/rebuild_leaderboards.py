@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.models import Group
+from apps.gamification.leaderboard import rebuild_leaderboards, FROZEN_GROUP_STATUSES
+
+
+class Command(BaseCommand):
+    help = 'Explicitly rebuild group leaderboards, including frozen (completed/cancelled) groups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--group',
+            type=int,
+            action='append',
+            dest='group_ids',
+            help='Group ID to rebuild (repeatable)'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild every group'
+        )
+        parser.add_argument(
+            '--include-frozen',
+            action='store_true',
+            help='With --all, also rebuild completed and cancelled groups'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of groups rebuilt per batch'
+        )
+
+    def handle(self, *args, **options):
+        if options['group_ids']:
+            groups = Group.objects.filter(id__in=options['group_ids'])
+        elif options['all']:
+            groups = Group.objects.all()
+            if not options['include_frozen']:
+                groups = groups.exclude(status__in=FROZEN_GROUP_STATUSES)
+        else:
+            raise CommandError('Pass --group ID or --all')
+
+        group_ids = list(groups.values_list('id', flat=True).order_by('id'))
+        chunk_size = options['chunk_size']
+        updated = 0
+        for start in range(0, len(group_ids), chunk_size):
+            updated += rebuild_leaderboards(group_ids[start:start + chunk_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {updated} leaderboard entries across {len(group_ids)} groups'
+        ))
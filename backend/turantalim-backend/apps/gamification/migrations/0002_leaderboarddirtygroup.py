@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('gamification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardDirtyGroup',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_dirty_mark', serialize=False, to='courses.group')),
+                ('marked_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Dirty Group',
+                'verbose_name_plural': 'Leaderboard Dirty Groups',
+                'db_table': 'leaderboard_dirty_groups',
+            },
+        ),
+    ]
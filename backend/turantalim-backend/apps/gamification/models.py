@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from apps.accounts.models import User
@@ -39,34 +41,48 @@ class StudentCoin(models.Model):
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.total_coins} coins"
     
-    def add_coins(self, amount, reason=''):
+    def add_coins(self, amount, reason='', related_homework=None, related_lesson=None):
         """Add coins to student balance"""
-        self.total_coins += amount
-        self.coins_earned += amount
-        self.save()
-        
-        CoinTransaction.objects.create(
-            student=self.student,
-            transaction_type='earned',
-            amount=amount,
-            reason=reason
-        )
-    
-    def subtract_coins(self, amount, reason=''):
-        """Subtract coins from student balance"""
-        if amount <= self.total_coins:
-            self.total_coins -= amount
-            self.coins_spent += amount
-            self.save()
+        with transaction.atomic():
+            # Increment in the database so concurrent awards are never lost
+            StudentCoin.objects.filter(pk=self.pk).update(
+                total_coins=F('total_coins') + amount,
+                coins_earned=F('coins_earned') + amount,
+                updated_at=timezone.now()
+            )
             
             CoinTransaction.objects.create(
-                student=self.student,
-                transaction_type='spent',
+                student_id=self.student_id,
+                transaction_type='earned',
                 amount=amount,
-                reason=reason
+                reason=reason,
+                related_homework=related_homework,
+                related_lesson=related_lesson
+            )
+        
+        self.refresh_from_db(fields=['total_coins', 'coins_earned', 'coins_spent', 'updated_at'])
+    
+    def subtract_coins(self, amount, reason='', related_homework=None, related_lesson=None):
+        """Subtract coins from student balance"""
+        with transaction.atomic():
+            # Conditional update: the balance check and the decrement are one statement
+            updated = StudentCoin.objects.filter(pk=self.pk, total_coins__gte=amount).update(
+                total_coins=F('total_coins') - amount,
+                coins_spent=F('coins_spent') + amount,
+                updated_at=timezone.now()
             )
-            return True
-        return False
+            if updated:
+                CoinTransaction.objects.create(
+                    student_id=self.student_id,
+                    transaction_type='spent',
+                    amount=amount,
+                    reason=reason,
+                    related_homework=related_homework,
+                    related_lesson=related_lesson
+                )
+        
+        self.refresh_from_db(fields=['total_coins', 'coins_earned', 'coins_spent', 'updated_at'])
+        return bool(updated)
 
 
 class CoinTransaction(models.Model):
@@ -165,6 +181,27 @@ class Leaderboard(models.Model):
         return f"#{self.rank} - {self.student.get_full_name()} ({self.coins} coins)"
 
 
+class LeaderboardDirtyGroup(models.Model):
+    """Groups whose leaderboard must be recomputed on the next run"""
+    
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='leaderboard_dirty_mark'
+    )
+    
+    marked_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'leaderboard_dirty_groups'
+        verbose_name = _('Leaderboard Dirty Group')
+        verbose_name_plural = _('Leaderboard Dirty Groups')
+    
+    def __str__(self):
+        return f"Dirty leaderboard: {self.group_id}"
+
+
 class Achievement(models.Model):
     """Student achievements and badges"""
     
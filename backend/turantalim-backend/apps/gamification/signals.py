@@ -0,0 +1,64 @@
+"""Mark group leaderboards dirty and drop cached ones when their inputs change"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.courses.models import Group
+from apps.lessons.models import Lesson
+from apps.homework.models import Homework
+from apps.attendance.models import Attendance
+from apps.gamification.models import StudentCoin, CoinTransaction
+from apps.gamification.leaderboard import (
+    mark_groups_dirty, mark_student_groups_dirty,
+    invalidate_leaderboard_cache, invalidate_student_leaderboard_cache
+)
+
+
+@receiver(post_save, sender=StudentCoin)
+@receiver(post_save, sender=CoinTransaction)
+def coins_changed(sender, instance, **kwargs):
+    mark_student_groups_dirty([instance.student_id])
+    invalidate_student_leaderboard_cache([instance.student_id])
+
+
+@receiver(post_save, sender=Homework)
+@receiver(post_delete, sender=Homework)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def lesson_record_changed(sender, instance, **kwargs):
+    group_ids = list(Lesson.objects.filter(id=instance.lesson_id).values_list('group_id', flat=True))
+    mark_groups_dirty(group_ids)
+    if sender is Homework:
+        invalidate_leaderboard_cache(group_ids)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    mark_groups_dirty([instance.group_id])
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, created, **kwargs):
+    # Cached leaderboards embed the group name
+    if not created:
+        invalidate_leaderboard_cache([instance.pk])
+
+
+@receiver(m2m_changed, sender=Group.students.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance is the student and pk_set the groups joined or left; on
+        # clear the groups are only known before the rows are deleted
+        if action in ('post_add', 'post_remove'):
+            group_ids = pk_set or []
+        elif action == 'pre_clear':
+            group_ids = list(
+                Group.students.through.objects.filter(user_id=instance.pk).values_list('group_id', flat=True)
+            )
+        else:
+            return
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        group_ids = [instance.pk]
+    else:
+        return
+    mark_groups_dirty(group_ids)
+    invalidate_leaderboard_cache(group_ids)
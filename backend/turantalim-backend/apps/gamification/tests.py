@@ -0,0 +1,290 @@
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.attendance.models import Attendance
+from apps.courses.models import Course, Group
+from apps.gamification.leaderboard import (
+    claim_dirty_groups, leaderboard_cache_key, mark_groups_dirty, rebuild_dirty_leaderboards, rebuild_leaderboards
+)
+from apps.gamification.models import CoinTransaction, Leaderboard, LeaderboardDirtyGroup, StudentCoin
+
+
+def make_group(students=2, name='A1'):
+    course, _ = Course.objects.get_or_create(name='Turkish A1')
+    today = timezone.localdate()
+    group = Group.objects.create(name=name, course=course, start_date=today, end_date=today + timedelta(days=90))
+    group.students.add(*[
+        User.objects.create_user(
+            email=f'student-{name}-{i}@example.com', username=f'student-{name}-{i}', password='x', role='student'
+        )
+        for i in range(students)
+    ])
+    return group
+
+
+def legacy_leaderboard(group):
+    """Per-student loop that rebuild_leaderboards replaced, kept as the benchmark baseline"""
+    from apps.homework.models import Homework
+
+    entries = []
+    for student in group.students.all():
+        coin_balance = StudentCoin.objects.filter(student=student).first()
+        attendance_records = Attendance.objects.filter(student=student, lesson__group=group)
+        if attendance_records.exists():
+            attendance = attendance_records.filter(status='present').count() / attendance_records.count() * 100
+        else:
+            attendance = 0.0
+        entries.append({
+            'student_id': student.id,
+            'coins': coin_balance.total_coins if coin_balance else 0,
+            'lessons_completed': group.lessons.filter(status='completed').count(),
+            'homeworks_completed': Homework.objects.filter(
+                student=student, lesson__group=group, status__in=['approved', 'second_chance']
+            ).count(),
+            'attendance_percentage': attendance,
+        })
+    return entries
+
+
+class RebuildLeaderboardTests(TestCase):
+    def test_ties_share_a_rank(self):
+        group = make_group(students=3)
+        students = list(group.students.order_by('id'))
+        for student, coins in zip(students, (50, 80, 50)):
+            StudentCoin.objects.create(student=student, total_coins=coins)
+
+        self.assertEqual(rebuild_leaderboards([group.id]), 3)
+
+        self.assertEqual(
+            dict(Leaderboard.objects.values_list('student_id', 'rank')),
+            {students[0].id: 2, students[1].id: 1, students[2].id: 2}
+        )
+
+    def test_students_who_left_are_dropped(self):
+        group = make_group(students=2)
+        rebuild_leaderboards([group.id])
+        group.students.remove(group.students.first())
+
+        rebuild_leaderboards([group.id])
+
+        self.assertEqual(Leaderboard.objects.filter(group=group).count(), 1)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to run benchmarks')
+class LeaderboardBenchmark(TestCase):
+    """Rank 10,000 students in 400 groups (10 lessons, homework and attendance each)"""
+
+    GROUPS = 400
+    STUDENTS_PER_GROUP = 25
+    LESSONS_PER_GROUP = 10
+    LEGACY_SAMPLE_GROUPS = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.homework.models import Homework
+        from apps.lessons.models import Lesson
+
+        rng = random.Random(5)
+        today = timezone.localdate()
+        course = Course.objects.create(name='Benchmark')
+        groups = Group.objects.bulk_create([
+            Group(name=f'G{i}', course=course, start_date=today, end_date=today + timedelta(days=90))
+            for i in range(cls.GROUPS)
+        ])
+        students = User.objects.bulk_create([
+            User(email=f's{i}@example.com', username=f's{i}', password='!', role='student')
+            for i in range(cls.GROUPS * cls.STUDENTS_PER_GROUP)
+        ], batch_size=1000)
+        StudentCoin.objects.bulk_create(
+            [StudentCoin(student=student, total_coins=rng.randint(0, 40) * 5) for student in students],
+            batch_size=1000
+        )
+        members = {group.id: students[i::cls.GROUPS] for i, group in enumerate(groups)}
+        Group.students.through.objects.bulk_create([
+            Group.students.through(group_id=group_id, user_id=student.id)
+            for group_id, group_students in members.items()
+            for student in group_students
+        ], batch_size=1000)
+        lessons = Lesson.objects.bulk_create([
+            Lesson(
+                group=group, title=f'L{n}', scheduled_date=today + timedelta(days=n), start_time='10:00',
+                status='completed' if n < cls.LESSONS_PER_GROUP // 2 else 'scheduled'
+            )
+            for group in groups
+            for n in range(cls.LESSONS_PER_GROUP)
+        ], batch_size=1000)
+        deadline = timezone.now() + timedelta(days=1)
+        homeworks, attendances = [], []
+        for lesson in lessons:
+            for student in members[lesson.group_id]:
+                homeworks.append(Homework(
+                    lesson=lesson, student=student, description='x', deadline=deadline,
+                    status=rng.choice(['assigned', 'approved', 'rejected'])
+                ))
+                attendances.append(Attendance(
+                    lesson=lesson, student=student, status=rng.choice(['present', 'present', 'absent'])
+                ))
+        Homework.objects.bulk_create(homeworks, batch_size=2000)
+        Attendance.objects.bulk_create(attendances, batch_size=2000)
+        cls.group_ids = [group.id for group in groups]
+
+    def test_benchmark(self):
+        started = time.perf_counter()
+        for start in range(0, len(self.group_ids), 100):
+            rebuild_leaderboards(self.group_ids[start:start + 100])
+        set_based = time.perf_counter() - started
+
+        sample = Group.objects.filter(id__in=self.group_ids[:self.LEGACY_SAMPLE_GROUPS])
+        started = time.perf_counter()
+        legacy = {group.id: legacy_leaderboard(group) for group in sample}
+        legacy_seconds = (time.perf_counter() - started) * self.GROUPS / self.LEGACY_SAMPLE_GROUPS
+
+        # Same stats as the loop it replaced
+        for group_id, entries in legacy.items():
+            rows = {
+                row['student_id']: row
+                for row in Leaderboard.objects.filter(group_id=group_id).values(
+                    'student_id', 'coins', 'lessons_completed', 'homeworks_completed', 'attendance_percentage'
+                )
+            }
+            for entry in entries:
+                row = rows[entry.pop('student_id')]
+                self.assertAlmostEqual(row.pop('attendance_percentage'), entry.pop('attendance_percentage'))
+                row.pop('student_id')
+                self.assertEqual(row, entry)
+
+        self.assertEqual(Leaderboard.objects.count(), self.GROUPS * self.STUDENTS_PER_GROUP)
+        print(
+            f'\n{Leaderboard.objects.count()} students in {self.GROUPS} groups ({connection.vendor}): '
+            f'set-based {set_based:.2f}s, per-student loop {legacy_seconds:.1f}s '
+            f'(extrapolated from {self.LEGACY_SAMPLE_GROUPS} groups)'
+        )
+
+
+class DirtyLeaderboardTests(TestCase):
+    def setUp(self):
+        self.groups = [make_group(name=name) for name in ('A1', 'A2', 'B1')]
+        LeaderboardDirtyGroup.objects.all().delete()
+
+    def test_claim_removes_oldest_marks(self):
+        mark_groups_dirty([group.id for group in self.groups])
+        for age, group in enumerate(reversed(self.groups)):
+            LeaderboardDirtyGroup.objects.filter(group=group).update(
+                marked_at=timezone.now() - timedelta(minutes=age)
+            )
+
+        self.assertEqual(set(claim_dirty_groups(2)), {self.groups[0].id, self.groups[1].id})
+        self.assertEqual(list(LeaderboardDirtyGroup.objects.values_list('group_id', flat=True)), [self.groups[2].id])
+
+    def test_rebuild_drains_dirty_groups(self):
+        mark_groups_dirty([group.id for group in self.groups])
+
+        self.assertEqual(rebuild_dirty_leaderboards(chunk_size=2), (3, 6))
+        self.assertFalse(LeaderboardDirtyGroup.objects.exists())
+        self.assertEqual(Leaderboard.objects.count(), 6)
+
+    def test_failed_chunk_is_marked_again(self):
+        mark_groups_dirty([self.groups[0].id])
+
+        with mock.patch('apps.gamification.leaderboard.rebuild_leaderboards', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                rebuild_dirty_leaderboards()
+
+        self.assertTrue(LeaderboardDirtyGroup.objects.filter(group_id=self.groups[0].id).exists())
+
+
+class MembershipSignalTests(TestCase):
+    def setUp(self):
+        self.groups = [make_group(students=1, name=name) for name in ('A1', 'A2')]
+        self.student = self.groups[0].students.get()
+        self.groups[1].students.add(self.student)
+        LeaderboardDirtyGroup.objects.all().delete()
+        for group in self.groups:
+            cache.set(leaderboard_cache_key(group.id), ['cached'])
+
+    def dirty_group_ids(self):
+        return set(LeaderboardDirtyGroup.objects.values_list('group_id', flat=True))
+
+    def test_student_leaving_marks_left_group(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.student_groups.remove(self.groups[0])
+
+        self.assertEqual(self.dirty_group_ids(), {self.groups[0].id})
+        self.assertIsNone(cache.get(leaderboard_cache_key(self.groups[0].id)))
+        self.assertIsNotNone(cache.get(leaderboard_cache_key(self.groups[1].id)))
+
+    def test_student_clearing_groups_marks_all_left_groups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.student_groups.clear()
+
+        self.assertEqual(self.dirty_group_ids(), {group.id for group in self.groups})
+        self.assertIsNone(cache.get(leaderboard_cache_key(self.groups[1].id)))
+
+    def test_group_removing_student_marks_group(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.groups[1].students.remove(self.student)
+
+        self.assertEqual(self.dirty_group_ids(), {self.groups[1].id})
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class CoinBalanceConcurrencyTests(TransactionTestCase):
+    """Concurrent awards and spends on one balance (needs row-level locking, e.g. PostgreSQL)"""
+
+    THREADS = 8
+    OPERATIONS = 25
+
+    def test_concurrent_add_and_subtract(self):
+        student = User.objects.create_user(
+            email='student@example.com', username='student', password='x', role='student'
+        )
+        balance_id = StudentCoin.objects.create(student=student, total_coins=20).id
+        results = [None] * self.THREADS
+        start = threading.Barrier(self.THREADS)
+
+        def worker(index):
+            rng = random.Random(index)
+            added = spent = 0
+            try:
+                start.wait()
+                for _ in range(self.OPERATIONS):
+                    # Each thread works on its own stale copy, as separate requests would
+                    coins = StudentCoin.objects.get(id=balance_id)
+                    if rng.random() < 0.5:
+                        coins.add_coins(3, 'stress add')
+                        added += 3
+                    elif coins.subtract_coins(7, 'stress spend'):
+                        spent += 7
+                    self.assertGreaterEqual(coins.total_coins, 0)
+                results[index] = (added, spent)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertNotIn(None, results)
+        added = sum(result[0] for result in results)
+        spent = sum(result[1] for result in results)
+        coins = StudentCoin.objects.get(id=balance_id)
+        self.assertEqual(coins.total_coins, 20 + added - spent)
+        self.assertEqual((coins.coins_earned, coins.coins_spent), (added, spent))
+        self.assertGreaterEqual(coins.total_coins, 0)
+        ledger = dict(
+            CoinTransaction.objects.filter(student=student).values_list('transaction_type').annotate(Sum('amount'))
+        )
+        self.assertEqual((ledger.get('earned', 0), ledger.get('spent', 0)), (added, spent))
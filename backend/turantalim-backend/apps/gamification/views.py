@@ -40,60 +40,55 @@ class CoinTransactionsView(generics.ListAPIView):
         return CoinTransaction.objects.filter(student=self.request.user).order_by('-created_at')
 
 class GroupLeaderboardView(generics.ListAPIView):
-    """Get leaderboard for a group - dynamically calculated"""
+    """Get leaderboard for a group - dynamically calculated, cached until a member's coins or homework change"""
     permission_classes = [IsAuthenticated]
     
     def list(self, request, *args, **kwargs):
         from rest_framework.response import Response
+        from django.conf import settings
+        from django.core.cache import cache
         from django.db.models import Avg, Count, Q
-        from apps.homework.models import Homework
-        from apps.lessons.models import Lesson
+        from django.db.models.functions import Coalesce
+        from apps.gamification.leaderboard import leaderboard_cache_key
         
         group_id = self.kwargs['group_id']
-        group = get_object_or_404(Group, id=group_id)
+        cache_key = leaderboard_cache_key(group_id)
+        leaderboard_data = cache.get(cache_key)
+        if leaderboard_data is not None:
+            return Response(leaderboard_data)
         
-        # Get all students in the group
-        students = group.students.all()
+        group = get_object_or_404(Group, id=group_id)
         
-        leaderboard_data = []
-        for student in students:
-            # Get student's coins
-            coin_balance, _ = StudentCoin.objects.get_or_create(student=student)
-            
-            # Get student's completed lessons count (lessons where student submitted homework)
-            student_completed_lessons = Homework.objects.filter(
-                student=student,
-                lesson__group=group,
-                status__in=['approved', 'submitted', 'reviewed']
-            ).count()
-            
-            # Get average homework score
-            approved_homeworks = Homework.objects.filter(
-                student=student,
-                lesson__group=group,
-                status='approved',
-                similarity_score__isnull=False
+        # One grouped query over the members; students without a coin balance count as 0
+        group_homeworks = Q(homeworks__lesson__group=group)
+        students = group.students.annotate(
+            total_coins=Coalesce('coin_balance__total_coins', 0),
+            completed_lessons=Count(
+                'homeworks',
+                filter=group_homeworks & Q(homeworks__status__in=['approved', 'submitted', 'reviewed'])
+            ),
+            avg_score=Avg(
+                'homeworks__similarity_score',
+                filter=group_homeworks & Q(homeworks__status='approved', homeworks__similarity_score__isnull=False)
             )
-            
-            avg_score = 0
-            if approved_homeworks.exists():
-                avg_score = int(approved_homeworks.aggregate(avg=Avg('similarity_score'))['avg'] * 100)
-            
-            leaderboard_data.append({
+        ).order_by('-total_coins', '-created_at')
+        
+        leaderboard_data = [
+            {
                 'student_id': student.id,
                 'student_first_name': student.first_name,
                 'student_last_name': student.last_name,
                 'student_email': student.email,
                 'student_avatar': student.avatar.url if student.avatar else None,
-                'total_coins': coin_balance.total_coins,
-                'completed_lessons': student_completed_lessons,
-                'average_score': avg_score,
+                'total_coins': student.total_coins,
+                'completed_lessons': student.completed_lessons,
+                'average_score': int(student.avg_score * 100) if student.avg_score is not None else 0,
                 'group_name': group.name
-            })
-        
-        # Sort by coins (descending)
-        leaderboard_data.sort(key=lambda x: x['total_coins'], reverse=True)
+            }
+            for student in students
+        ]
         
+        cache.set(cache_key, leaderboard_data, settings.LEADERBOARD_CACHE_TIMEOUT)
         return Response(leaderboard_data)
 
 class StudentAchievementsView(generics.ListAPIView):
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('groups', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='lessonschedule',
+            options={'ordering': ['day_of_week', 'start_time'], 'verbose_name': 'Lesson Schedule', 'verbose_name_plural': 'Lesson Schedules'},
+        ),
+        migrations.AlterField(
+            model_name='lessonschedule',
+            name='group',
+            field=models.ForeignKey(help_text='Group this weekly slot belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='lesson_schedules', to='courses.group'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lessonschedule',
+            unique_together={('group', 'day_of_week', 'start_time')},
+        ),
+    ]
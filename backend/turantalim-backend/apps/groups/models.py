@@ -1,4 +1,8 @@
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Prefetch
 from django.utils.translation import gettext_lazy as _
 from apps.courses.models import Group
 
@@ -15,10 +19,11 @@ class LessonSchedule(models.Model):
         (6, _('Sunday')),
     )
     
-    group = models.OneToOneField(
+    group = models.ForeignKey(
         Group,
         on_delete=models.CASCADE,
-        related_name='lesson_schedule'
+        related_name='lesson_schedules',
+        help_text=_("Group this weekly slot belongs to")
     )
     
     day_of_week = models.IntegerField(choices=DAY_CHOICES)
@@ -37,6 +42,8 @@ class LessonSchedule(models.Model):
     
     class Meta:
         db_table = 'lesson_schedules'
+        ordering = ['day_of_week', 'start_time']
+        unique_together = [('group', 'day_of_week', 'start_time')]
         verbose_name = _('Lesson Schedule')
         verbose_name_plural = _('Lesson Schedules')
     
@@ -45,29 +52,99 @@ class LessonSchedule(models.Model):
 
 
 class LessonGenerator:
-    """Generate lessons from schedule"""
+    """Generate lessons from weekly schedule slots"""
     
     @staticmethod
-    def generate_lessons_for_group(group):
-        """Generate lessons for a group based on schedule"""
+    def _slot_dates(slot, start_date, end_date):
+        """All dates between start_date and end_date falling on the slot's weekday"""
+        first = start_date + timedelta(days=(slot.day_of_week - start_date.weekday()) % 7)
+        if first > end_date:
+            return []
+        count = (end_date - first).days // 7 + 1
+        return [first + timedelta(weeks=week) for week in range(count)]
+    
+    @classmethod
+    def plan_lessons(cls, group, slots):
+        """Ordered (date, slot) pairs for the whole group term"""
+        plan = []
+        for slot in slots:
+            plan.extend((date, slot) for date in cls._slot_dates(slot, group.start_date, group.end_date))
+        plan.sort(key=lambda item: (item[0], item[1].start_time))
+        return plan
+    
+    @classmethod
+    def build_lessons(cls, group, slots, taken):
+        """
+        Unsaved lessons for plan entries not already in `taken`, a set of
+        (scheduled_date, start_time) pairs occupied by existing lessons.
+        Lessons are numbered by their position in the plan.
+        """
         from apps.lessons.models import Lesson
-        from datetime import datetime, timedelta
-        
-        schedule = group.lesson_schedule
-        current_date = group.start_date
         
         lessons = []
-        while current_date <= group.end_date:
-            if current_date.weekday() == schedule.day_of_week:
-                lesson = Lesson.objects.create(
-                    group=group,
-                    title=f"{group.course.name} - Lesson {Lesson.objects.filter(group=group).count() + 1}",
-                    scheduled_date=current_date,
-                    start_time=schedule.start_time,
-                    duration_minutes=schedule.duration_minutes,
-                    status='scheduled'
-                )
-                lessons.append(lesson)
-            current_date += timedelta(days=1)
-        
+        for number, (date, slot) in enumerate(cls.plan_lessons(group, slots), 1):
+            if (date, slot.start_time) in taken:
+                continue
+            lessons.append(Lesson(
+                group=group,
+                title=f"{group.course.name} - Lesson {number}",
+                scheduled_date=date,
+                start_time=slot.start_time,
+                duration_minutes=slot.duration_minutes,
+                lesson_number=number,
+                status='scheduled'
+            ))
         return lessons
+    
+    @classmethod
+    def generate_lessons_for_groups(cls, groups, batch_size=1000):
+        """
+        Generate missing lessons for many groups at once.
+        
+        Regeneration is idempotent: slots already holding a lesson, including
+        the original slot of a rescheduled lesson, are skipped.
+        """
+        from apps.lessons.models import Lesson, LessonReschedule
+        from apps.homework.models import Homework
+        from apps.accounts.dashboard import schedule_snapshot_refresh
+        
+        with transaction.atomic():
+            groups = list(
+                Group.objects.select_for_update(of=('self',)).filter(
+                    id__in=[group.id for group in groups]
+                ).select_related('course').prefetch_related(
+                    Prefetch('lesson_schedules', queryset=LessonSchedule.objects.filter(is_active=True))
+                )
+            )
+            group_ids = [group.id for group in groups]
+            
+            taken = defaultdict(set)
+            for group_id, date, start_time in Lesson.objects.filter(
+                group_id__in=group_ids
+            ).values_list('group_id', 'scheduled_date', 'start_time'):
+                taken[group_id].add((date, start_time))
+            for group_id, date, start_time in LessonReschedule.objects.filter(
+                lesson__group_id__in=group_ids
+            ).values_list('lesson__group_id', 'original_date', 'original_time'):
+                taken[group_id].add((date, start_time))
+            
+            lessons = []
+            for group in groups:
+                lessons.extend(cls.build_lessons(group, group.lesson_schedules.all(), taken[group.id]))
+            
+            created = Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+            
+            # bulk_create skips post_save, so refresh dashboards explicitly
+            schedule_snapshot_refresh(
+                Group.students.through.objects.filter(
+                    group_id__in={lesson.group_id for lesson in created}
+                ).values_list('user_id', flat=True),
+                ['lessons']
+            )
+            Homework.assign_for_lessons(created, batch_size=batch_size)
+            return created
+    
+    @classmethod
+    def generate_lessons_for_group(cls, group):
+        """Generate lessons for a group based on schedule"""
+        return cls.generate_lessons_for_groups([group])
@@ -0,0 +1,64 @@
+from datetime import time, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.courses.models import Course, Group
+from apps.groups.models import LessonGenerator, LessonSchedule
+from apps.homework.models import Homework
+from apps.lessons.models import Lesson
+
+
+class GenerateLessonsTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Turkish A1')
+        self.today = timezone.localdate()
+        self.created_groups = 0
+
+    def make_groups(self, count, students=3):
+        groups = []
+        for _ in range(count):
+            self.created_groups += 1
+            name = f'G{self.created_groups}'
+            group = Group.objects.create(
+                name=name, course=self.course,
+                start_date=self.today, end_date=self.today + timedelta(weeks=4)
+            )
+            group.students.add(*[
+                User.objects.create_user(
+                    email=f'{name}-{i}@example.com', username=f'{name}-{i}', password='x', role='student'
+                )
+                for i in range(students)
+            ])
+            for day in (0, 3):
+                LessonSchedule.objects.create(group=group, day_of_week=day, start_time=time(10))
+            groups.append(group)
+        return groups
+
+    def generate(self, groups):
+        """Generated lessons and the number of non-INSERT queries it took"""
+        with CaptureQueriesContext(connection) as queries:
+            created = LessonGenerator.generate_lessons_for_groups(groups)
+        # Bulk inserts are split by the backend's parameter limit, not per group
+        return created, sum(not query['sql'].startswith('INSERT') for query in queries.captured_queries)
+
+    def test_query_count_does_not_grow_with_groups(self):
+        # Warm up: the first run also creates the settings row
+        self.generate(self.make_groups(1))
+        _, few = self.generate(self.make_groups(2))
+        created, many = self.generate(self.make_groups(12))
+
+        self.assertEqual(few, many)
+        # Homework for every generated lesson, not just each group's next one
+        self.assertEqual(Homework.objects.filter(lesson__in=created).count(), len(created) * 3)
+
+    def test_regeneration_is_idempotent(self):
+        groups = self.make_groups(2)
+        created = LessonGenerator.generate_lessons_for_groups(groups)
+
+        self.assertEqual(LessonGenerator.generate_lessons_for_groups(groups), [])
+        self.assertEqual(Lesson.objects.count(), len(created))
+        self.assertEqual(Homework.objects.count(), len(created) * 3)
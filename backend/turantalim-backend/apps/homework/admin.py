@@ -1,5 +1,5 @@
 from django.contrib import admin
-from apps.homework.models import Homework, HomeworkTranscript
+from apps.homework.models import Homework, HomeworkTranscript, TranscriptionCache, PlagiarismFlag
 
 
 @admin.register(Homework)
@@ -7,7 +7,7 @@ class HomeworkAdmin(admin.ModelAdmin):
     list_display = ['student', 'lesson', 'status', 'attempt_number', 'similarity_score', 'is_similarity_passed', 'deadline', 'is_late', 'coins_earned']
     list_filter = ['status', 'is_similarity_passed', 'is_late', 'deadline', 'lesson__group']
     search_fields = ['student__username', 'student__first_name', 'student__last_name', 'lesson__title', 'description']
-    readonly_fields = ['created_at', 'updated_at', 'submission_date', 'reviewed_date']
+    readonly_fields = ['created_at', 'updated_at', 'submission_date', 'reviewed_date', 'audio_sha256', 'original_audio_bytes', 'stored_audio_bytes', 'audio_match_score', 'audio_match_homework', 'teacher']
     list_editable = ['status']
     raw_id_fields = ['student', 'lesson', 'reviewed_by']
     date_hierarchy = 'deadline'
@@ -18,10 +18,10 @@ class HomeworkAdmin(admin.ModelAdmin):
             'fields': ('lesson', 'student', 'status', 'attempt_number')
         }),
         ('Content', {
-            'fields': ('description', 'audio_submission')
+            'fields': ('description', 'audio_submission', 'audio_sha256', 'original_audio_bytes', 'stored_audio_bytes')
         }),
         ('AI Analysis', {
-            'fields': ('transcription', 'similarity_score', 'is_similarity_passed'),
+            'fields': ('transcription', 'similarity_score', 'is_similarity_passed', 'audio_match_score', 'audio_match_homework'),
             'classes': ('collapse',)
         }),
         ('Teacher Review', {
@@ -40,8 +40,26 @@ class HomeworkAdmin(admin.ModelAdmin):
 
 @admin.register(HomeworkTranscript)
 class HomeworkTranscriptAdmin(admin.ModelAdmin):
-    list_display = ['homework', 'language', 'confidence_score', 'processing_time_seconds', 'created_at']
-    list_filter = ['language', 'created_at']
+    list_display = ['homework', 'language', 'confidence_score', 'audio_duration_seconds', 'transcription_backend', 'transcription_latency_seconds', 'processing_time_seconds', 'created_at']
+    list_filter = ['language', 'transcription_backend', 'created_at']
     search_fields = ['homework__student__username', 'raw_text', 'cleaned_text']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+
+
+@admin.register(TranscriptionCache)
+class TranscriptionCacheAdmin(admin.ModelAdmin):
+    list_display = ['audio_sha256', 'model', 'language', 'hit_count', 'created_at', 'last_hit_at']
+    list_filter = ['model', 'language']
+    search_fields = ['audio_sha256', 'text']
+    readonly_fields = ['created_at', 'last_hit_at', 'hit_count']
+    ordering = ['-hit_count']
+
+
+@admin.register(PlagiarismFlag)
+class PlagiarismFlagAdmin(admin.ModelAdmin):
+    list_display = ['homework', 'matched_homework', 'lesson', 'similarity', 'is_dismissed', 'created_at']
+    list_filter = ['is_dismissed', 'lesson__group']
+    raw_id_fields = ['lesson', 'homework', 'matched_homework']
+    readonly_fields = ['similarity', 'created_at']
+    ordering = ['-similarity']
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class HomeworkConfig(AppConfig):
+    name = 'apps.homework'
+
+    def ready(self):
+        from apps.homework import signals  # noqa: F401
@@ -0,0 +1,269 @@
+"""
+Streaming audio inspection.
+
+Duration, sample rate and channel count come from the container header;
+RMS loudness, content hashes, the pre-transcription resampling pass and
+the Opus storage transcode all work over fixed-size blocks, so memory use
+does not grow with the length of the recording.
+"""
+import hashlib
+import math
+import os
+
+import numpy as np
+import soundfile as sf
+
+BLOCK_FRAMES = 65536
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Preprocessing before transcription
+TARGET_SAMPLE_RATE = 16000
+VAD_FRAME_SECONDS = 0.03
+VAD_PADDING_SECONDS = 0.25
+VAD_FLOOR_DB = -50.0
+VAD_DYNAMIC_RANGE_DB = 40.0
+NORMALIZE_PEAK = 0.89  # -1 dBFS
+MAX_GAIN = 10.0
+LOWPASS_TAPS = 101
+# Storage copies: mono Opus at a speech bitrate (Opus accepts 8/12/16/24/48 kHz)
+STORAGE_SAMPLE_RATE = 16000
+STORAGE_BITRATE = 24000
+OPUS_MIN_BITRATE = 6000
+OPUS_MAX_BITRATE = 256000
+# Long recordings are cut at the quietest frame in the last part of each window
+SPLIT_SEARCH_SHARE = 0.25
+
+
+def probe_audio(path, block_frames=BLOCK_FRAMES):
+    """
+    Return duration (seconds), sample_rate, channels and rms (0..1) of an
+    audio file. Formats libsndfile cannot open (e.g. M4A) fall back to
+    librosa, which reads the duration without decoding; rms is None then.
+    """
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        return _probe_with_librosa(path)
+
+    sum_squares = 0.0
+    samples = 0
+    for block in sf.blocks(path, blocksize=block_frames, dtype='float32', always_2d=True):
+        sum_squares += float(np.square(block, dtype=np.float64).sum())
+        samples += block.size
+
+    return {
+        'duration': info.frames / info.samplerate if info.samplerate else 0.0,
+        'sample_rate': info.samplerate,
+        'channels': info.channels,
+        'rms': math.sqrt(sum_squares / samples) if samples else 0.0,
+    }
+
+
+def _probe_with_librosa(path):
+    import librosa
+
+    return {
+        'duration': librosa.get_duration(path=path),
+        'sample_rate': librosa.get_samplerate(path),
+        'channels': None,
+        'rms': None,
+    }
+
+
+def sha256_of(file):
+    """SHA-256 hex digest of an uploaded or stored file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _frame_levels(path, frame_length, block_frames):
+    """Per-frame RMS level (dBFS) of the mono downmix, and its peak amplitude"""
+    block_frames = max(block_frames // frame_length, 1) * frame_length
+    levels = []
+    peak = 0.0
+    for block in sf.blocks(path, blocksize=block_frames, dtype='float32', always_2d=True):
+        mono = block.mean(axis=1)
+        if not mono.size:
+            continue
+        peak = max(peak, float(np.abs(mono).max()))
+        # Blocks are whole frames except possibly the last one
+        frames = [mono[:len(mono) // frame_length * frame_length].reshape(-1, frame_length)]
+        if len(mono) % frame_length:
+            frames.append(mono[len(mono) // frame_length * frame_length:].reshape(1, -1))
+        for group in frames:
+            rms = np.sqrt(np.mean(np.square(group, dtype=np.float64), axis=1))
+            levels.append(20 * np.log10(np.maximum(rms, 1e-10)))
+    return (np.concatenate(levels) if levels else np.zeros(0)), peak
+
+
+def detect_speech(levels):
+    """First and last (exclusive) voiced frame by energy, or None if all silent"""
+    if not levels.size:
+        return None
+    threshold = max(VAD_FLOOR_DB, float(levels.max()) - VAD_DYNAMIC_RANGE_DB)
+    voiced = np.flatnonzero(levels > threshold)
+    if not voiced.size:
+        return None
+    return int(voiced[0]), int(voiced[-1]) + 1
+
+
+def _lowpass_kernel(ratio):
+    """Windowed-sinc anti-aliasing filter for downsampling by ratio (< 1)"""
+    cutoff = 0.45 * ratio
+    taps = np.arange(LOWPASS_TAPS) - (LOWPASS_TAPS - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(LOWPASS_TAPS)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def _lowpass(chunk, kernel):
+    """
+    Filter chunk with kernel, keeping it aligned sample for sample.
+    np.convolve(mode='same') returns max(len(chunk), len(kernel)) samples,
+    so short chunks are zero-padded to the kernel length and cut back.
+    """
+    padded = np.pad(chunk, (0, max(len(kernel) - len(chunk), 0)))
+    return np.convolve(padded, kernel, mode='same')[:len(chunk)]
+
+
+def write_resampled(path, info, target, start, end, gain, block_frames):
+    """
+    Write frames start..end of path to target as mono at the target's
+    sample rate, block by block; returns the number of frames written
+    """
+    ratio = target.samplerate / info.samplerate
+    kernel = _lowpass_kernel(ratio) if ratio < 1 else None
+    context = LOWPASS_TAPS // 2 + 2
+    output_frames = int((end - start) * ratio)
+    output_block = max(int(block_frames * ratio), 1)
+
+    with sf.SoundFile(path) as source:
+        for output_start in range(0, output_frames, output_block):
+            positions = start + np.arange(
+                output_start, min(output_start + output_block, output_frames)
+            ) / ratio
+            # Read a little context around the block so the filter has no seams
+            read_from = max(int(positions[0]) - context, 0)
+            read_to = min(int(positions[-1]) + context, info.frames)
+            source.seek(read_from)
+            chunk = source.read(read_to - read_from, dtype='float32', always_2d=True).mean(axis=1)
+            if kernel is not None:
+                chunk = _lowpass(chunk, kernel)
+            samples = np.interp(positions - read_from, np.arange(len(chunk)), chunk)
+            target.write(np.clip(samples * gain, -1.0, 1.0).astype(np.float32))
+    return output_frames
+
+
+def preprocess_audio(path, output_path, block_frames=BLOCK_FRAMES):
+    """
+    Trim leading/trailing silence, downmix to mono, peak-normalize and
+    resample to 16kHz into a FLAC file at output_path. Returns durations,
+    trimmed seconds and sizes, or None when libsndfile cannot read the file.
+    """
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        return None
+    if not info.frames or not info.samplerate:
+        return None
+
+    sample_rate = info.samplerate
+    frame_length = max(int(sample_rate * VAD_FRAME_SECONDS), 1)
+    levels, peak = _frame_levels(path, frame_length, block_frames)
+
+    start, end = 0, info.frames
+    speech = detect_speech(levels)
+    if speech is not None:
+        padding = int(sample_rate * VAD_PADDING_SECONDS)
+        start = max(speech[0] * frame_length - padding, 0)
+        end = min(speech[1] * frame_length + padding, info.frames)
+
+    gain = min(NORMALIZE_PEAK / peak, MAX_GAIN) if peak > 0 else 1.0
+
+    with sf.SoundFile(output_path, 'w', TARGET_SAMPLE_RATE, 1, format='FLAC', subtype='PCM_16') as target:
+        output_frames = write_resampled(path, info, target, start, end, gain, block_frames)
+
+    return {
+        'path': output_path,
+        'original_duration': info.frames / sample_rate,
+        'duration': output_frames / TARGET_SAMPLE_RATE,
+        'trimmed_seconds': (info.frames - (end - start)) / sample_rate,
+        'original_bytes': os.path.getsize(path),
+        'bytes': os.path.getsize(output_path),
+    }
+
+
+def split_at_silence(path, output_dir, max_seconds, block_frames=BLOCK_FRAMES):
+    """
+    Split an audio file into segments of at most max_seconds, cutting at the
+    quietest frame near the end of each window. Returns [{'path', 'start',
+    'end'}] in order (seconds); short files are returned as one segment
+    without copying.
+    """
+    info = sf.info(path)
+    sample_rate = info.samplerate
+    if info.frames <= max_seconds * sample_rate:
+        return [{'path': path, 'start': 0.0, 'end': info.frames / sample_rate}]
+
+    frame_length = max(int(sample_rate * VAD_FRAME_SECONDS), 1)
+    levels, _ = _frame_levels(path, frame_length, block_frames)
+    max_frames = max(int(max_seconds * sample_rate) // frame_length, 1)
+
+    boundaries = [0]
+    while len(levels) - boundaries[-1] > max_frames:
+        window_start = boundaries[-1] + int(max_frames * (1 - SPLIT_SEARCH_SHARE))
+        window_end = boundaries[-1] + max_frames
+        boundaries.append(window_start + int(np.argmin(levels[window_start:window_end])))
+    boundaries.append(len(levels))
+
+    segments = []
+    with sf.SoundFile(path) as source:
+        for index, (first, last) in enumerate(zip(boundaries, boundaries[1:])):
+            start = first * frame_length
+            end = min(last * frame_length, info.frames)
+            segment_path = os.path.join(output_dir, f'segment_{index:04d}.flac')
+            source.seek(start)
+            with sf.SoundFile(
+                segment_path, 'w', sample_rate, info.channels, format='FLAC', subtype='PCM_16'
+            ) as target:
+                remaining = end - start
+                while remaining > 0:
+                    block = source.read(min(block_frames, remaining), dtype='float32', always_2d=True)
+                    if not len(block):
+                        break
+                    target.write(block)
+                    remaining -= len(block)
+            segments.append({'path': segment_path, 'start': start / sample_rate, 'end': end / sample_rate})
+    return segments
+
+
+def transcode_to_opus(path, output_path, sample_rate=STORAGE_SAMPLE_RATE, bitrate=STORAGE_BITRATE,
+                      block_frames=BLOCK_FRAMES):
+    """
+    Re-encode a recording as mono Ogg/Opus for storage, without trimming or
+    normalizing. Returns sizes and duration, or None when libsndfile cannot
+    read the file.
+    """
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        return None
+    if not info.frames or not info.samplerate:
+        return None
+
+    # libsndfile maps compression level linearly onto 256..6 kbps per channel
+    level = (OPUS_MAX_BITRATE - bitrate) / (OPUS_MAX_BITRATE - OPUS_MIN_BITRATE)
+    with sf.SoundFile(
+        output_path, 'w', sample_rate, 1, format='OGG', subtype='OPUS',
+        compression_level=min(max(level, 0.0), 1.0)
+    ) as target:
+        write_resampled(path, info, target, 0, info.frames, 1.0, block_frames)
+
+    return {
+        'path': output_path,
+        'duration': info.frames / info.samplerate,
+        'original_bytes': os.path.getsize(path),
+        'bytes': os.path.getsize(output_path),
+    }
@@ -0,0 +1,201 @@
+"""
+Acoustic fingerprints for spotting re-used recordings.
+
+Audio is analysed as 16kHz mono, frame by frame: the strongest spectral
+peaks of each frame are paired with peaks shortly after them, and every
+pair (anchor bin, target bin, frame gap) becomes a 24-bit hash tagged with
+the anchor's frame offset. Hashes do not depend on where the recording
+starts, so a trimmed copy still shares most of them; the offsets let two
+fingerprints be aligned to confirm a match. Hashes are indexed per group,
+so a lookup only touches recordings that share hashes with the new one.
+"""
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+from django.db import transaction
+from django.db.models import Count
+
+from apps.homework.audio import TARGET_SAMPLE_RATE, write_resampled, BLOCK_FRAMES
+
+FRAME_SIZE = 1024  # 64ms at 16kHz
+HOP_SIZE = 512
+FRAMES_PER_BLOCK = 256
+MIN_BIN = 20  # ~310 Hz
+MAX_BIN = 256  # 4 kHz; bins fit in 9 bits
+PEAKS_PER_FRAME = 2
+PEAK_MIN_DB = 10.0  # above the frame's median level
+FAN_OUT = 3
+MAX_FRAME_GAP = 63  # 6 bits
+MAX_BIN_GAP = 64
+# Candidates need this many shared hashes before they are aligned
+MIN_SHARED_HASHES = 20
+MAX_CANDIDATES = 5
+# Unrelated recordings align a few percent of hashes by chance
+MIN_MATCH_SCORE = 0.1
+
+
+def _spectral_peaks(path):
+    """(frame, bin) of the strongest local spectral maxima, read in blocks"""
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    overlap = FRAME_SIZE - HOP_SIZE
+    peaks = []
+    frame_offset = 0
+    for block in sf.blocks(
+        path, blocksize=FRAMES_PER_BLOCK * HOP_SIZE + overlap, overlap=overlap,
+        dtype='float32', always_2d=True
+    ):
+        mono = block.mean(axis=1)
+        if len(mono) < FRAME_SIZE:
+            break
+        # Blocks overlap by FRAME_SIZE - HOP_SIZE, so frames line up across blocks
+        frames = np.lib.stride_tricks.sliding_window_view(mono, FRAME_SIZE)[::HOP_SIZE]
+        spectrum = 20 * np.log10(np.abs(np.fft.rfft(frames * window, axis=1))[:, MIN_BIN:MAX_BIN] + 1e-10)
+
+        inner = spectrum[:, 1:-1]
+        is_peak = (inner > spectrum[:, :-2]) & (inner >= spectrum[:, 2:])
+        is_peak &= inner > np.median(spectrum, axis=1, keepdims=True) + PEAK_MIN_DB
+        levels = np.where(is_peak, inner, -np.inf)
+        strongest = np.argsort(levels, axis=1)[:, -PEAKS_PER_FRAME:]
+        for row, bins in enumerate(strongest):
+            for index in bins:
+                if np.isfinite(levels[row, index]):
+                    peaks.append((frame_offset + row, MIN_BIN + 1 + int(index)))
+        frame_offset += len(frames)
+    return peaks
+
+
+def _landmarks(peaks):
+    """Pair every peak with up to FAN_OUT later peaks; returns (hash, anchor frame) rows"""
+    landmarks = []
+    for i, (anchor_frame, anchor_bin) in enumerate(peaks):
+        paired = 0
+        for target_frame, target_bin in peaks[i + 1:]:
+            gap = target_frame - anchor_frame
+            if gap > MAX_FRAME_GAP:
+                break
+            if gap < 1 or abs(target_bin - anchor_bin) > MAX_BIN_GAP:
+                continue
+            landmarks.append(((anchor_bin << 15) | (target_bin << 6) | gap, anchor_frame))
+            paired += 1
+            if paired == FAN_OUT:
+                break
+    return landmarks
+
+
+def fingerprint_audio(path):
+    """
+    Fingerprint as an (n, 2) uint32 array of (hash, frame offset), or None
+    when the file is unreadable or has no usable peaks
+    """
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        return None
+    if not info.frames or not info.samplerate:
+        return None
+
+    if info.samplerate == TARGET_SAMPLE_RATE and info.channels == 1:
+        peaks = _spectral_peaks(path)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            mono_path = os.path.join(work_dir, 'mono.flac')
+            with sf.SoundFile(mono_path, 'w', TARGET_SAMPLE_RATE, 1, format='FLAC', subtype='PCM_16') as target:
+                write_resampled(path, info, target, 0, info.frames, 1.0, BLOCK_FRAMES)
+            peaks = _spectral_peaks(mono_path)
+
+    landmarks = _landmarks(peaks)
+    if not landmarks:
+        return None
+    return np.array(landmarks, dtype=np.uint32)
+
+
+def to_bytes(fingerprint):
+    return fingerprint.astype('<u4').tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(bytes(data), dtype='<u4').reshape(-1, 2)
+
+
+def match_score(fingerprint, other):
+    """
+    Share of the shorter fingerprint's hashes that line up with the other
+    at a single time offset (0..1)
+    """
+    order = np.argsort(other[:, 0], kind='stable')
+    other_hashes = other[order, 0]
+    other_offsets = other[order, 1].astype(np.int64)
+
+    first = np.searchsorted(other_hashes, fingerprint[:, 0], side='left')
+    counts = np.searchsorted(other_hashes, fingerprint[:, 0], side='right') - first
+    if not counts.sum():
+        return 0.0
+
+    # Every (query row, other row) pair with the same hash, flattened
+    query_rows = np.repeat(np.arange(len(fingerprint)), counts)
+    other_rows = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)
+    deltas = other_offsets[other_rows] - fingerprint[query_rows, 1].astype(np.int64)
+    aligned = np.bincount(deltas - deltas.min()).max()
+    return min(aligned / min(len(fingerprint), len(other)), 1.0)
+
+
+def index_fingerprint(homework, fingerprint):
+    """
+    Store a homework's fingerprint, index its hashes for the group and
+    record the best-matching recording by another student. Returns the
+    match score.
+    """
+    from apps.homework.models import Homework, AudioFingerprintHash
+
+    group_id = homework.lesson.group_id
+    hashes = np.unique(fingerprint[:, 0]).tolist()
+
+    with transaction.atomic():
+        AudioFingerprintHash.objects.filter(homework=homework).delete()
+
+        candidate_ids = list(
+            AudioFingerprintHash.objects.filter(group_id=group_id, hash__in=hashes).exclude(
+                homework__student_id=homework.student_id
+            ).values('homework_id').annotate(
+                shared=Count('id')
+            ).filter(
+                shared__gte=MIN_SHARED_HASHES
+            ).order_by('-shared').values_list('homework_id', flat=True)[:MAX_CANDIDATES]
+        )
+
+        best_score, best_id = 0.0, None
+        for other_id, other_data in Homework.objects.filter(
+            id__in=candidate_ids,
+            audio_fingerprint__isnull=False
+        ).values_list('id', 'audio_fingerprint'):
+            score = match_score(fingerprint, from_bytes(other_data))
+            if score >= MIN_MATCH_SCORE and score > best_score:
+                best_score, best_id = score, other_id
+
+        # Set on the instance too, so a later save() by the caller keeps them
+        homework.audio_fingerprint = to_bytes(fingerprint)
+        homework.audio_match_score = best_score
+        homework.audio_match_homework_id = best_id
+        Homework.objects.filter(id=homework.id).update(
+            audio_fingerprint=homework.audio_fingerprint,
+            audio_match_score=best_score,
+            audio_match_homework_id=best_id
+        )
+        if best_id is not None:
+            # The earlier recording matches the new one just as well
+            Homework.objects.filter(id=best_id).exclude(audio_match_score__gte=best_score).update(
+                audio_match_score=best_score,
+                audio_match_homework_id=homework.id
+            )
+
+        AudioFingerprintHash.objects.bulk_create(
+            [
+                AudioFingerprintHash(group_id=group_id, lesson_id=homework.lesson_id, homework=homework, hash=value)
+                for value in hashes
+            ],
+            batch_size=1000
+        )
+
+    return best_score
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.homework.models import Homework
+from apps.lessons.models import Lesson
+
+
+class Command(BaseCommand):
+    help = 'Assign missing first-attempt homework for existing lessons (term-wide backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--group',
+            type=int,
+            action='append',
+            dest='group_ids',
+            help='Group ID to backfill (repeatable)'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Backfill every group'
+        )
+        parser.add_argument(
+            '--since',
+            help='Only lessons scheduled on or after this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of lessons assigned per batch'
+        )
+
+    def handle(self, *args, **options):
+        if options['group_ids']:
+            lessons = Lesson.objects.filter(group_id__in=options['group_ids'])
+        elif options['all']:
+            lessons = Lesson.objects.all()
+        else:
+            raise CommandError('Pass --group ID or --all')
+        if options['since']:
+            lessons = lessons.filter(scheduled_date__gte=options['since'])
+
+        lesson_ids = list(lessons.exclude(status='cancelled').values_list('id', flat=True).order_by('id'))
+        chunk_size = options['chunk_size']
+        assigned = 0
+        for start in range(0, len(lesson_ids), chunk_size):
+            chunk = Lesson.objects.filter(id__in=lesson_ids[start:start + chunk_size])
+            assigned += len(Homework.assign_for_lessons(chunk))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Assigned {assigned} homeworks across {len(lesson_ids)} lessons'
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from apps.homework.models import HomeworkTranscript
+from apps.homework.plagiarism import index_lesson
+
+
+class Command(BaseCommand):
+    help = 'Rebuild MinHash signatures, LSH buckets and plagiarism flags lesson by lesson'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lesson',
+            type=int,
+            action='append',
+            dest='lesson_ids',
+            help='Lesson ID to index (repeatable, defaults to every lesson with transcripts)'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            help='Flag threshold (defaults to PLAGIARISM_THRESHOLD)'
+        )
+
+    def handle(self, *args, **options):
+        lesson_ids = options['lesson_ids']
+        if not lesson_ids:
+            lesson_ids = HomeworkTranscript.objects.values_list(
+                'homework__lesson_id', flat=True
+            ).distinct().order_by('homework__lesson_id')
+
+        totals = {'lessons': 0, 'transcripts': 0, 'candidates': 0, 'flagged': 0}
+        for lesson_id in lesson_ids:
+            stats = index_lesson(lesson_id, threshold=options['threshold'])
+            totals['lessons'] += 1
+            for key in ('transcripts', 'candidates', 'flagged'):
+                totals[key] += stats[key]
+            if stats['flagged']:
+                self.stdout.write(f"  lesson {lesson_id}: {stats['flagged']} flagged of {stats['transcripts']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {totals['transcripts']} transcripts in {totals['lessons']} lessons: "
+            f"{totals['candidates']} candidate pairs, {totals['flagged']} flagged"
+        ))
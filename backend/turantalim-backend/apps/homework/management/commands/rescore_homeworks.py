@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from apps.homework.rescoring import rescore_homeworks
+
+
+class Command(BaseCommand):
+    help = 'Recompute similarity scores of transcribed homework without re-transcribing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            help='Pass threshold (defaults to SystemSettings.similarity_threshold)'
+        )
+        parser.add_argument(
+            '--homework',
+            type=int,
+            action='append',
+            dest='homework_ids',
+            help='Homework ID to rescore (repeatable, defaults to all)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of homeworks scored per batch'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Scoring processes (defaults to RESCORE_WORKERS, 1 scores in-process)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the pass/fail distribution'
+        )
+
+    def handle(self, *args, **options):
+        stats = rescore_homeworks(
+            threshold=options['threshold'],
+            homework_ids=options['homework_ids'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run']
+        )
+
+        for label, count in stats['histogram'].items():
+            self.stdout.write(f'  {label}: {count}')
+        verb = 'Would rescore' if stats['dry_run'] else 'Rescored'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['scored']} homeworks at threshold {stats['threshold']:.2f}: "
+            f"{stats['passed']} passed, {stats['failed']} failed, {stats['changed']} changed pass/fail"
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='audio_duration_seconds',
+            field=models.FloatField(blank=True, help_text='Length of the submitted recording', null=True),
+        ),
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='rms_loudness',
+            field=models.FloatField(blank=True, help_text='RMS level of the recording (0-1)', null=True),
+        ),
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, help_text='Sample rate of the submitted recording (Hz)', null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:03
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0002_homeworktranscript_audio_duration_seconds_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homework',
+            name='audio_sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the submitted audio file', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='TranscriptionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audio_sha256', models.CharField(max_length=64)),
+                ('model', models.CharField(help_text='Transcription model', max_length=50)),
+                ('language', models.CharField(max_length=10)),
+                ('text', models.TextField()),
+                ('confidence_score', models.FloatField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)])),
+                ('hit_count', models.PositiveIntegerField(default=0, help_text='Transcriptions served from this entry')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Transcription Cache Entry',
+                'verbose_name_plural': 'Transcription Cache',
+                'db_table': 'transcription_cache',
+                'unique_together': {('audio_sha256', 'model', 'language')},
+            },
+        ),
+    ]
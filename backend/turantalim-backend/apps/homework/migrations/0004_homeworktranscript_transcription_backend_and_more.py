@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0003_homework_audio_sha256_transcriptioncache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='transcription_backend',
+            field=models.CharField(blank=True, help_text="Backend that produced the text ('cache' for cache hits)", max_length=50),
+        ),
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='transcription_latency_seconds',
+            field=models.FloatField(blank=True, help_text='Time spent in the transcription backend', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0004_homeworktranscript_transcription_backend_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='trimmed_seconds',
+            field=models.FloatField(blank=True, help_text='Silence trimmed before transcription', null=True),
+        ),
+    ]
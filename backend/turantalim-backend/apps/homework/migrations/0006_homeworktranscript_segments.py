@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0005_homeworktranscript_trimmed_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='segments',
+            field=models.JSONField(blank=True, default=list, help_text='Per-segment text, timing, confidence and attempts for long recordings'),
+        ),
+    ]
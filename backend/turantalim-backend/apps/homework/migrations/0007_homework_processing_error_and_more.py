@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0006_homeworktranscript_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homework',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='homework',
+            name='processing_queued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='homework',
+            name='processing_status',
+            field=models.CharField(choices=[('none', 'Not Queued'), ('queued', 'Queued'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='none', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='homework',
+            name='processing_task_id',
+            field=models.CharField(blank=True, help_text='Celery task id; doubles as the submission ticket', max_length=36),
+        ),
+    ]
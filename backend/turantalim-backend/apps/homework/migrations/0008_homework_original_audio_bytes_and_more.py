@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0007_homework_processing_error_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homework',
+            name='original_audio_bytes',
+            field=models.BigIntegerField(blank=True, help_text='Size of the recording as uploaded', null=True),
+        ),
+        migrations.AddField(
+            model_name='homework',
+            name='stored_audio_bytes',
+            field=models.BigIntegerField(blank=True, help_text='Size of the stored Opus copy; empty until transcoded', null=True),
+        ),
+    ]
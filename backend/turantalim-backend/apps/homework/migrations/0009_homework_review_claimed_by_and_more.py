@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0008_homework_original_audio_bytes_and_more'),
+        ('lessons', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homework',
+            name='review_claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_homeworks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='homework',
+            name='review_lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='Claim is released automatically after this time', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='homework',
+            index=models.Index(condition=models.Q(('status__in', ['submitted', 'under_review'])), fields=['deadline', 'submission_date'], name='homework_review_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:17
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0009_homework_review_claimed_by_and_more'),
+        ('lessons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworktranscript',
+            name='minhash_signature',
+            field=models.BinaryField(blank=True, help_text='MinHash of cleaned_text word shingles (uint32 array) for plagiarism checks', null=True),
+        ),
+        migrations.CreateModel(
+            name='PlagiarismFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField(help_text='Estimated Jaccard similarity of word shingles', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)])),
+                ('is_dismissed', models.BooleanField(default=False, help_text='Teacher reviewed the pair and found no copying')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('homework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plagiarism_flags', to='homework.homework')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plagiarism_flags', to='lessons.lesson')),
+                ('matched_homework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='homework.homework')),
+            ],
+            options={
+                'verbose_name': 'Plagiarism Flag',
+                'verbose_name_plural': 'Plagiarism Flags',
+                'db_table': 'plagiarism_flags',
+                'ordering': ['-similarity'],
+                'unique_together': {('homework', 'matched_homework')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TranscriptLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_key', models.BigIntegerField(help_text='Hash of one signature band and its index')),
+                ('homework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_buckets', to='homework.homework')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_buckets', to='lessons.lesson')),
+            ],
+            options={
+                'verbose_name': 'Transcript LSH Bucket',
+                'verbose_name_plural': 'Transcript LSH Buckets',
+                'db_table': 'transcript_lsh_buckets',
+                'indexes': [models.Index(fields=['lesson', 'bucket_key'], name='transcript__lesson__5093b2_idx')],
+                'unique_together': {('homework', 'bucket_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:19
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('homework', '0010_homeworktranscript_minhash_signature_plagiarismflag_and_more'),
+        ('lessons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homework',
+            name='audio_fingerprint',
+            field=models.BinaryField(blank=True, help_text='Spectral peak hashes and offsets (uint32 pairs)', null=True),
+        ),
+        migrations.AddField(
+            model_name='homework',
+            name='audio_match_homework',
+            field=models.ForeignKey(blank=True, help_text='Best-matching submission by another student', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='homework.homework'),
+        ),
+        migrations.AddField(
+            model_name='homework',
+            name='audio_match_score',
+            field=models.FloatField(blank=True, help_text="Share of the recording that matches another student's (0-1)", null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.CreateModel(
+            name='AudioFingerprintHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.IntegerField()),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audio_fingerprint_hashes', to='courses.group')),
+                ('homework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint_hashes', to='homework.homework')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audio_fingerprint_hashes', to='lessons.lesson')),
+            ],
+            options={
+                'verbose_name': 'Audio Fingerprint Hash',
+                'verbose_name_plural': 'Audio Fingerprint Hashes',
+                'db_table': 'audio_fingerprint_hashes',
+                'indexes': [models.Index(fields=['group', 'hash'], name='audio_finge_group_i_7738c1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_group_teachers(apps, schema_editor):
+    Homework = apps.get_model('homework', 'Homework')
+    Lesson = apps.get_model('lessons', 'Lesson')
+    Homework.objects.update(teacher_id=models.Subquery(
+        Lesson.objects.filter(id=models.OuterRef('lesson_id')).values('group__teacher_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('homework', '0011_homework_audio_fingerprint_and_more'),
+        ('lessons', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homework',
+            name='teacher',
+            field=models.ForeignKey(blank=True, help_text="Teacher of the lesson's group, kept in sync by signals", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='teaching_homeworks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(copy_group_teachers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='homework',
+            index=models.Index(condition=models.Q(('status__in', ['submitted', 'under_review'])), fields=['teacher', 'deadline', 'submission_date'], name='homework_teacher_queue_idx'),
+        ),
+    ]
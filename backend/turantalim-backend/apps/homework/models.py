@@ -4,6 +4,11 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.lessons.models import Lesson
 from apps.accounts.models import User
 
+
+class ProcessingQueueFull(Exception):
+    """Raised by Homework.submit_audio while the processing backlog is over its limit"""
+
+
 class Homework(models.Model):
     """Homework submission model"""
     
@@ -16,6 +21,14 @@ class Homework(models.Model):
         ('second_chance', _('Second Chance')),
     )
     
+    PROCESSING_STATUS_CHOICES = (
+        ('none', _('Not Queued')),
+        ('queued', _('Queued')),
+        ('processing', _('Processing')),
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    )
+    
     lesson = models.ForeignKey(
         Lesson,
         on_delete=models.CASCADE,
@@ -46,6 +59,48 @@ class Homework(models.Model):
         help_text=_("Student's audio submission")
     )
     
+    audio_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text=_("SHA-256 of the submitted audio file")
+    )
+    
+    original_audio_bytes = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Size of the recording as uploaded")
+    )
+    
+    stored_audio_bytes = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Size of the stored Opus copy; empty until transcoded")
+    )
+    
+    # Duplicate recording detection
+    audio_fingerprint = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text=_("Spectral peak hashes and offsets (uint32 pairs)")
+    )
+    
+    audio_match_score = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(1)],
+        help_text=_("Share of the recording that matches another student's (0-1)")
+    )
+    
+    audio_match_homework = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text=_("Best-matching submission by another student")
+    )
+    
     submission_date = models.DateTimeField(
         null=True,
         blank=True,
@@ -77,6 +132,27 @@ class Homework(models.Model):
         help_text=_("Whether passed similarity check")
     )
     
+    # Asynchronous processing of the submitted audio
+    processing_status = models.CharField(
+        max_length=20,
+        choices=PROCESSING_STATUS_CHOICES,
+        default='none',
+        db_index=True
+    )
+    
+    processing_task_id = models.CharField(
+        max_length=36,
+        blank=True,
+        help_text=_("Celery task id; doubles as the submission ticket")
+    )
+    
+    processing_queued_at = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+    
+    processing_error = models.TextField(blank=True)
+    
     # Teacher Review
     teacher_feedback = models.TextField(
         blank=True,
@@ -98,6 +174,31 @@ class Homework(models.Model):
         help_text=_("When teacher reviewed")
     )
     
+    # Review queue: copy of lesson.group.teacher so a teacher's queue is one index range
+    teacher = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='teaching_homeworks',
+        help_text=_("Teacher of the lesson's group, kept in sync by signals")
+    )
+    
+    # Review queue lease
+    review_claimed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='claimed_homeworks'
+    )
+    
+    review_lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("Claim is released automatically after this time")
+    )
+    
     # Deadline
     deadline = models.DateTimeField(
         help_text=_("Homework deadline")
@@ -123,10 +224,31 @@ class Homework(models.Model):
         verbose_name = _('Homework')
         verbose_name_plural = _('Homeworks')
         unique_together = [('lesson', 'student', 'attempt_number')]
+        indexes = [
+            # Review queue: only pending rows are indexed, in claim order;
+            # teachers read their own range, admins the whole queue
+            models.Index(
+                fields=['teacher', 'deadline', 'submission_date'],
+                condition=models.Q(status__in=['submitted', 'under_review']),
+                name='homework_teacher_queue_idx'
+            ),
+            models.Index(
+                fields=['deadline', 'submission_date'],
+                condition=models.Q(status__in=['submitted', 'under_review']),
+                name='homework_review_queue_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.lesson.title} (Attempt {self.attempt_number})"
     
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.teacher_id is None and self.lesson_id is not None:
+            self.teacher_id = Lesson.objects.filter(id=self.lesson_id).values_list(
+                'group__teacher_id', flat=True
+            ).first()
+        super().save(*args, **kwargs)
+    
     @property
     def is_overdue(self):
         from django.utils import timezone
@@ -135,10 +257,281 @@ class Homework(models.Model):
     @property
     def can_submit(self):
         return self.status in ['assigned', 'second_chance']
+    
+    @property
+    def has_expected_text(self):
+        """Whether there is a text to score the reading against"""
+        return bool(self.description.strip())
+    
+    @classmethod
+    def with_expected_text(cls):
+        """Queryset of homework that has_expected_text; the rest is never auto-scored"""
+        return cls.objects.filter(description__regex=r'\S')
+    
+    def is_claimed_by_other(self, user):
+        """Whether another reviewer holds an unexpired lease on this homework"""
+        from django.utils import timezone
+        
+        return (
+            self.review_claimed_by_id is not None
+            and self.review_claimed_by_id != user.id
+            and self.review_lease_expires_at is not None
+            and self.review_lease_expires_at > timezone.now()
+        )
+    
+    @classmethod
+    def claim_for_review(cls, user, count=1):
+        """
+        Lease up to count homeworks to a reviewer, earliest deadline first.
+        Rows locked by a concurrent claim are skipped rather than waited on,
+        and leases that ran out are handed out again.
+        """
+        from datetime import timedelta
+        from django.conf import settings
+        from django.db import transaction
+        from django.db.models import Q
+        from django.utils import timezone
+        
+        now = timezone.now()
+        claimable = cls.objects.filter(
+            Q(status='submitted') | Q(status='under_review', review_lease_expires_at__lt=now)
+        ).exclude(
+            # Still being scored by the processing pipeline
+            processing_status__in=['queued', 'processing']
+        )
+        if not user.is_admin:
+            claimable = claimable.filter(teacher=user)
+        
+        with transaction.atomic():
+            claimed_ids = list(
+                claimable.select_for_update(skip_locked=True, of=('self',))
+                .order_by('deadline', 'submission_date')
+                .values_list('id', flat=True)[:count]
+            )
+            cls.objects.filter(id__in=claimed_ids).update(
+                status='under_review',
+                review_claimed_by=user,
+                review_lease_expires_at=now + timedelta(minutes=settings.REVIEW_LEASE_MINUTES),
+                updated_at=now
+            )
+        return claimed_ids
+    
+    @classmethod
+    def paid_homework_ids(cls, homework_ids):
+        """
+        Ids of the given homeworks whose approval coins were already credited.
+        A CoinTransaction for the homework is the record of payment, so every
+        approval path checks it to pay exactly once.
+        """
+        from apps.gamification.models import CoinTransaction
+        
+        return set(
+            CoinTransaction.objects.filter(
+                related_homework_id__in=homework_ids,
+                transaction_type='earned'
+            ).values_list('related_homework_id', flat=True)
+        )
+    
+    @classmethod
+    def assign_for_lessons(cls, lessons, batch_size=1000):
+        """
+        Assign a first attempt to every group student who has none for the
+        given lessons, due homework_deadline_hours after the lesson ends.
+        Cancelled lessons are skipped and rows created concurrently are
+        ignored, so calling it again is harmless. Returns the homeworks now
+        stored for the pairs that had none, reloaded so they carry their pk
+        (a row a concurrent call inserted first is included).
+        """
+        from collections import defaultdict
+        from datetime import datetime, timedelta
+        from django.utils import timezone
+        from apps.courses.models import Group
+        from apps.settings.models import SystemSettings
+        from apps.accounts.dashboard import schedule_snapshot_refresh
+        from apps.gamification.leaderboard import mark_groups_dirty, invalidate_leaderboard_cache
+        
+        lessons = [lesson for lesson in lessons if lesson.status != 'cancelled']
+        if not lessons:
+            return []
+        
+        group_ids = {lesson.group_id for lesson in lessons}
+        students = defaultdict(list)
+        for group_id, student_id in Group.students.through.objects.filter(
+            group_id__in=group_ids
+        ).values_list('group_id', 'user_id'):
+            students[group_id].append(student_id)
+        teachers = dict(Group.objects.filter(id__in=group_ids).values_list('id', 'teacher_id'))
+        assigned = set(
+            cls.objects.filter(
+                lesson_id__in=[lesson.id for lesson in lessons],
+                attempt_number=1
+            ).values_list('lesson_id', 'student_id')
+        )
+        
+        deadline_hours = timedelta(hours=SystemSettings.load().homework_deadline_hours)
+        homeworks = []
+        for lesson in lessons:
+            ends_at = timezone.make_aware(
+                datetime.combine(lesson.scheduled_date, lesson.start_time)
+            ) + timedelta(minutes=lesson.duration_minutes)
+            for student_id in students[lesson.group_id]:
+                if (lesson.id, student_id) not in assigned:
+                    homeworks.append(cls(
+                        lesson=lesson,
+                        student_id=student_id,
+                        teacher_id=teachers.get(lesson.group_id),
+                        attempt_number=1,
+                        # The lesson text is what the student reads aloud and is scored against
+                        description=lesson.description,
+                        deadline=ends_at + deadline_hours
+                    ))
+        if not homeworks:
+            return []
+        
+        cls.objects.bulk_create(homeworks, batch_size=batch_size, ignore_conflicts=True)
+        
+        # ignore_conflicts sets no pks and keeps rows the database dropped,
+        # so read back which of the attempted pairs exist now
+        attempted = {(homework.lesson_id, homework.student_id) for homework in homeworks}
+        created = [
+            homework for homework in cls.objects.filter(
+                lesson_id__in={lesson_id for lesson_id, _ in attempted},
+                student_id__in={student_id for _, student_id in attempted},
+                attempt_number=1
+            )
+            if (homework.lesson_id, homework.student_id) in attempted
+        ]
+        if not created:
+            return []
+        
+        # bulk_create skips post_save, so refresh derived data explicitly
+        lesson_groups = {lesson.id: lesson.group_id for lesson in lessons}
+        group_ids = {lesson_groups[homework.lesson_id] for homework in created}
+        schedule_snapshot_refresh({homework.student_id for homework in created}, ['homework'])
+        mark_groups_dirty(group_ids)
+        invalidate_leaderboard_cache(group_ids)
+        return created
+    
+    @classmethod
+    def processing_queue_full(cls):
+        """
+        Admission control: True when too many submissions wait for processing.
+        Rows older than HOMEWORK_PROCESSING_TIMEOUT are left to
+        recover_stale_processing and not counted.
+        """
+        from datetime import timedelta
+        from django.conf import settings
+        from django.utils import timezone
+        
+        backlog = cls.objects.filter(
+            processing_status__in=['queued', 'processing'],
+            processing_queued_at__gte=timezone.now() - timedelta(seconds=settings.HOMEWORK_PROCESSING_TIMEOUT)
+        ).count()
+        return backlog >= settings.HOMEWORK_QUEUE_MAX_DEPTH
+    
+    @classmethod
+    def admission_closed(cls, system_settings=None):
+        """
+        True while new submissions are turned away: audio processing is on
+        and its queue is full. With processing off nothing is queued, so
+        submissions are always accepted.
+        """
+        from apps.settings.models import SystemSettings
+        
+        system_settings = system_settings or SystemSettings.load()
+        return system_settings.audio_processing_enabled and cls.processing_queue_full()
+    
+    @classmethod
+    def recover_stale_processing(cls):
+        """
+        Requeue submissions whose task message was lost (still queued after
+        HOMEWORK_PROCESSING_TIMEOUT) and fail those whose worker died while
+        processing them. Returns the requeued and failed counts.
+        """
+        from datetime import timedelta
+        from django.conf import settings
+        from django.db.models import Q
+        from django.utils import timezone
+        from apps.homework.tasks import process_homework_audio
+        from apps.settings.models import SystemSettings
+        
+        now = timezone.now()
+        stale = Q(processing_queued_at__lt=now - timedelta(seconds=settings.HOMEWORK_PROCESSING_TIMEOUT)) | Q(
+            processing_queued_at__isnull=True
+        )
+        
+        failed = cls.objects.filter(stale, processing_status='processing').update(
+            processing_status='failed',
+            processing_error='Processing timed out',
+            updated_at=now
+        )
+        
+        stuck = cls.objects.filter(stale, processing_status='queued')
+        if not SystemSettings.load().audio_processing_enabled:
+            # Processing was switched off: leave them to teachers
+            return {'requeued': 0, 'failed': failed + stuck.update(processing_status='none', updated_at=now)}
+        
+        requeued = 0
+        for homework_id, task_id in stuck.values_list('id', 'processing_task_id'):
+            # Conditional update so overlapping runs requeue a row only once
+            if cls.objects.filter(stale, id=homework_id, processing_status='queued').update(
+                processing_queued_at=now
+            ):
+                process_homework_audio.apply_async(args=[homework_id], task_id=task_id or None)
+                requeued += 1
+        return {'requeued': requeued, 'failed': failed}
+    
+    def submit_audio(self, audio_file, audio_sha256):
+        """
+        Attach a submitted recording, mark the homework submitted and queue
+        it for transcription once the transaction commits. With
+        SystemSettings.audio_processing_enabled off nothing is queued and the
+        submission waits for a teacher. Raises ProcessingQueueFull, leaving
+        the homework untouched, while admission_closed().
+        """
+        import uuid
+        from django.db import transaction
+        from django.utils import timezone
+        from apps.homework.tasks import process_homework_audio
+        from apps.settings.models import SystemSettings
+        
+        system_settings = SystemSettings.load()
+        if Homework.admission_closed(system_settings):
+            raise ProcessingQueueFull()
+        
+        now = timezone.now()
+        if now > self.deadline and not self.is_late:
+            self.is_late = True
+        
+        self.audio_sha256 = audio_sha256
+        self.audio_submission = audio_file
+        self.original_audio_bytes = audio_file.size
+        self.stored_audio_bytes = None
+        self.submission_date = now
+        self.status = 'submitted'
+        self.processing_error = ''
+        
+        if not system_settings.audio_processing_enabled:
+            self.processing_status = 'none'
+            self.processing_task_id = ''
+            self.processing_queued_at = None
+            self.save()
+            return
+        
+        self.processing_status = 'queued'
+        self.processing_task_id = str(uuid.uuid4())
+        self.processing_queued_at = now
+        self.save()
+        
+        # Routed to the homework_audio queue by CELERY_TASK_ROUTES
+        homework_id, task_id = self.id, self.processing_task_id
+        transaction.on_commit(
+            lambda: process_homework_audio.apply_async(args=[homework_id], task_id=task_id)
+        )
 
 
 class HomeworkTranscript(models.Model):
-    """Store transcription data from OpenAI Whisper"""
+    """Store transcription data from the transcription backend"""
     
     homework = models.OneToOneField(
         Homework,
@@ -169,9 +562,206 @@ class HomeworkTranscript(models.Model):
         help_text=_("Time taken to process")
     )
     
+    audio_duration_seconds = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=_("Length of the submitted recording")
+    )
+    
+    sample_rate = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Sample rate of the submitted recording (Hz)")
+    )
+    
+    channels = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True
+    )
+    
+    rms_loudness = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=_("RMS level of the recording (0-1)")
+    )
+    
+    transcription_backend = models.CharField(
+        max_length=50,
+        blank=True,
+        help_text=_("Backend that produced the text ('cache' for cache hits)")
+    )
+    
+    transcription_latency_seconds = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=_("Time spent in the transcription backend")
+    )
+    
+    trimmed_seconds = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=_("Silence trimmed before transcription")
+    )
+    
+    segments = models.JSONField(
+        default=list,
+        blank=True,
+        help_text=_("Per-segment text, timing, confidence and attempts for long recordings")
+    )
+    
+    minhash_signature = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text=_("MinHash of cleaned_text word shingles (uint32 array) for plagiarism checks")
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         db_table = 'homework_transcripts'
         verbose_name = _('Homework Transcript')
         verbose_name_plural = _('Homework Transcripts')
+
+
+class TranscriptionCache(models.Model):
+    """Transcriptions keyed by audio content, so identical files are sent to Whisper once"""
+    
+    audio_sha256 = models.CharField(max_length=64)
+    
+    model = models.CharField(
+        max_length=50,
+        help_text=_("Transcription model")
+    )
+    
+    language = models.CharField(max_length=10)
+    
+    text = models.TextField()
+    
+    confidence_score = models.FloatField(
+        validators=[MinValueValidator(0), MaxValueValidator(1)]
+    )
+    
+    hit_count = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Transcriptions served from this entry")
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'transcription_cache'
+        verbose_name = _('Transcription Cache Entry')
+        verbose_name_plural = _('Transcription Cache')
+        unique_together = [('audio_sha256', 'model', 'language')]
+    
+    def __str__(self):
+        return f"{self.audio_sha256[:12]} ({self.model}, {self.language})"
+
+
+class TranscriptLSHBucket(models.Model):
+    """LSH band bucket of a transcript signature; transcripts sharing a bucket are candidates"""
+    
+    lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name='transcript_buckets'
+    )
+    
+    homework = models.ForeignKey(
+        Homework,
+        on_delete=models.CASCADE,
+        related_name='transcript_buckets'
+    )
+    
+    bucket_key = models.BigIntegerField(
+        help_text=_("Hash of one signature band and its index")
+    )
+    
+    class Meta:
+        db_table = 'transcript_lsh_buckets'
+        verbose_name = _('Transcript LSH Bucket')
+        verbose_name_plural = _('Transcript LSH Buckets')
+        unique_together = [('homework', 'bucket_key')]
+        indexes = [models.Index(fields=['lesson', 'bucket_key'])]
+    
+    def __str__(self):
+        return f"{self.homework_id}: {self.bucket_key}"
+
+
+class AudioFingerprintHash(models.Model):
+    """Inverted index of fingerprint hashes: which recordings in a group contain a hash"""
+    
+    group = models.ForeignKey(
+        'courses.Group',
+        on_delete=models.CASCADE,
+        related_name='audio_fingerprint_hashes'
+    )
+    
+    lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name='audio_fingerprint_hashes'
+    )
+    
+    homework = models.ForeignKey(
+        Homework,
+        on_delete=models.CASCADE,
+        related_name='fingerprint_hashes'
+    )
+    
+    hash = models.IntegerField()
+    
+    class Meta:
+        db_table = 'audio_fingerprint_hashes'
+        verbose_name = _('Audio Fingerprint Hash')
+        verbose_name_plural = _('Audio Fingerprint Hashes')
+        indexes = [models.Index(fields=['group', 'hash'])]
+    
+    def __str__(self):
+        return f"{self.homework_id}: {self.hash}"
+
+
+class PlagiarismFlag(models.Model):
+    """Two students' transcripts for the same lesson that are near duplicates"""
+    
+    lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name='plagiarism_flags'
+    )
+    
+    # Stored with homework_id < matched_homework_id so a pair is flagged once
+    homework = models.ForeignKey(
+        Homework,
+        on_delete=models.CASCADE,
+        related_name='plagiarism_flags'
+    )
+    
+    matched_homework = models.ForeignKey(
+        Homework,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    
+    similarity = models.FloatField(
+        validators=[MinValueValidator(0), MaxValueValidator(1)],
+        help_text=_("Estimated Jaccard similarity of word shingles")
+    )
+    
+    is_dismissed = models.BooleanField(
+        default=False,
+        help_text=_("Teacher reviewed the pair and found no copying")
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'plagiarism_flags'
+        ordering = ['-similarity']
+        verbose_name = _('Plagiarism Flag')
+        verbose_name_plural = _('Plagiarism Flags')
+        unique_together = [('homework', 'matched_homework')]
+    
+    def __str__(self):
+        return f"{self.homework_id} ~ {self.matched_homework_id} ({self.similarity:.2f})"
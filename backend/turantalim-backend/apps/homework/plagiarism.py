@@ -0,0 +1,203 @@
+"""
+Near-duplicate detection between classmates' transcripts.
+
+Each cleaned transcript becomes a set of word shingles summarized by a
+MinHash signature (NUM_PERMUTATIONS uint32 values stored as bytes).
+Shingles of the assigned text are removed first: every student reads it
+aloud, so only what a transcript adds or gets wrong is compared. The
+signature is cut into LSH bands whose hashes are indexed per lesson, so a
+new transcript is only compared with the transcripts that share one of its
+buckets instead of with the whole lesson. Candidates whose signatures agree
+on at least PLAGIARISM_THRESHOLD of positions are flagged for the teacher.
+"""
+import hashlib
+import zlib
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from apps.homework.similarity import tokenize
+
+SHINGLE_SIZE = 3
+# One deviating word changes up to SHINGLE_SIZE shingles; fewer than two
+# deviations' worth is too little to tell copying from a common misreading
+MIN_UNEXPECTED_SHINGLES = 2 * SHINGLE_SIZE
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows: pairs above ~0.42 Jaccard are very likely to collide
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Stored signatures depend on these; changing the seed means re-running the backfill
+_permutations = np.random.RandomState(1729)
+PERMUTATION_A = _permutations.randint(1, MERSENNE_PRIME, NUM_PERMUTATIONS).astype(np.uint64)
+PERMUTATION_B = _permutations.randint(0, MERSENNE_PRIME, NUM_PERMUTATIONS).astype(np.uint64)
+
+
+def shingles(text):
+    """Set of word SHINGLE_SIZE-grams; shorter texts are one shingle"""
+    tokens = tokenize(text)
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text, expected=''):
+    """
+    MinHash signature (uint32 array) of the text's shingles that are not in
+    the expected text, or None when fewer than MIN_UNEXPECTED_SHINGLES remain
+    """
+    text_shingles = shingles(text) - shingles(expected)
+    if len(text_shingles) < MIN_UNEXPECTED_SHINGLES:
+        return None
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) & MERSENNE_PRIME for shingle in text_shingles),
+        dtype=np.uint64,
+        count=len(text_shingles)
+    )
+    # (a * x + b) mod p for every permutation at once; a, x < 2**31 so nothing overflows
+    permuted = (PERMUTATION_A[:, None] * hashes[None, :] + PERMUTATION_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def to_bytes(signature):
+    return signature.astype('<u4').tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(bytes(data), dtype='<u4')
+
+
+def bucket_keys(signature):
+    """One signed 64-bit key per band, mixing in the band index"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].astype('<u4').tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def estimated_similarity(signature, other):
+    """Share of agreeing positions, an unbiased estimate of the Jaccard similarity of unexpected shingles"""
+    return float(np.count_nonzero(signature == other)) / NUM_PERMUTATIONS
+
+
+def _flag(lesson_id, homework_id, other_id, score):
+    from apps.homework.models import PlagiarismFlag
+
+    first, second = sorted((homework_id, other_id))
+    return PlagiarismFlag(lesson_id=lesson_id, homework_id=first, matched_homework_id=second, similarity=score)
+
+
+def index_transcript(transcript, threshold=None):
+    """
+    Store a transcript's signature and buckets and flag classmates whose
+    transcripts for the same lesson are near duplicates. Returns the flags.
+    """
+    from apps.homework.models import HomeworkTranscript, TranscriptLSHBucket, PlagiarismFlag
+
+    threshold = settings.PLAGIARISM_THRESHOLD if threshold is None else threshold
+    homework = transcript.homework
+    signature = minhash(transcript.cleaned_text, homework.description)
+
+    with transaction.atomic():
+        TranscriptLSHBucket.objects.filter(homework=homework).delete()
+        PlagiarismFlag.objects.filter(
+            Q(homework=homework) | Q(matched_homework=homework),
+            is_dismissed=False
+        ).delete()
+        HomeworkTranscript.objects.filter(id=transcript.id).update(
+            minhash_signature=to_bytes(signature) if signature is not None else None
+        )
+        if signature is None:
+            return []
+
+        keys = bucket_keys(signature)
+        candidate_ids = TranscriptLSHBucket.objects.filter(
+            lesson_id=homework.lesson_id,
+            bucket_key__in=keys
+        ).exclude(
+            # Re-attempts by the same student are not plagiarism
+            homework__student_id=homework.student_id
+        ).values_list('homework_id', flat=True).distinct()
+        candidates = HomeworkTranscript.objects.filter(
+            homework_id__in=candidate_ids,
+            minhash_signature__isnull=False
+        ).values_list('homework_id', 'minhash_signature')
+
+        flags = []
+        for other_id, other_signature in candidates:
+            score = estimated_similarity(signature, from_bytes(other_signature))
+            if score >= threshold:
+                flags.append(_flag(homework.lesson_id, homework.id, other_id, score))
+
+        TranscriptLSHBucket.objects.bulk_create([
+            TranscriptLSHBucket(lesson_id=homework.lesson_id, homework=homework, bucket_key=key)
+            for key in set(keys)
+        ])
+        PlagiarismFlag.objects.bulk_create(flags, ignore_conflicts=True)
+
+    return flags
+
+
+def index_lesson(lesson_id, threshold=None):
+    """
+    Rebuild signatures, buckets and flags for every transcript of a lesson
+    in one pass (backfill). Dismissed flags are kept.
+    """
+    from apps.homework.models import HomeworkTranscript, TranscriptLSHBucket, PlagiarismFlag
+
+    threshold = settings.PLAGIARISM_THRESHOLD if threshold is None else threshold
+    rows = HomeworkTranscript.objects.filter(homework__lesson_id=lesson_id).values_list(
+        'id', 'homework_id', 'homework__student_id', 'cleaned_text', 'homework__description'
+    )
+
+    updates = []
+    signatures = {}
+    students = {}
+    buckets = defaultdict(set)
+    for transcript_id, homework_id, student_id, text, expected in rows:
+        signature = minhash(text, expected)
+        updates.append(HomeworkTranscript(
+            id=transcript_id,
+            minhash_signature=to_bytes(signature) if signature is not None else None
+        ))
+        if signature is None:
+            continue
+        signatures[homework_id] = signature
+        students[homework_id] = student_id
+        for key in bucket_keys(signature):
+            buckets[key].add(homework_id)
+
+    candidates = set()
+    for members in buckets.values():
+        for pair in combinations(sorted(members), 2):
+            if students[pair[0]] != students[pair[1]]:
+                candidates.add(pair)
+
+    flags = []
+    for homework_id, other_id in candidates:
+        score = estimated_similarity(signatures[homework_id], signatures[other_id])
+        if score >= threshold:
+            flags.append(_flag(lesson_id, homework_id, other_id, score))
+
+    with transaction.atomic():
+        HomeworkTranscript.objects.bulk_update(updates, ['minhash_signature'], batch_size=500)
+        TranscriptLSHBucket.objects.filter(lesson_id=lesson_id).delete()
+        TranscriptLSHBucket.objects.bulk_create(
+            [
+                TranscriptLSHBucket(lesson_id=lesson_id, homework_id=homework_id, bucket_key=key)
+                for key, members in buckets.items()
+                for homework_id in members
+            ],
+            batch_size=1000
+        )
+        PlagiarismFlag.objects.filter(lesson_id=lesson_id, is_dismissed=False).delete()
+        PlagiarismFlag.objects.bulk_create(flags, ignore_conflicts=True)
+
+    return {'transcripts': len(updates), 'candidates': len(candidates), 'flagged': len(flags)}
@@ -0,0 +1,119 @@
+"""
+Batch rescoring of transcribed homework.
+
+Transcripts are streamed from the database in chunks, scored in a process
+pool (the scorer is pure Python and CPU bound) and written back with
+bulk_update. Only similarity_score and is_similarity_passed change;
+homework status and coins are left to teachers.
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.homework.models import Homework
+from apps.homework.similarity import similarity
+
+# Pass/fail distribution is reported in buckets of this width
+HISTOGRAM_STEP = 0.1
+
+
+def _score_chunk(rows, ngram_weight):
+    """Score (id, student_id, group_id, transcript, expected) rows; runs in a worker process"""
+    return [
+        (homework_id, student_id, group_id, similarity(transcript, expected, ngram_weight=ngram_weight))
+        for homework_id, student_id, group_id, transcript, expected in rows
+    ]
+
+
+def _chunks(queryset, chunk_size):
+    chunk = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _scored_chunks(chunks, ngram_weight, workers):
+    """Yield scored chunks, keeping at most 2 * workers chunks in flight"""
+    if workers <= 1:
+        for chunk in chunks:
+            yield _score_chunk(chunk, ngram_weight)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_score_chunk, chunk, ngram_weight))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def rescore_homeworks(threshold=None, homework_ids=None, chunk_size=500, workers=None, dry_run=False):
+    """
+    Recompute similarity for every homework with a transcript and return the
+    pass/fail distribution. With dry_run nothing is written.
+    """
+    from apps.accounts.dashboard import schedule_snapshot_refresh
+    from apps.gamification.leaderboard import invalidate_leaderboard_cache
+    from apps.settings.models import SystemSettings
+
+    if threshold is None:
+        threshold = SystemSettings.load().similarity_threshold
+    if workers is None:
+        workers = settings.RESCORE_WORKERS
+
+    homeworks = Homework.with_expected_text().filter(transcript__isnull=False)
+    if homework_ids is not None:
+        homeworks = homeworks.filter(id__in=homework_ids)
+    rows = homeworks.order_by('id').values_list(
+        'id', 'student_id', 'lesson__group_id', 'transcript__cleaned_text', 'description'
+    )
+
+    stats = {'scored': 0, 'passed': 0, 'failed': 0, 'changed': 0, 'histogram': {}}
+    buckets = int(round(1 / HISTOGRAM_STEP))
+
+    for scored in _scored_chunks(_chunks(rows, chunk_size), settings.SIMILARITY_NGRAM_WEIGHT, workers):
+        current = dict(
+            Homework.objects.filter(id__in=[row[0] for row in scored]).values_list(
+                'id', 'is_similarity_passed'
+            )
+        )
+
+        updates = []
+        student_ids = set()
+        group_ids = set()
+        for homework_id, student_id, group_id, score in scored:
+            passed = score >= threshold
+            stats['scored'] += 1
+            stats['passed' if passed else 'failed'] += 1
+            bucket = min(int(score * buckets), buckets - 1) * HISTOGRAM_STEP
+            label = f'{bucket:.1f}-{bucket + HISTOGRAM_STEP:.1f}'
+            stats['histogram'][label] = stats['histogram'].get(label, 0) + 1
+
+            if current.get(homework_id) != passed:
+                stats['changed'] += 1  # pass/fail flipped
+            updates.append(Homework(id=homework_id, similarity_score=score, is_similarity_passed=passed))
+            student_ids.add(student_id)
+            group_ids.add(group_id)
+
+        if dry_run:
+            continue
+
+        with transaction.atomic():
+            Homework.objects.bulk_update(updates, ['similarity_score', 'is_similarity_passed'])
+            # bulk_update skips post_save, so refresh derived data explicitly
+            schedule_snapshot_refresh(student_ids, ['homework'])
+            invalidate_leaderboard_cache(group_ids)
+
+    stats['histogram'] = dict(sorted(stats['histogram'].items()))
+    stats['threshold'] = threshold
+    stats['dry_run'] = dry_run
+    return stats
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from apps.homework.models import Homework, HomeworkTranscript
+from apps.homework.models import Homework, HomeworkTranscript, PlagiarismFlag
 from core.serializers import BaseSerializer, AudioFileField
 
 class HomeworkTranscriptSerializer(serializers.ModelSerializer):
@@ -9,7 +9,9 @@ class HomeworkTranscriptSerializer(serializers.ModelSerializer):
         model = HomeworkTranscript
         fields = [
             'id', 'raw_text', 'cleaned_text', 'confidence_score',
-            'language', 'processing_time_seconds', 'created_at'
+            'language', 'processing_time_seconds', 'audio_duration_seconds',
+            'sample_rate', 'channels', 'rms_loudness', 'transcription_backend',
+            'transcription_latency_seconds', 'trimmed_seconds', 'segments', 'created_at'
         ]
         read_only_fields = fields
 
@@ -29,12 +31,22 @@ class HomeworkSerializer(BaseSerializer):
             'submission_date', 'attempt_number', 'similarity_score',
             'is_similarity_passed', 'teacher_feedback', 'reviewed_by',
             'reviewed_date', 'deadline', 'is_late', 'coins_earned',
-            'transcript', 'created_at', 'updated_at'
+            'transcript', 'audio_match_score', 'audio_match_homework',
+            'created_at', 'updated_at'
         ]
         read_only_fields = [
             'similarity_score', 'is_similarity_passed', 'submission_date',
-            'transcript'
+            'transcript', 'audio_match_score', 'audio_match_homework'
         ]
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Duplicate-recording matches are for teachers only
+        request = self.context.get('request')
+        if request is not None and request.user.is_student:
+            data.pop('audio_match_score')
+            data.pop('audio_match_homework')
+        return data
 
 class HomeworkSubmitSerializer(serializers.ModelSerializer):
     """Homework submission serializer"""
@@ -52,6 +64,11 @@ class HomeworkReviewSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices=['approved', 'rejected'])
     feedback = serializers.CharField(max_length=1000, required=False)
 
+class BulkHomeworkReviewSerializer(serializers.Serializer):
+    """Bulk homework review serializer"""
+    
+    reviews = HomeworkReviewSerializer(many=True, allow_empty=False, max_length=500)
+
 class HomeworkListSerializer(serializers.ModelSerializer):
     """Homework list serializer"""
     
@@ -65,3 +82,20 @@ class HomeworkListSerializer(serializers.ModelSerializer):
             'status', 'attempt_number', 'submission_date', 'is_late',
             'coins_earned'
         ]
+
+class PlagiarismFlagSerializer(serializers.ModelSerializer):
+    """Near-duplicate transcript pair"""
+    
+    student = serializers.IntegerField(source='homework.student_id', read_only=True)
+    student_name = serializers.CharField(source='homework.student.get_full_name', read_only=True)
+    matched_student = serializers.IntegerField(source='matched_homework.student_id', read_only=True)
+    matched_student_name = serializers.CharField(source='matched_homework.student.get_full_name', read_only=True)
+    
+    class Meta:
+        model = PlagiarismFlag
+        fields = [
+            'id', 'lesson', 'homework', 'student', 'student_name',
+            'matched_homework', 'matched_student', 'matched_student_name',
+            'similarity', 'is_dismissed', 'created_at'
+        ]
+        read_only_fields = fields
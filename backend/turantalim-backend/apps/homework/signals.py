@@ -0,0 +1,36 @@
+"""
+Assign homework to the group when a lesson is created or completed, and
+keep Homework.teacher in step with the lesson's group
+"""
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.courses.models import Group
+from apps.lessons.models import Lesson
+from apps.homework.models import Homework
+
+
+def assign_after_commit(lesson_id):
+    # Reload so dates and times are real objects even if the instance was
+    # saved with strings, and skip lessons deleted before the commit
+    Homework.assign_for_lessons(Lesson.objects.filter(id=lesson_id))
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    if created or instance.status == 'completed':
+        lesson_id = instance.id
+        transaction.on_commit(lambda: assign_after_commit(lesson_id))
+    if not created:
+        # The lesson may have moved to another group
+        teacher_id = Group.objects.filter(id=instance.group_id).values_list('teacher_id', flat=True).first()
+        Homework.objects.filter(lesson=instance).exclude(teacher_id=teacher_id).update(teacher_id=teacher_id)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        Homework.objects.filter(lesson__group=instance).exclude(
+            teacher_id=instance.teacher_id
+        ).update(teacher_id=instance.teacher_id)
@@ -0,0 +1,91 @@
+"""
+Transcript similarity scoring.
+
+Texts are normalized with Turkish casing rules and compared word by word:
+the main score is a Levenshtein alignment over tokens computed with a
+bit-parallel algorithm (linear space, O(n*m/w) time over words rather than
+characters), optionally blended with word-bigram overlap.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+# Turkish dotted/dotless I do not round-trip through str.lower()
+TURKISH_CASE_MAP = str.maketrans({'I': 'ı', 'İ': 'i'})
+# Suffix apostrophes (Ankara'ya) are often missing in transcripts; Uzbek
+# Latin writes oʻ/gʻ with a turned comma (U+02BB) or a left quote instead of '
+APOSTROPHE_RE = re.compile(r"['‘’ʻʼ`]")
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    """Lowercase with Turkish rules, drop apostrophes and turn other punctuation into spaces"""
+    text = unicodedata.normalize('NFC', text or '').translate(TURKISH_CASE_MAP).lower()
+    return NON_WORD_RE.sub(' ', APOSTROPHE_RE.sub('', text)).strip()
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def edit_distance(source, target):
+    """
+    Levenshtein distance between two token sequences.
+
+    Bit-parallel (Myers/Hyyro): each column of the DP matrix is kept as two
+    bit vectors over the shorter sequence, so memory is linear and every
+    token of the longer sequence costs a handful of integer operations.
+    """
+    if len(source) < len(target):
+        source, target = target, source
+    if not target:
+        return len(source)
+
+    match_masks = {}
+    for i, token in enumerate(target):
+        match_masks[token] = match_masks.get(token, 0) | (1 << i)
+
+    mask = (1 << len(target)) - 1
+    last_bit = 1 << (len(target) - 1)
+    positive = mask
+    negative = 0
+    distance = len(target)
+    for token in source:
+        match = match_masks.get(token, 0)
+        vertical = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        horizontal_positive = negative | (~(horizontal | positive) & mask)
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last_bit:
+            distance += 1
+        elif horizontal_negative & last_bit:
+            distance -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & mask
+        horizontal_negative = (horizontal_negative << 1) & mask
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & mask)
+        negative = horizontal_positive & vertical
+    return distance
+
+
+def bigram_overlap(source, target):
+    """Dice coefficient over word bigrams"""
+    source_bigrams = Counter(zip(source, source[1:]))
+    target_bigrams = Counter(zip(target, target[1:]))
+    total = sum(source_bigrams.values()) + sum(target_bigrams.values())
+    if not total:
+        return 1.0 if source == target else 0.0
+    return 2 * sum((source_bigrams & target_bigrams).values()) / total
+
+
+def similarity(answer, expected, ngram_weight=0.0):
+    """Similarity in [0, 1] between a transcript and the expected text"""
+    answer_tokens = tokenize(answer)
+    expected_tokens = tokenize(expected)
+    longest = max(len(answer_tokens), len(expected_tokens))
+    if not longest:
+        return 1.0
+
+    score = 1 - edit_distance(answer_tokens, expected_tokens) / longest
+    if ngram_weight:
+        score = (1 - ngram_weight) * score + ngram_weight * bigram_overlap(answer_tokens, expected_tokens)
+    return score
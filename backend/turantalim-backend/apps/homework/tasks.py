@@ -1,78 +1,295 @@
 from celery import shared_task
 from django.conf import settings
+import logging
 import os
-import librosa
-import openai
+import random
+import tempfile
+import time
 from datetime import timedelta
 from django.utils import timezone
 
-@shared_task
-def process_homework_audio(homework_id):
-    """Process homework audio submission with Whisper AI"""
-    from apps.homework.models import Homework, HomeworkTranscript
+logger = logging.getLogger(__name__)
+
+@shared_task(bind=True)
+def process_homework_audio(self, homework_id):
+    """Process homework audio submission with the configured transcription backend"""
+    from celery.exceptions import Retry
+    from django.db import transaction
+    from django.db.models import F
+    from apps.homework.audio import preprocess_audio, probe_audio, sha256_of, split_at_silence
+    from apps.homework.fingerprint import fingerprint_audio, index_fingerprint
+    from apps.homework.models import Homework, HomeworkTranscript, TranscriptionCache
+    from apps.homework.plagiarism import index_transcript
+    from apps.homework.transcription import TranscriptionError, get_backend, transcribe_segments
+    from apps.settings.models import SystemSettings
     
     try:
+        started = time.monotonic()
         homework = Homework.objects.get(id=homework_id)
         
         if not homework.audio_submission:
+            Homework.objects.filter(id=homework_id).update(
+                processing_status='failed',
+                processing_error='No audio file found'
+            )
             return {'status': 'error', 'message': 'No audio file found'}
         
+        Homework.objects.filter(id=homework_id).update(processing_status='processing')
+        
         # Load audio file
         audio_path = homework.audio_submission.path
         
-        # Use OpenAI Whisper for transcription
-        openai.api_key = settings.OPENAI_API_KEY
+        # Submissions made before hashing was added are hashed here once
+        if not homework.audio_sha256:
+            with homework.audio_submission.open('rb') as stored_file:
+                homework.audio_sha256 = sha256_of(stored_file)
+            Homework.objects.filter(id=homework.id).update(audio_sha256=homework.audio_sha256)
         
-        with open(audio_path, 'rb') as audio_file:
-            transcript = openai.Audio.transcribe("whisper-1", audio_file)
+        backend = get_backend()
+        cache_key = {
+            'audio_sha256': homework.audio_sha256,
+            'model': backend.model,
+            'language': settings.TRANSCRIPTION_LANGUAGE
+        }
+        cached = TranscriptionCache.objects.filter(**cache_key).first()
         
-        transcribed_text = transcript['text']
-        confidence = transcript.get('confidence', 0.0)
+        if cached is not None:
+            # Same audio was transcribed before: skip the Whisper call
+            TranscriptionCache.objects.filter(id=cached.id).update(
+                hit_count=F('hit_count') + 1,
+                last_hit_at=timezone.now()
+            )
+            transcribed_text = cached.text
+            confidence = cached.confidence_score
+            backend_name = 'cache'
+            latency = 0.0
+            trimmed_seconds = None
+            segments = []
+        else:
+            try:
+                with tempfile.TemporaryDirectory() as work_dir:
+                    # Send a trimmed 16kHz mono FLAC instead of the original upload
+                    prepared = preprocess_audio(audio_path, os.path.join(work_dir, 'prepared.flac'))
+                    if prepared is not None:
+                        log_preprocessing_savings(homework.id, prepared)
+                    trimmed_seconds = prepared['trimmed_seconds'] if prepared else None
+                    
+                    # Long recordings are transcribed in parallel segments cut at silence
+                    if prepared is not None:
+                        audio_segments = split_at_silence(prepared['path'], work_dir, settings.AUDIO_CHUNK_DURATION)
+                    else:
+                        audio_segments = [{'path': audio_path, 'start': 0.0, 'end': 0.0}]
+                    
+                    transcript = transcribe_segments(
+                        audio_segments,
+                        settings.TRANSCRIPTION_LANGUAGE,
+                        backend=backend
+                    )
+            except TranscriptionError as e:
+                if not e.retryable:
+                    raise
+                # Rate limits, timeouts and a saturated limiter are retried
+                # later; the homework stays submitted meanwhile, and the fresh
+                # queue time keeps recover_stale_processing off it
+                Homework.objects.filter(id=homework_id).update(
+                    processing_status='queued',
+                    processing_queued_at=timezone.now()
+                )
+                raise self.retry(
+                    exc=e,
+                    countdown=transcription_retry_delay(self.request.retries),
+                    max_retries=settings.TRANSCRIPTION_MAX_RETRIES
+                )
+            
+            transcribed_text = transcript['text']
+            confidence = transcript['confidence']
+            backend_name = transcript['backend']
+            latency = transcript['latency_seconds']
+            segments = transcript['segments']
+            
+            TranscriptionCache.objects.get_or_create(
+                **cache_key,
+                defaults={'text': transcribed_text, 'confidence_score': confidence}
+            )
         
-        # Get audio duration
-        y, sr = librosa.load(audio_path)
-        duration = librosa.get_duration(y=y, sr=sr)
+        # Duration and loudness are read in blocks, never decoding the whole file
+        audio_info = probe_audio(audio_path)
         
         # Store transcript
-        HomeworkTranscript.objects.update_or_create(
+        transcript_record, _ = HomeworkTranscript.objects.update_or_create(
             homework=homework,
             defaults={
                 'raw_text': transcribed_text,
                 'cleaned_text': transcribed_text.strip(),
                 'confidence_score': confidence,
-                'language': 'tr',
-                'processing_time_seconds': duration
+                'language': settings.TRANSCRIPTION_LANGUAGE,
+                'processing_time_seconds': time.monotonic() - started,
+                'audio_duration_seconds': audio_info['duration'],
+                'sample_rate': audio_info['sample_rate'],
+                'channels': audio_info['channels'],
+                'rms_loudness': audio_info['rms'],
+                'transcription_backend': backend_name,
+                'transcription_latency_seconds': latency,
+                'trimmed_seconds': trimmed_seconds,
+                'segments': segments
             }
         )
         
-        # Check similarity against expected answer
-        similarity_score = compute_similarity(transcribed_text, homework.description)
-        homework.similarity_score = similarity_score
+        # Compare with classmates' transcripts and recordings; a failure here must not block scoring
+        try:
+            index_transcript(transcript_record)
+        except Exception:
+            logger.exception(f'Plagiarism check failed for homework {homework.id}')
+        try:
+            fingerprint = fingerprint_audio(audio_path)
+            if fingerprint is not None:
+                index_fingerprint(homework, fingerprint)
+        except Exception:
+            logger.exception(f'Audio fingerprinting failed for homework {homework.id}')
+        
         homework.transcription = transcribed_text
-        homework.is_similarity_passed = similarity_score >= settings.SIMILARITY_THRESHOLD
         
-        if homework.is_similarity_passed:
-            homework.status = 'approved'
-            homework.coins_earned = settings.HOMEWORK_APPROVED_COINS
-        else:
-            homework.status = 'rejected'
+        if not homework.has_expected_text:
+            # No expected text to compare against: leave it pending for the teacher
+            similarity_score = None
+            homework.similarity_score = None
+            homework.is_similarity_passed = None
+            homework.status = 'submitted'
             homework.coins_earned = 0
+        else:
+            # Check similarity against expected answer
+            # Same admin-editable threshold as rescore_homeworks
+            system_settings = SystemSettings.load()
+            similarity_score = compute_similarity(transcribed_text, homework.description)
+            homework.similarity_score = similarity_score
+            homework.is_similarity_passed = similarity_score >= system_settings.similarity_threshold
+            
+            if homework.is_similarity_passed:
+                homework.status = 'approved'
+                homework.coins_earned = system_settings.homework_approved_coins
+            else:
+                homework.status = 'rejected'
+                homework.coins_earned = 0
         
+        homework.processing_status = 'done'
+        homework.processing_error = ''
         homework.save()
         
-        return {'status': 'success', 'similarity': similarity_score}
+        # Scoring is done, so the original upload is no longer needed
+        transaction.on_commit(lambda: transcode_homework_audio.delay(homework.id))
+        
+        return {'status': 'success', 'similarity': similarity_score, 'backend': backend_name}
+        
+    except Retry:
+        raise
+    except Exception as e:
+        Homework.objects.filter(id=homework_id).update(
+            processing_status='failed',
+            processing_error=str(e)
+        )
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def transcode_homework_audio(homework_id):
+    """Replace a scored submission with a compact mono Opus copy and delete the original"""
+    from django.core.files import File
+    from apps.homework.audio import transcode_to_opus
+    from apps.homework.models import Homework
+    
+    try:
+        homework = Homework.objects.get(id=homework_id)
+        
+        if not homework.audio_submission or homework.stored_audio_bytes is not None:
+            return {'status': 'error', 'message': 'Nothing to transcode'}
+        if homework.processing_status != 'done':
+            return {'status': 'error', 'message': 'Scoring has not finished'}
+        
+        original_name = homework.audio_submission.name
+        storage = homework.audio_submission.storage
+        
+        with tempfile.TemporaryDirectory() as work_dir:
+            result = transcode_to_opus(
+                homework.audio_submission.path,
+                os.path.join(work_dir, 'audio.ogg'),
+                bitrate=settings.AUDIO_STORAGE_BITRATE
+            )
+            if result is None:
+                return {'status': 'error', 'message': 'Unsupported audio format'}
+            
+            if result['bytes'] >= result['original_bytes']:
+                # Already compact: keep the original
+                Homework.objects.filter(id=homework_id).update(
+                    original_audio_bytes=result['original_bytes'],
+                    stored_audio_bytes=result['original_bytes']
+                )
+                return {'status': 'success', 'bytes_saved': 0}
+            
+            base_name = os.path.splitext(os.path.basename(original_name))[0]
+            with open(result['path'], 'rb') as opus_file:
+                stored_name = storage.save(
+                    os.path.join(os.path.dirname(original_name), f'{base_name}.ogg'),
+                    File(opus_file)
+                )
         
+        # Swap only if the student did not resubmit while we were transcoding
+        updated = Homework.objects.filter(id=homework_id, audio_submission=original_name).update(
+            audio_submission=stored_name,
+            original_audio_bytes=result['original_bytes'],
+            stored_audio_bytes=result['bytes']
+        )
+        if not updated:
+            storage.delete(stored_name)
+            return {'status': 'error', 'message': 'Submission changed during transcoding'}
+        storage.delete(original_name)
+        
+        bytes_saved = result['original_bytes'] - result['bytes']
+        logger.info(
+            f"Homework {homework_id}: stored {result['duration']:.1f}s as Opus, "
+            f"{result['bytes']} bytes instead of {result['original_bytes']} ({bytes_saved} saved)"
+        )
+        return {
+            'status': 'success',
+            'original_bytes': result['original_bytes'],
+            'stored_bytes': result['bytes'],
+            'bytes_saved': bytes_saved
+        }
     except Exception as e:
+        logger.exception(f'Audio transcoding failed for homework {homework_id}')
         return {'status': 'error', 'message': str(e)}
 
+def log_preprocessing_savings(homework_id, prepared):
+    """Log silence trimmed before transcription and what it saves"""
+    trimmed_share = prepared['trimmed_seconds'] / prepared['original_duration'] if prepared['original_duration'] else 0.0
+    cost_saved = prepared['trimmed_seconds'] / 60 * settings.TRANSCRIPTION_COST_PER_MINUTE
+    logger.info(
+        f"Homework {homework_id}: trimmed {prepared['trimmed_seconds']:.1f}s of "
+        f"{prepared['original_duration']:.1f}s ({trimmed_share:.0%}), uploading "
+        f"{prepared['bytes']} bytes instead of {prepared['original_bytes']}, "
+        f"~${cost_saved:.4f} saved"
+    )
+
+def transcription_retry_delay(retries):
+    """Exponential backoff with jitter, capped at TRANSCRIPTION_RETRY_MAX_DELAY"""
+    delay = min(settings.TRANSCRIPTION_RETRY_BACKOFF * (2 ** retries), settings.TRANSCRIPTION_RETRY_MAX_DELAY)
+    return delay + random.uniform(0, delay / 2)
+
 def compute_similarity(answer, expected):
     """Compute similarity between answer and expected response"""
-    from difflib import SequenceMatcher
+    from apps.homework.similarity import similarity
     
-    # Simple similarity using SequenceMatcher
-    # In production, use more sophisticated NLP methods
-    similarity = SequenceMatcher(None, answer.lower(), expected.lower()).ratio()
-    return similarity
+    return similarity(answer, expected, ngram_weight=settings.SIMILARITY_NGRAM_WEIGHT)
+
+@shared_task
+def rescore_homeworks(threshold=None, chunk_size=500, dry_run=False):
+    """Recompute similarity of all transcribed homework without re-transcribing"""
+    from apps.homework.rescoring import rescore_homeworks as rescore
+    
+    try:
+        # Celery prefork children are daemonic and cannot start a process pool
+        stats = rescore(threshold=threshold, chunk_size=chunk_size, workers=1, dry_run=dry_run)
+        return {'status': 'success', **stats}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
 
 @shared_task
 def generate_group_lessons(group_id):
@@ -88,106 +305,120 @@ def generate_group_lessons(group_id):
         return {'status': 'error', 'message': str(e)}
 
 @shared_task
-def mark_payments_overdue():
-    """Mark payments as overdue if past due date"""
-    from apps.payments.models import Payment, PaymentHistory
-    from apps.settings.models import SystemSettings
-    
-    settings_obj = SystemSettings.load()
-    cutoff_date = timezone.now().date() - timedelta(days=settings_obj.overdue_payment_day)
-    
-    overdue_payments = Payment.objects.filter(
-        status='pending',
-        due_date__lt=cutoff_date
-    )
-    
-    count = 0
-    for payment in overdue_payments:
-        old_status = payment.status
-        payment.status = 'overdue'
-        payment.save()
-        
-        PaymentHistory.objects.create(
-            payment=payment,
-            old_status=old_status,
-            new_status='overdue',
-            notes='Automatically marked as overdue'
-        )
-        count += 1
+def generate_term_lessons(group_ids=None, chunk_size=100):
+    """Generate missing lessons for all active groups with a schedule"""
+    from apps.courses.models import Group
+    from apps.groups.models import LessonGenerator
     
-    return {'status': 'success', 'payments_marked_overdue': count}
+    try:
+        if group_ids:
+            groups = Group.objects.filter(id__in=group_ids)
+        else:
+            groups = Group.objects.filter(
+                status='active',
+                is_active=True,
+                lesson_schedules__is_active=True
+            ).distinct()
+        group_ids = list(groups.values_list('id', flat=True).order_by('id'))
+        
+        lessons_created = 0
+        for start in range(0, len(group_ids), chunk_size):
+            chunk = Group.objects.filter(id__in=group_ids[start:start + chunk_size])
+            lessons_created += len(LessonGenerator.generate_lessons_for_groups(chunk))
+        
+        return {'status': 'success', 'groups_processed': len(group_ids), 'lessons_created': lessons_created}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
 
 @shared_task
-def update_leaderboards(group_id=None):
-    """Update leaderboard rankings for groups"""
-    from apps.gamification.models import Leaderboard, StudentCoin
-    from apps.attendance.models import Attendance
-    from apps.homework.models import Homework
-    from apps.courses.models import Group
+def mark_payments_overdue(batch_size=1000):
+    """Mark payments as overdue if past due date"""
+    from django.db import connection, transaction
+    from apps.payments.models import Payment, PaymentHistory
+    from apps.settings.models import SystemSettings
     
     try:
-        if group_id:
-            groups = Group.objects.filter(id=group_id)
-        else:
-            groups = Group.objects.all()
+        started = time.monotonic()
         
-        updated_count = 0
+        settings_obj = SystemSettings.load()
+        cutoff_date = timezone.now().date() - timedelta(days=settings_obj.overdue_payment_day)
         
-        for group in groups:
-            students = group.students.all()
-            
-            leaderboard_entries = []
-            
-            for student in students:
-                coin_balance = StudentCoin.objects.filter(student=student).first()
-                coins = coin_balance.total_coins if coin_balance else 0
-                
-                lessons_completed = group.lessons.filter(
-                    status='completed'
-                ).count()
-                
-                homeworks_completed = Homework.objects.filter(
-                    student=student,
-                    lesson__group=group,
-                    status__in=['approved', 'second_chance']
-                ).count()
-                
-                attendance_records = Attendance.objects.filter(
-                    student=student,
-                    lesson__group=group
+        with transaction.atomic():
+            # One UPDATE ... RETURNING instead of a save() per payment
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {connection.ops.quote_name(Payment._meta.db_table)} "
+                    "SET status = %s, updated_at = %s "
+                    "WHERE status = %s AND due_date < %s "
+                    "RETURNING id",
+                    [
+                        'overdue',
+                        connection.ops.adapt_datetimefield_value(timezone.now()),
+                        'pending',
+                        connection.ops.adapt_datefield_value(cutoff_date)
+                    ]
                 )
-                if attendance_records.exists():
-                    present_count = attendance_records.filter(status='present').count()
-                    attendance_percentage = (present_count / attendance_records.count()) * 100
-                else:
-                    attendance_percentage = 0.0
-                
-                entry, _ = Leaderboard.objects.update_or_create(
-                    student=student,
-                    group=group,
-                    defaults={
-                        'coins': coins,
-                        'lessons_completed': lessons_completed,
-                        'homeworks_completed': homeworks_completed,
-                        'attendance_percentage': attendance_percentage
-                    }
-                )
-                leaderboard_entries.append(entry)
+                payment_ids = [row[0] for row in cursor.fetchall()]
             
-            # Assign ranks
-            sorted_entries = sorted(
-                leaderboard_entries,
-                key=lambda x: (-x.coins, -x.lessons_completed, -x.homeworks_completed)
+            PaymentHistory.objects.bulk_create(
+                [
+                    PaymentHistory(
+                        payment_id=payment_id,
+                        old_status='pending',
+                        new_status='overdue',
+                        notes='Automatically marked as overdue'
+                    )
+                    for payment_id in payment_ids
+                ],
+                batch_size=batch_size
             )
-            
-            for rank, entry in enumerate(sorted_entries, 1):
-                entry.rank = rank
-                entry.save()
-                updated_count += 1
         
-        return {'status': 'success', 'leaderboards_updated': updated_count}
+        return {
+            'status': 'success',
+            'payments_marked_overdue': len(payment_ids),
+            'history_created': len(payment_ids),
+            'duration_seconds': round(time.monotonic() - started, 3)
+        }
+        
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def update_leaderboards(group_id=None, chunk_size=500):
+    """
+    Update leaderboard rankings. Without group_id only groups marked dirty
+    are recomputed; passing group_id rebuilds that group even if frozen.
+    """
+    from apps.gamification.leaderboard import rebuild_leaderboards, rebuild_dirty_leaderboards
+    
+    try:
+        started = time.monotonic()
         
+        if group_id:
+            groups_processed = 1
+            updated_count = rebuild_leaderboards([group_id])
+        else:
+            groups_processed, updated_count = rebuild_dirty_leaderboards(chunk_size=chunk_size)
+        
+        return {
+            'status': 'success',
+            'groups_processed': groups_processed,
+            'leaderboards_updated': updated_count,
+            'duration_seconds': round(time.monotonic() - started, 3)
+        }
+        
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def recover_stale_homework_processing():
+    """Requeue submissions whose task was lost and fail those whose worker died"""
+    from apps.homework.models import Homework
+    
+    try:
+        return {'status': 'success', **Homework.recover_stale_processing()}
     except Exception as e:
+        logger.exception('Recovering stale homework processing failed')
         return {'status': 'error', 'message': str(e)}
 
 @shared_task
@@ -0,0 +1,682 @@
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from io import StringIO
+from difflib import SequenceMatcher
+from unittest import mock, skipUnless
+
+import numpy as np
+import soundfile as sf
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.courses.models import Course, Group
+from apps.gamification.models import CoinTransaction, StudentCoin
+from apps.homework.audio import (
+    STORAGE_SAMPLE_RATE, _lowpass_kernel, probe_audio, transcode_to_opus, write_resampled
+)
+from apps.homework.models import Homework, HomeworkTranscript, PlagiarismFlag, ProcessingQueueFull
+from apps.homework.plagiarism import estimated_similarity, index_lesson, minhash
+from apps.homework.rescoring import rescore_homeworks
+from apps.homework.similarity import edit_distance, normalize, similarity, tokenize
+from apps.homework.tasks import process_homework_audio
+from apps.lessons.models import Lesson
+from apps.settings.models import SystemSettings
+
+
+def wav_bytes(seconds=1, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    path = os.path.join(tempfile.mkdtemp(), 'tone.wav')
+    sf.write(path, (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32), sample_rate)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def make_group(students=2, name='A1'):
+    teacher = User.objects.create_user(
+        email=f'teacher-{name}@example.com', username=f'teacher-{name}', password='x', role='teacher'
+    )
+    course, _ = Course.objects.get_or_create(name='Turkish A1')
+    today = timezone.localdate()
+    group = Group.objects.create(
+        name=name, course=course, teacher=teacher,
+        start_date=today, end_date=today + timedelta(days=90)
+    )
+    group.students.add(*[
+        User.objects.create_user(
+            email=f'student-{name}-{i}@example.com', username=f'student-{name}-{i}', password='x', role='student'
+        )
+        for i in range(students)
+    ])
+    return group
+
+
+def reference_edit_distance(source, target):
+    """Textbook O(n*m) Levenshtein DP"""
+    previous = list(range(len(target) + 1))
+    for i, token in enumerate(source, 1):
+        current = [i]
+        for j, other in enumerate(target, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (token != other)))
+        previous = current
+    return previous[-1]
+
+
+class EditDistanceGoldenTests(SimpleTestCase):
+    # (source, target, distance)
+    GOLDEN = [
+        ([], [], 0),
+        ([], ['bir'], 1),
+        (['bir', 'iki'], [], 2),
+        (['bir'], ['bir'], 0),
+        (['bir'], ['iki'], 1),
+        (['bir', 'iki', 'üç'], ['bir', 'üç'], 1),
+        (['bir', 'üç'], ['bir', 'iki', 'üç'], 1),
+        (['a', 'b', 'c', 'd'], ['b', 'a', 'd', 'c'], 3),
+        (list('kitten'), list('sitting'), 3),
+        (list('abc' * 30), list('abc' * 30), 0),
+        # Longer than one 64-bit machine word on both sides
+        (list(range(70)), list(range(70)), 0),
+        (list(range(70)), list(range(1, 71)), 2),
+        (list(range(100)), list(range(50)) + ['x'] + list(range(51, 100)), 1),
+        (list(range(130)), list(range(65)), 65),
+    ]
+
+    def test_golden_cases(self):
+        for source, target, expected in self.GOLDEN:
+            with self.subTest(source=source[:5], target=target[:5]):
+                self.assertEqual(edit_distance(source, target), expected)
+                self.assertEqual(edit_distance(target, source), expected)
+
+    def test_matches_reference_on_random_pairs(self):
+        rng = random.Random(12)
+        vocabulary = ['ev', 'okul', 'kitap', 'su', 'yol', 'gün']
+        for _ in range(300):
+            source = rng.choices(vocabulary, k=rng.randint(0, 90))
+            target = rng.choices(vocabulary, k=rng.randint(0, 90))
+            self.assertEqual(edit_distance(source, target), reference_edit_distance(source, target))
+
+
+class SimilarityGoldenTests(SimpleTestCase):
+    def test_normalize(self):
+        cases = [
+            ('', ''),
+            ('İSTANBUL', 'istanbul'),
+            ('IRMAK', 'ırmak'),
+            ("Ankara'ya gittim.", 'ankaraya gittim'),
+            ('Ankara’ya', 'ankaraya'),
+            # Uzbek Latin oʻ/gʻ: turned comma, left quote, ASCII and modifier apostrophes
+            ('Oʻzbekiston', 'ozbekiston'),
+            ('O‘zbekiston', 'ozbekiston'),
+            ("O'zbekiston", 'ozbekiston'),
+            ('Oʼzbekiston', 'ozbekiston'),
+            ('gʻalaba', 'galaba'),
+            # Decomposed ü is composed before comparing
+            ('gu\u0308zel', 'güzel'),
+            ('Merhaba,   dünya!', 'merhaba dünya'),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(normalize(text), expected)
+
+    def test_scores(self):
+        cases = [
+            ('', '', 1.0),
+            ('', 'Bugün hava güzel', 0.0),
+            ('Bugün hava güzel', '', 0.0),
+            ('Bugün hava güzel.', 'bugün HAVA güzel', 1.0),
+            ("Toshkent Oʻzbekistonning poytaxti", "Toshkent O'zbekistonning poytaxti", 1.0),
+            ('Bugün hava çok güzel', 'Bugün hava güzel', 0.75),
+            ('bir iki üç dört', 'dört üç iki bir', 0.0),
+        ]
+        for answer, expected, score in cases:
+            with self.subTest(answer=answer, expected=expected):
+                self.assertAlmostEqual(similarity(answer, expected), score)
+
+    def test_long_texts(self):
+        expected = ' '.join(f'kelime{i}' for i in range(200))
+        answer = expected.replace('kelime100 ', '')
+        self.assertGreater(len(tokenize(expected)), 64)
+        self.assertAlmostEqual(similarity(answer, expected), 1 - 1 / 200)
+
+    def test_bigram_weight(self):
+        self.assertAlmostEqual(similarity('a b c d', 'd c b a', ngram_weight=0.5), 0.0)
+        self.assertAlmostEqual(similarity('a b c d', 'a b c d', ngram_weight=0.5), 1.0)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to run benchmarks')
+class SimilarityBenchmark(SimpleTestCase):
+    """Word-level bit-parallel scorer against the SequenceMatcher scorer it replaced"""
+
+    def test_benchmark(self):
+        rng = random.Random(7)
+        vocabulary = [f'kelime{i}' for i in range(300)]
+        for words in (50, 500, 2000):
+            expected = ' '.join(rng.choices(vocabulary, k=words))
+            answer = ' '.join(word for word in expected.split() if rng.random() > 0.1)
+            repeat = max(2000 // words, 3)
+            timings = {}
+            for name, scorer in (
+                ('bit-parallel', lambda: similarity(answer, expected)),
+                ('SequenceMatcher', lambda: SequenceMatcher(None, answer.lower(), expected.lower()).ratio()),
+            ):
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    scorer()
+                timings[name] = (time.perf_counter() - started) / repeat * 1000
+            print(f'\n{words} words: ' + ', '.join(f'{name} {ms:.2f} ms' for name, ms in timings.items()))
+
+
+def measure(function):
+    """Wall time (s) and peak traced allocations (MB) of one call"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        function()
+        return time.perf_counter() - started, tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+class ProbeAudioTests(SimpleTestCase):
+    def test_reads_header_and_rms(self):
+        path = os.path.join(tempfile.mkdtemp(), 'tone.wav')
+        t = np.arange(3 * 22050) / 22050
+        tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        sf.write(path, np.stack([tone, tone], axis=1), 22050)
+
+        info = probe_audio(path, block_frames=4096)
+
+        self.assertAlmostEqual(info['duration'], 3.0)
+        self.assertEqual((info['sample_rate'], info['channels']), (22050, 2))
+        self.assertAlmostEqual(info['rms'], 0.5 / np.sqrt(2), places=3)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to run benchmarks')
+class AudioProbeBenchmark(SimpleTestCase):
+    """probe_audio against the librosa.load decode it replaced, on a 20-minute 44.1kHz stereo WAV"""
+
+    MINUTES = 20
+    SAMPLE_RATE = 44100
+
+    def test_benchmark(self):
+        path = os.path.join(tempfile.mkdtemp(), 'long.wav')
+        rng = np.random.RandomState(3)
+        with sf.SoundFile(path, 'w', self.SAMPLE_RATE, 2, subtype='PCM_16') as target:
+            for _ in range(self.MINUTES):
+                target.write((0.1 * rng.randn(self.SAMPLE_RATE * 60, 2)).astype(np.float32))
+
+        results = {'probe_audio': measure(lambda: probe_audio(path))}
+        try:
+            import librosa
+        except ImportError:
+            pass
+        else:
+            def load():
+                samples, sample_rate = librosa.load(path)
+                librosa.get_duration(y=samples, sr=sample_rate)
+            results['librosa.load'] = measure(load)
+        results['soundfile.read (full decode)'] = measure(lambda: sf.read(path, dtype='float32'))
+
+        print(f'\n{self.MINUTES} min 44.1kHz stereo WAV ({os.path.getsize(path) / 2 ** 20:.0f} MB): ' + ', '.join(
+            f'{name} {seconds:.2f}s / {peak:.1f} MB peak' for name, (seconds, peak) in results.items()
+        ))
+        self.assertLess(results['probe_audio'][1], 16)
+
+
+class WriteResampledTests(SimpleTestCase):
+    def resample(self, samples, block_frames, sample_rate=44100, target_rate=16000):
+        path = os.path.join(tempfile.mkdtemp(), 'in.wav')
+        sf.write(path, samples, sample_rate, subtype='FLOAT')
+        info = sf.info(path)
+        output_path = os.path.join(os.path.dirname(path), 'out.wav')
+        with sf.SoundFile(output_path, 'w', target_rate, 1, subtype='FLOAT') as target:
+            written = write_resampled(path, info, target, 0, info.frames, 1.0, block_frames)
+        output, _ = sf.read(output_path, dtype='float32')
+        self.assertEqual(len(output), written)
+
+        # Whole-signal reference: filter once, then interpolate
+        ratio = target_rate / sample_rate
+        kernel = _lowpass_kernel(ratio)
+        filtered = np.convolve(samples, kernel)[len(kernel) // 2:len(kernel) // 2 + len(samples)]
+        expected = np.interp(np.arange(written) / ratio, np.arange(len(samples)), filtered)
+        return output, expected
+
+    def test_clip_shorter_than_filter(self):
+        samples = np.random.RandomState(1).uniform(-0.5, 0.5, 60).astype(np.float32)
+
+        output, expected = self.resample(samples, block_frames=4096)
+
+        self.assertEqual(len(output), 21)
+        np.testing.assert_allclose(output, expected, atol=1e-5)
+
+    def test_blocks_match_whole_signal(self):
+        samples = np.random.RandomState(2).uniform(-0.5, 0.5, 5000).astype(np.float32)
+
+        # Blocks leave a short chunk at the end of the file
+        output, expected = self.resample(samples, block_frames=1000)
+
+        np.testing.assert_allclose(output, expected, atol=1e-5)
+
+
+class TranscodeToOpusTests(SimpleTestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work_dir.cleanup)
+
+    def write_wav(self, seconds=5, sample_rate=44100, channels=2):
+        path = os.path.join(self.work_dir.name, 'input.wav')
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        sf.write(path, np.stack([tone] * channels, axis=1), sample_rate)
+        return path
+
+    def test_writes_mono_opus_near_target_bitrate(self):
+        path = self.write_wav()
+        result = transcode_to_opus(path, os.path.join(self.work_dir.name, 'out.ogg'), bitrate=24000)
+
+        info = sf.info(result['path'])
+        self.assertEqual((info.format, info.subtype), ('OGG', 'OPUS'))
+        self.assertEqual(info.channels, 1)
+        self.assertEqual(info.samplerate, STORAGE_SAMPLE_RATE)
+        self.assertAlmostEqual(result['duration'], 5.0, places=2)
+        # Ogg framing adds a little on top of the codec bitrate
+        self.assertLess(result['bytes'] * 8 / result['duration'], 24000 * 1.5)
+
+    def test_unreadable_file_returns_none(self):
+        path = os.path.join(self.work_dir.name, 'input.m4a')
+        with open(path, 'wb') as f:
+            f.write(b'not audio')
+        self.assertIsNone(transcode_to_opus(path, os.path.join(self.work_dir.name, 'out.ogg')))
+
+
+class AssignHomeworkTests(TestCase):
+    def setUp(self):
+        self.group = make_group()
+        self.today = timezone.localdate()
+
+    def create_lesson(self, days, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Lesson.objects.create(
+                group=self.group,
+                title=f'Lesson {days}',
+                description=f'Bugün {days}. dersi okuyoruz',
+                scheduled_date=(self.today + timedelta(days=days)).isoformat(),
+                start_time='10:00',
+                **fields
+            )
+
+    def test_lesson_created_with_string_date_and_time(self):
+        lesson = self.create_lesson(1)
+
+        homeworks = Homework.objects.filter(lesson=lesson)
+        self.assertEqual(homeworks.count(), 2)
+        self.assertEqual(homeworks.first().description, 'Bugün 1. dersi okuyoruz')
+
+    def test_every_created_lesson_is_assigned(self):
+        lessons = [self.create_lesson(days) for days in (3, 7, 10)]
+
+        self.assertEqual(
+            dict(Homework.objects.values_list('lesson_id').annotate(Count('id'))),
+            {lesson.id: 2 for lesson in lessons}
+        )
+        # Due after the lesson itself, not after it was scheduled
+        for lesson in Lesson.objects.filter(group=self.group):
+            starts_at = timezone.make_aware(datetime.combine(lesson.scheduled_date, lesson.start_time))
+            self.assertFalse(Homework.objects.filter(lesson=lesson, deadline__lte=starts_at).exists())
+
+    def test_completing_a_lesson_assigns_students_who_joined_later(self):
+        lesson = self.create_lesson(-2)
+        late = User.objects.create_user(
+            email='late@example.com', username='late', password='x', role='student'
+        )
+        self.group.students.add(late)
+        self.assertFalse(Homework.objects.filter(lesson=lesson, student=late).exists())
+
+        lesson.status = 'completed'
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.save()
+
+        self.assertEqual(Homework.objects.filter(lesson=lesson).count(), 3)
+
+    def test_assign_returns_stored_rows_only(self):
+        lesson = self.create_lesson(1)
+        Homework.objects.filter(lesson=lesson, student=self.group.students.first()).delete()
+
+        with mock.patch('apps.accounts.dashboard.schedule_snapshot_refresh') as refresh:
+            created = Homework.assign_for_lessons(Lesson.objects.filter(id=lesson.id))
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(created[0], Homework.objects.get(lesson=lesson, student=self.group.students.first()))
+        refresh.assert_called_once_with({self.group.students.first().id}, ['homework'])
+        self.assertEqual(Homework.assign_for_lessons(Lesson.objects.filter(id=lesson.id)), [])
+
+    def test_backfill_covers_every_lesson_but_cancelled(self):
+        lessons = [self.create_lesson(days) for days in (-5, 3, 7)]
+        cancelled = self.create_lesson(10, status='cancelled')
+        Homework.objects.all().delete()
+
+        call_command('assign_homework', '--group', str(self.group.id), stdout=StringIO())
+
+        self.assertEqual(
+            set(Homework.objects.values_list('lesson_id', flat=True)), {lesson.id for lesson in lessons}
+        )
+        self.assertFalse(Homework.objects.filter(lesson=cancelled).exists())
+
+
+@override_settings(
+    TRANSCRIPTION_BACKEND='apps.homework.transcription.FakeTranscriptionBackend',
+    FAKE_TRANSCRIPTION_TEXT='Bugün hava çok güzel',
+    MEDIA_ROOT=tempfile.mkdtemp()
+)
+class ProcessHomeworkAudioTests(TestCase):
+    def setUp(self):
+        group = make_group(students=1)
+        lesson = Lesson.objects.create(
+            group=group, title='Lesson 1', scheduled_date=timezone.localdate(), start_time='10:00'
+        )
+        self.student = group.students.get()
+        self.lesson = lesson
+
+    def submit(self, description, attempt_number=1):
+        homework = Homework.objects.create(
+            lesson=self.lesson, student=self.student, description=description, attempt_number=attempt_number,
+            deadline=timezone.now() + timedelta(days=1)
+        )
+        homework.audio_submission.save('tone.wav', ContentFile(wav_bytes()))
+        homework.processing_status = 'queued'
+        homework.save()
+        process_homework_audio(homework.id)
+        homework.refresh_from_db()
+        return homework
+
+    def test_matching_reading_is_approved(self):
+        homework = self.submit('Bugün hava çok güzel')
+
+        self.assertEqual(homework.processing_status, 'done')
+        self.assertEqual(homework.status, 'approved')
+        self.assertEqual(homework.similarity_score, 1.0)
+
+    def test_homework_without_expected_text_stays_pending(self):
+        homework = self.submit('')
+
+        self.assertEqual(homework.processing_status, 'done')
+        self.assertEqual(homework.status, 'submitted')
+        self.assertIsNone(homework.similarity_score)
+        self.assertEqual(homework.coins_earned, 0)
+        self.assertEqual(homework.transcription, 'Bugün hava çok güzel')
+
+    def test_whitespace_description_is_left_alone_by_rescoring_too(self):
+        homework = self.submit(' \n\t ')
+        self.assertEqual(homework.status, 'submitted')
+        scored = self.submit('Bugün hava çok güzel', attempt_number=2)
+
+        stats = rescore_homeworks(threshold=0.5, homework_ids=[homework.id, scored.id], workers=1)
+
+        self.assertEqual(stats['scored'], 1)
+        homework.refresh_from_db()
+        self.assertIsNone(homework.similarity_score)
+        self.assertIsNone(homework.is_similarity_passed)
+
+
+READING = (
+    'Bugün sabah erkenden kalktım ve kahvaltımı yaptım sonra otobüse binip okula gittim '
+    'derste öğretmenimiz bize Türkiye nin güzel şehirlerini anlattı İstanbul Ankara İzmir '
+    've Antalya hakkında çok şey öğrendik öğle yemeğinde arkadaşlarımla birlikte çorba içtik '
+    'akşam eve dönünce ödevlerimi bitirdim annemle biraz televizyon izledim ve kitap okudum '
+    'yarın yine çok erken kalkacağım çünkü sabah dokuzda önemli bir Türkçe sınavım var'
+)
+
+
+def misread(text, positions, replacement='şey'):
+    words = text.split()
+    for position in positions:
+        words[position] = f'{replacement}{position}'
+    return ' '.join(words)
+
+
+class PlagiarismSignatureTests(SimpleTestCase):
+    def test_correct_readings_have_no_signature(self):
+        self.assertEqual(len(READING.split()), 60)
+        self.assertIsNone(minhash(READING, READING))
+
+    def test_independent_errors_are_not_similar(self):
+        # 2% word error rate each, at different words
+        first = minhash(misread(READING, [5, 40], 'x'), READING)
+        second = minhash(misread(READING, [12, 51], 'y'), READING)
+        self.assertLess(estimated_similarity(first, second), 0.2)
+
+    def test_shared_deviations_are_similar(self):
+        copied = misread(READING, [5, 20, 40])
+        self.assertGreaterEqual(
+            estimated_similarity(minhash(copied, READING), minhash(copied, READING)), 0.99
+        )
+
+    def test_without_expected_text_whole_transcript_is_compared(self):
+        self.assertIsNotNone(minhash(READING))
+
+
+class IndexLessonTests(TestCase):
+    def test_only_shared_deviations_are_flagged(self):
+        group = make_group(students=4)
+        lesson = Lesson.objects.create(
+            group=group, title='Lesson 1', description=READING,
+            scheduled_date=timezone.localdate(), start_time='10:00'
+        )
+        texts = [READING, READING, misread(READING, [5, 20, 40]), misread(READING, [5, 20, 40])]
+        homeworks = []
+        for student, text in zip(group.students.order_by('id'), texts):
+            homework = Homework.objects.create(
+                lesson=lesson, student=student, description=READING,
+                deadline=timezone.now() + timedelta(days=1)
+            )
+            HomeworkTranscript.objects.create(
+                homework=homework, raw_text=text, cleaned_text=text,
+                confidence_score=0.9, processing_time_seconds=1.0
+            )
+            homeworks.append(homework)
+
+        index_lesson(lesson.id)
+
+        self.assertEqual(
+            list(PlagiarismFlag.objects.values_list('homework_id', 'matched_homework_id')),
+            [(homeworks[2].id, homeworks[3].id)]
+        )
+
+
+class ReviewCoinTests(TestCase):
+    def setUp(self):
+        group = make_group(students=1)
+        lesson = Lesson.objects.create(
+            group=group, title='Lesson 1', scheduled_date=timezone.localdate(), start_time='10:00'
+        )
+        self.student = group.students.get()
+        self.homework = Homework.objects.create(
+            lesson=lesson, student=self.student, description='Bugün hava güzel',
+            deadline=timezone.now() + timedelta(days=1), status='submitted', coins_earned=10
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(group.teacher)
+
+    def review(self, status='approved'):
+        return self.client.post(
+            f'/api/v1/homework/{self.homework.id}/review/',
+            {'homework_id': self.homework.id, 'status': status}, format='json'
+        )
+
+    def bulk_review(self, status='approved'):
+        return self.client.post(
+            '/api/v1/homework/bulk-review/',
+            {'reviews': [{'homework_id': self.homework.id, 'status': status}]}, format='json'
+        )
+
+    def balance(self):
+        return StudentCoin.objects.get(student=self.student).total_coins
+
+    def test_repeated_single_reviews_pay_once(self):
+        self.assertEqual(self.review().status_code, 200)
+        self.assertEqual(self.review().status_code, 200)
+
+        self.assertEqual(self.balance(), 10)
+        self.assertEqual(CoinTransaction.objects.filter(related_homework=self.homework).count(), 1)
+
+    def test_bulk_approval_of_auto_approved_homework_pays(self):
+        # process_homework_audio approves without crediting coins
+        Homework.objects.filter(id=self.homework.id).update(status='approved')
+
+        response = self.bulk_review()
+
+        self.assertEqual(response.data['coins_awarded'], 10)
+        self.assertEqual(self.balance(), 10)
+
+    def test_single_then_bulk_approval_pays_once(self):
+        self.review()
+        self.assertEqual(self.bulk_review().data['coins_awarded'], 0)
+        self.assertEqual(self.balance(), 10)
+
+    def test_approving_after_rejection_pays_approval_coins(self):
+        Homework.objects.filter(id=self.homework.id).update(status='rejected', coins_earned=0)
+        self.homework.refresh_from_db()
+
+        self.bulk_review()
+
+        self.assertGreater(self.balance(), 0)
+        self.homework.refresh_from_db()
+        self.assertEqual(self.homework.coins_earned, self.balance())
+
+
+@override_settings(HOMEWORK_QUEUE_MAX_DEPTH=2, HOMEWORK_PROCESSING_TIMEOUT=600, MEDIA_ROOT=tempfile.mkdtemp())
+class ProcessingQueueTests(TestCase):
+    def setUp(self):
+        group = make_group(students=3)
+        self.lesson = Lesson.objects.create(
+            group=group, title='Lesson 1', scheduled_date=timezone.localdate(), start_time='10:00'
+        )
+        self.homeworks = [
+            Homework.objects.create(
+                lesson=self.lesson, student=student, description='Bugün hava güzel',
+                deadline=timezone.now() + timedelta(days=1)
+            )
+            for student in group.students.order_by('id')
+        ]
+
+    def set_processing(self, homework, processing_status, minutes_ago):
+        Homework.objects.filter(id=homework.id).update(
+            processing_status=processing_status,
+            processing_task_id=f'task-{homework.id}',
+            processing_queued_at=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+
+    def test_stale_rows_do_not_fill_the_queue(self):
+        self.set_processing(self.homeworks[0], 'queued', 60)
+        self.set_processing(self.homeworks[1], 'processing', 60)
+        self.assertFalse(Homework.processing_queue_full())
+
+        self.set_processing(self.homeworks[2], 'queued', 1)
+        self.set_processing(self.homeworks[1], 'processing', 1)
+        self.assertTrue(Homework.processing_queue_full())
+
+    @mock.patch('apps.homework.tasks.process_homework_audio.apply_async')
+    def test_recover_requeues_lost_and_fails_dead(self, apply_async):
+        self.set_processing(self.homeworks[0], 'queued', 60)
+        self.set_processing(self.homeworks[1], 'processing', 60)
+        self.set_processing(self.homeworks[2], 'queued', 1)
+
+        self.assertEqual(Homework.recover_stale_processing(), {'requeued': 1, 'failed': 1})
+        apply_async.assert_called_once_with(
+            args=[self.homeworks[0].id], task_id=f'task-{self.homeworks[0].id}'
+        )
+        self.assertEqual(
+            dict(Homework.objects.values_list('id', 'processing_status')),
+            {self.homeworks[0].id: 'queued', self.homeworks[1].id: 'failed', self.homeworks[2].id: 'queued'}
+        )
+        # The requeued row is fresh again, so a second run leaves it alone
+        self.assertEqual(Homework.recover_stale_processing(), {'requeued': 0, 'failed': 0})
+
+    @mock.patch('apps.homework.tasks.process_homework_audio.apply_async')
+    def test_submit_with_processing_disabled_queues_nothing(self, apply_async):
+        SystemSettings.objects.update_or_create(pk=1, defaults={'audio_processing_enabled': False})
+        homework = self.homeworks[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            homework.submit_audio(ContentFile(wav_bytes(), name='tone.wav'), 'abc')
+
+        homework.refresh_from_db()
+        self.assertEqual(homework.status, 'submitted')
+        self.assertEqual(homework.processing_status, 'none')
+        apply_async.assert_not_called()
+
+    @override_settings(HOMEWORK_QUEUE_MAX_DEPTH=0)
+    def test_submit_to_full_queue_is_refused(self):
+        homework = self.homeworks[0]
+
+        with self.assertRaises(ProcessingQueueFull):
+            homework.submit_audio(ContentFile(wav_bytes(), name='tone.wav'), 'abc')
+
+        homework.refresh_from_db()
+        self.assertEqual(homework.status, 'assigned')
+
+    @mock.patch('apps.homework.tasks.process_homework_audio.apply_async')
+    def test_submit_queues_processing(self, apply_async):
+        homework = self.homeworks[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            homework.submit_audio(ContentFile(wav_bytes(), name='tone.wav'), 'abc')
+
+        self.assertEqual(homework.processing_status, 'queued')
+        apply_async.assert_called_once_with(args=[homework.id], task_id=homework.processing_task_id)
+
+
+class ReviewQueueTests(TestCase):
+    def setUp(self):
+        self.groups = [make_group(students=2, name=name) for name in ('A1', 'B1')]
+        self.homeworks = []
+        for group in self.groups:
+            lesson = Lesson.objects.create(
+                group=group, title='Lesson 1', scheduled_date=timezone.localdate(), start_time='10:00'
+            )
+            for offset, student in enumerate(group.students.order_by('id')):
+                self.homeworks.append(Homework.objects.create(
+                    lesson=lesson, student=student, description='Bugün hava güzel', status='submitted',
+                    deadline=timezone.now() + timedelta(days=1 + offset), submission_date=timezone.now()
+                ))
+
+    def test_homework_copies_group_teacher(self):
+        self.assertEqual(
+            [homework.teacher_id for homework in self.homeworks],
+            [self.groups[0].teacher_id] * 2 + [self.groups[1].teacher_id] * 2
+        )
+
+    def test_teacher_claims_own_rows_without_joining_lessons(self):
+        with CaptureQueriesContext(connection) as queries:
+            claimed = Homework.claim_for_review(self.groups[1].teacher, count=5)
+
+        self.assertEqual(claimed, [self.homeworks[2].id, self.homeworks[3].id])
+        self.assertFalse(any('"lessons"' in query['sql'] for query in queries.captured_queries))
+
+    def test_teacher_change_moves_queue(self):
+        group = self.groups[0]
+        group.teacher = self.groups[1].teacher
+        group.save()
+
+        self.assertEqual(len(Homework.claim_for_review(self.groups[1].teacher, count=5)), 4)
+
+    def test_lesson_moved_to_another_group(self):
+        lesson = self.homeworks[0].lesson
+        lesson.group = self.groups[1]
+        lesson.save()
+
+        self.assertEqual(
+            set(Homework.objects.filter(lesson=lesson).values_list('teacher_id', flat=True)),
+            {self.groups[1].teacher_id}
+        )
@@ -0,0 +1,243 @@
+"""
+Speech-to-text backends for homework audio.
+
+The active backend is settings.TRANSCRIPTION_BACKEND (a dotted path). Every
+remote call goes through TranscriptionLimiter, a cache-backed semaphore plus
+per-minute counter shared by all workers (with a shared cache such as Redis).
+Long recordings are transcribed as segments in a thread pool, each segment
+retried on its own, and stitched back in order.
+"""
+import hashlib
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+class TranscriptionError(Exception):
+    """Transcription failed; retryable errors are worth scheduling again"""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TranscriptionBackend:
+    """Base class: transcribe(audio_path, language) -> {'text', 'confidence'}"""
+
+    name = ''
+
+    def __init__(self):
+        self.model = settings.TRANSCRIPTION_MODEL
+
+    def transcribe(self, audio_path, language):
+        raise NotImplementedError
+
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    """OpenAI Whisper API"""
+
+    name = 'openai'
+
+    def __init__(self):
+        from openai import OpenAI
+
+        super().__init__()
+        # Retries are scheduled by the Celery task, not inside the worker
+        self.client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.TRANSCRIPTION_TIMEOUT,
+            max_retries=0
+        )
+
+    def transcribe(self, audio_path, language):
+        import openai
+
+        try:
+            with open(audio_path, 'rb') as audio_file:
+                response = self.client.audio.transcriptions.create(
+                    model=self.model,
+                    file=audio_file,
+                    language=language,
+                    response_format='verbose_json'
+                )
+        except (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError) as e:
+            # APITimeoutError is an APIConnectionError
+            raise TranscriptionError(str(e), retryable=True) from e
+        except openai.OpenAIError as e:
+            raise TranscriptionError(str(e)) from e
+
+        return {
+            'text': response.text,
+            'confidence': _segments_confidence(getattr(response, 'segments', None) or []),
+        }
+
+
+class FakeTranscriptionBackend(TranscriptionBackend):
+    """
+    Deterministic offline backend for tests and load runs: the same file
+    always yields the same text, after FAKE_TRANSCRIPTION_LATENCY seconds.
+    """
+
+    name = 'fake'
+
+    def __init__(self):
+        super().__init__()
+        self.model = 'fake'
+
+    def transcribe(self, audio_path, language):
+        from apps.homework.audio import HASH_CHUNK_SIZE
+
+        digest = hashlib.sha256()
+        with open(audio_path, 'rb') as audio_file:
+            for chunk in iter(lambda: audio_file.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+
+        if settings.FAKE_TRANSCRIPTION_LATENCY:
+            time.sleep(settings.FAKE_TRANSCRIPTION_LATENCY)
+
+        return {
+            'text': settings.FAKE_TRANSCRIPTION_TEXT or f'fake transcript {digest.hexdigest()[:12]}',
+            'confidence': 1.0,
+        }
+
+
+def _segments_confidence(segments):
+    """Duration-weighted mean of exp(avg_logprob) over Whisper segments"""
+    total = 0.0
+    weighted = 0.0
+    for segment in segments:
+        duration = max(segment['end'] - segment['start'], 0.0)
+        total += duration
+        weighted += duration * math.exp(segment['avg_logprob'])
+    return min(weighted / total, 1.0) if total else 0.0
+
+
+@lru_cache(maxsize=None)
+def get_backend(path=None):
+    return import_string(path or settings.TRANSCRIPTION_BACKEND)()
+
+
+class TranscriptionLimiter:
+    """
+    Global concurrency and rate limit for remote transcription calls.
+
+    Slots are cache keys taken with cache.add (atomic on Redis/Memcached)
+    and expire after the lease, so a crashed worker cannot hold one forever.
+    """
+
+    SLOT_KEY = 'transcription_slot:{index}'
+    WINDOW_KEY = 'transcription_window:{minute}'
+
+    def __init__(self, max_concurrency=None, rate_per_minute=None, lease_seconds=None):
+        self.max_concurrency = max_concurrency or settings.TRANSCRIPTION_MAX_CONCURRENCY
+        self.rate_per_minute = rate_per_minute or settings.TRANSCRIPTION_RATE_PER_MINUTE
+        self.lease_seconds = lease_seconds or settings.TRANSCRIPTION_TIMEOUT + 30
+        self.slot_key = None
+        self.token = uuid.uuid4().hex
+
+    def acquire(self):
+        """Take a slot and count the call against this minute; False when saturated"""
+        for index in range(self.max_concurrency):
+            key = self.SLOT_KEY.format(index=index)
+            if cache.add(key, self.token, self.lease_seconds):
+                self.slot_key = key
+                break
+        else:
+            return False
+
+        window_key = self.WINDOW_KEY.format(minute=int(time.time() // 60))
+        cache.add(window_key, 0, 120)
+        try:
+            calls = cache.incr(window_key)
+        except ValueError:
+            # Window expired between add and incr
+            calls = 1
+        if calls > self.rate_per_minute:
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        if self.slot_key and cache.get(self.slot_key) == self.token:
+            cache.delete(self.slot_key)
+        self.slot_key = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TranscriptionError('Transcription capacity exhausted', retryable=True)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def transcribe(audio_path, language, backend=None):
+    """Run the backend under the global limiter; returns the result with latency_seconds"""
+    backend = backend or get_backend()
+    with TranscriptionLimiter():
+        started = time.monotonic()
+        result = backend.transcribe(audio_path, language)
+    result['latency_seconds'] = time.monotonic() - started
+    result['backend'] = backend.name
+    result['model'] = backend.model
+    return result
+
+
+def _transcribe_segment(segment, language, backend, retries):
+    """Transcribe one segment, retrying only this segment on retryable errors"""
+    for attempt in range(retries + 1):
+        try:
+            result = transcribe(segment['path'], language, backend=backend)
+            break
+        except TranscriptionError as e:
+            if not e.retryable or attempt == retries:
+                raise
+            time.sleep(min(2 ** attempt, 30))
+
+    return {
+        'start': round(segment['start'], 3),
+        'end': round(segment['end'], 3),
+        'text': result['text'].strip(),
+        'confidence': result['confidence'],
+        'latency_seconds': round(result['latency_seconds'], 3),
+        'attempts': attempt + 1,
+    }
+
+
+def transcribe_segments(segments, language, backend=None, workers=None, retries=None):
+    """
+    Transcribe ordered segments in parallel and stitch them. Confidence is
+    the duration-weighted mean of the segment confidences; latency is wall
+    time for the whole recording.
+    """
+    backend = backend or get_backend()
+    workers = workers or settings.TRANSCRIPTION_SEGMENT_WORKERS
+    retries = settings.TRANSCRIPTION_SEGMENT_RETRIES if retries is None else retries
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(segments)), 1)) as executor:
+        results = list(executor.map(
+            lambda segment: _transcribe_segment(segment, language, backend, retries),
+            segments
+        ))
+
+    total = sum(result['end'] - result['start'] for result in results)
+    if total > 0:
+        confidence = sum(result['confidence'] * (result['end'] - result['start']) for result in results) / total
+    else:
+        confidence = sum(result['confidence'] for result in results) / len(results) if results else 0.0
+
+    return {
+        'text': ' '.join(result['text'] for result in results if result['text']),
+        'confidence': confidence,
+        'latency_seconds': time.monotonic() - started,
+        'backend': backend.name,
+        'model': backend.model,
+        'segments': results,
+    }
@@ -5,7 +5,16 @@ urlpatterns = [
     path('', views.HomeworkListView.as_view(), name='homework-list'),
     path('<int:pk>/', views.HomeworkDetailView.as_view(), name='homework-detail'),
     path('<int:pk>/submit/', views.SubmitHomeworkView.as_view(), name='submit-homework'),
+    path('<int:pk>/processing/', views.HomeworkProcessingStatusView.as_view(), name='homework-processing-status'),
     path('<int:pk>/review/', views.ReviewHomeworkView.as_view(), name='review-homework'),
+    path('<int:pk>/release/', views.ReleaseHomeworkClaimView.as_view(), name='release-homework'),
+    path('bulk-review/', views.BulkReviewHomeworkView.as_view(), name='bulk-review-homework'),
+    path('review-queue/claim/', views.ReviewQueueClaimView.as_view(), name='review-queue-claim'),
     path('lesson/<int:lesson_id>/', views.LessonHomeworkView.as_view(), name='lesson-homework'),
+    path('lesson/<int:lesson_id>/plagiarism/', views.LessonPlagiarismView.as_view(), name='lesson-plagiarism'),
+    path('plagiarism/<int:pk>/dismiss/', views.DismissPlagiarismFlagView.as_view(), name='dismiss-plagiarism-flag'),
     path('student/<int:student_id>/', views.StudentHomeworkView.as_view(), name='student-homework'),
+    path('transcription/stats/', views.TranscriptionStatsView.as_view(), name='transcription-stats'),
+    path('audio-storage/stats/', views.AudioStorageStatsView.as_view(), name='audio-storage-stats'),
+    path('transcription-cache/stats/', views.TranscriptionCacheStatsView.as_view(), name='transcription-cache-stats'),
 ]
@@ -1,17 +1,20 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
-from apps.homework.models import Homework, HomeworkTranscript
+from apps.homework.audio import sha256_of
+from apps.homework.models import Homework, HomeworkTranscript, TranscriptionCache, PlagiarismFlag, ProcessingQueueFull
 from apps.homework.serializers import (
     HomeworkSerializer, HomeworkSubmitSerializer, HomeworkReviewSerializer,
-    HomeworkListSerializer
+    BulkHomeworkReviewSerializer, HomeworkListSerializer, PlagiarismFlagSerializer
 )
 from apps.lessons.models import Lesson
 from apps.accounts.models import User
-from apps.accounts.permissions import IsTeacher, IsStudent, IsAdmin
+from apps.accounts.permissions import IsTeacher, IsStudent, IsAdmin, IsTeacherOfGroup
 from core.filters import HomeworkFilter
 
 class HomeworkListView(generics.ListCreateAPIView):
@@ -47,8 +50,31 @@ class HomeworkDetailView(generics.RetrieveUpdateDestroyAPIView):
         else:
             return Homework.objects.filter(student=user)
 
+def processing_queue_full_response():
+    """503 with Retry-After, sent while the processing backlog is over its limit"""
+    return Response(
+        {
+            'error': 'Too many submissions are being processed, please retry shortly',
+            'retry_after': settings.HOMEWORK_QUEUE_RETRY_AFTER
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(settings.HOMEWORK_QUEUE_RETRY_AFTER)}
+    )
+
+def processing_ticket(homework):
+    """Body of the 202 response: where and how to poll for the result"""
+    from django.urls import reverse
+    
+    return {
+        'homework_id': homework.id,
+        'ticket': homework.processing_task_id,
+        'status': homework.status,
+        'processing_status': homework.processing_status,
+        'status_url': reverse('homework-processing-status', args=[homework.id])
+    }
+
 class SubmitHomeworkView(generics.GenericAPIView):
-    """Submit homework audio (Students only)"""
+    """Submit homework audio (Students only); transcription runs in the background"""
     serializer_class = HomeworkSubmitSerializer
     permission_classes = [IsAuthenticated, IsStudent]
     
@@ -61,23 +87,44 @@ class SubmitHomeworkView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if timezone.now() > homework.deadline and not homework.is_late:
-            homework.is_late = True
+        # Reject before touching the upload so a burst cannot pile up work
+        if Homework.admission_closed():
+            return processing_queue_full_response()
         
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        homework.audio_submission = request.files['audio_submission']
-        homework.submission_date = timezone.now()
-        homework.status = 'submitted'
-        homework.save()
+        audio_file = request.FILES['audio_submission']
+        try:
+            homework.submit_audio(audio_file, sha256_of(audio_file))
+        except ProcessingQueueFull:
+            return processing_queue_full_response()
+        
+        return Response(processing_ticket(homework), status=status.HTTP_202_ACCEPTED)
+
+class HomeworkProcessingStatusView(generics.GenericAPIView):
+    """Poll the processing state of a submission"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, pk):
+        homeworks = Homework.objects.filter(id=pk)
+        user = request.user
+        if user.is_teacher:
+            homeworks = homeworks.filter(lesson__group__teacher=user)
+        elif not user.is_admin:
+            homeworks = homeworks.filter(student=user)
         
-        # TODO: Trigger AI processing task
+        # Polled often: read only the columns in the response
+        homework = homeworks.values(
+            'id', 'status', 'processing_status', 'processing_task_id',
+            'processing_queued_at', 'processing_error', 'similarity_score',
+            'is_similarity_passed'
+        ).first()
+        if homework is None:
+            return Response({'error': 'Homework not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        return Response(
-            HomeworkSerializer(homework).data,
-            status=status.HTTP_200_OK
-        )
+        homework['ticket'] = homework.pop('processing_task_id')
+        return Response(homework)
 
 class ReviewHomeworkView(generics.GenericAPIView):
     """Review homework submission (Teachers only)"""
@@ -85,14 +132,7 @@ class ReviewHomeworkView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated, IsTeacher]
     
     def post(self, request, pk):
-        homework = get_object_or_404(Homework, id=pk)
-        
-        # Check if teacher is assigned to this group
-        if homework.lesson.group.teacher != request.user and not request.user.is_admin:
-            return Response(
-                {'error': 'You do not have permission'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        from django.db import transaction
         
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -100,20 +140,300 @@ class ReviewHomeworkView(generics.GenericAPIView):
         new_status = serializer.validated_data['status']
         feedback = serializer.validated_data.get('feedback', '')
         
-        homework.status = new_status
-        homework.teacher_feedback = feedback
-        homework.reviewed_by = request.user
-        homework.reviewed_date = timezone.now()
+        with transaction.atomic():
+            # Lock the row so two reviewers cannot both apply a verdict
+            homework = get_object_or_404(Homework.objects.select_for_update(), id=pk)
+            
+            # Check if teacher is assigned to this group
+            if homework.lesson.group.teacher != request.user and not request.user.is_admin:
+                return Response(
+                    {'error': 'You do not have permission'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            
+            if homework.is_claimed_by_other(request.user):
+                return Response(
+                    {
+                        'error': 'Homework is being reviewed by another teacher',
+                        'claimed_by': homework.review_claimed_by.get_full_name(),
+                        'lease_expires_at': homework.review_lease_expires_at
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            homework.status = new_status
+            homework.teacher_feedback = feedback
+            homework.reviewed_by = request.user
+            homework.reviewed_date = timezone.now()
+            homework.review_claimed_by = None
+            homework.review_lease_expires_at = None
+            
+            # Award coins if approved, once per homework
+            if new_status == 'approved' and homework.id not in Homework.paid_homework_ids([homework.id]):
+                from apps.gamification.models import StudentCoin
+                from apps.settings.models import SystemSettings
+                if not homework.coins_earned:
+                    homework.coins_earned = SystemSettings.load().homework_approved_coins
+                if homework.coins_earned:
+                    coin_balance, _ = StudentCoin.objects.get_or_create(student=homework.student)
+                    coin_balance.add_coins(
+                        homework.coins_earned,
+                        f'Homework approved: {homework.lesson.title}',
+                        related_homework=homework,
+                        related_lesson=homework.lesson
+                    )
+            
+            homework.save()
+        
+        return Response(HomeworkSerializer(homework).data)
+
+class BulkReviewHomeworkView(generics.GenericAPIView):
+    """Review many submissions at once (Teachers only)"""
+    serializer_class = BulkHomeworkReviewSerializer
+    permission_classes = [IsAuthenticated, IsTeacher]
+    
+    def post(self, request):
+        from django.db import transaction
+        from apps.accounts.dashboard import schedule_snapshot_refresh
+        from apps.gamification.leaderboard import (
+            mark_groups_dirty, mark_student_groups_dirty,
+            invalidate_leaderboard_cache, invalidate_student_leaderboard_cache
+        )
+        from apps.gamification.models import StudentCoin, CoinTransaction
+        from apps.settings.models import SystemSettings
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # Award coins if approved
-        if new_status == 'approved':
-            from apps.gamification.models import StudentCoin
-            coin_balance, _ = StudentCoin.objects.get_or_create(student=homework.student)
-            coin_balance.add_coins(homework.coins_earned, f'Homework approved: {homework.lesson.title}')
+        # A repeated homework keeps the last submitted entry
+        reviews = {review['homework_id']: review for review in serializer.validated_data['reviews']}
+        errors = []
+        now = timezone.now()
         
-        homework.save()
+        with transaction.atomic():
+            # Ownership check and row locks in one query
+            homeworks = Homework.objects.select_for_update(of=('self',)).select_related('lesson').filter(
+                id__in=reviews
+            )
+            if not request.user.is_admin:
+                homeworks = homeworks.filter(lesson__group__teacher=request.user)
+            homeworks = {homework.id: homework for homework in homeworks}
+            paid_ids = Homework.paid_homework_ids(homeworks)
+            approved_coins = SystemSettings.load().homework_approved_coins
+            
+            reviewed = []
+            coin_awards = {}
+            for homework_id, review in reviews.items():
+                homework = homeworks.get(homework_id)
+                if homework is None:
+                    errors.append(f'Homework {homework_id} not found')
+                    continue
+                if homework.is_claimed_by_other(request.user):
+                    errors.append(f'Homework {homework_id} is being reviewed by another teacher')
+                    continue
+                
+                # Approving twice, or approving what was auto-approved, must not pay twice
+                if review['status'] == 'approved' and homework.id not in paid_ids:
+                    if not homework.coins_earned:
+                        homework.coins_earned = approved_coins
+                    if homework.coins_earned:
+                        coin_awards[homework.id] = homework
+                
+                homework.status = review['status']
+                homework.teacher_feedback = review.get('feedback', '')
+                homework.reviewed_by = request.user
+                homework.reviewed_date = now
+                homework.review_claimed_by = None
+                homework.review_lease_expires_at = None
+                homework.updated_at = now
+                reviewed.append(homework)
+            
+            Homework.objects.bulk_update(reviewed, [
+                'status', 'teacher_feedback', 'reviewed_by', 'reviewed_date',
+                'review_claimed_by', 'review_lease_expires_at', 'coins_earned', 'updated_at'
+            ])
+            
+            # Award coins: one increment per distinct per-student total
+            student_totals = {}
+            for homework in coin_awards.values():
+                student_totals[homework.student_id] = student_totals.get(homework.student_id, 0) + homework.coins_earned
+            StudentCoin.objects.bulk_create(
+                [StudentCoin(student_id=student_id) for student_id in student_totals],
+                ignore_conflicts=True
+            )
+            students_by_amount = {}
+            for student_id, amount in student_totals.items():
+                students_by_amount.setdefault(amount, []).append(student_id)
+            for amount, student_ids in students_by_amount.items():
+                StudentCoin.objects.filter(student_id__in=student_ids).update(
+                    total_coins=F('total_coins') + amount,
+                    coins_earned=F('coins_earned') + amount,
+                    updated_at=now
+                )
+            CoinTransaction.objects.bulk_create([
+                CoinTransaction(
+                    student_id=homework.student_id,
+                    transaction_type='earned',
+                    amount=homework.coins_earned,
+                    reason=f'Homework approved: {homework.lesson.title}',
+                    related_homework=homework,
+                    related_lesson=homework.lesson
+                )
+                for homework in coin_awards.values()
+            ])
+            
+            # bulk_update skips post_save, so refresh derived data explicitly
+            if reviewed:
+                group_ids = {homework.lesson.group_id for homework in reviewed}
+                schedule_snapshot_refresh(
+                    {homework.student_id for homework in reviewed},
+                    ['homework', 'coins'] if student_totals else ['homework']
+                )
+                mark_groups_dirty(group_ids)
+                invalidate_leaderboard_cache(group_ids)
+            if student_totals:
+                mark_student_groups_dirty(student_totals)
+                invalidate_student_leaderboard_cache(student_totals)
         
-        return Response(HomeworkSerializer(homework).data)
+        return Response({
+            'reviewed_count': len(reviewed),
+            'coins_awarded': sum(student_totals.values()),
+            'errors': errors
+        })
+
+class ReviewQueueClaimView(generics.GenericAPIView):
+    """Claim the next submissions to review under a short lease (Teachers and admins)"""
+    permission_classes = [IsAuthenticated, IsTeacherOfGroup]
+    
+    def post(self, request):
+        try:
+            count = int(request.data.get('count', 1))
+        except (TypeError, ValueError):
+            count = 0
+        if not 1 <= count <= settings.REVIEW_QUEUE_MAX_CLAIM:
+            return Response(
+                {'error': f'count must be between 1 and {settings.REVIEW_QUEUE_MAX_CLAIM}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        claimed_ids = Homework.claim_for_review(request.user, count)
+        homeworks = Homework.objects.filter(id__in=claimed_ids).select_related(
+            'student', 'lesson'
+        ).order_by('deadline', 'submission_date')
+        
+        return Response({
+            'count': len(claimed_ids),
+            'lease_minutes': settings.REVIEW_LEASE_MINUTES,
+            'results': HomeworkListSerializer(homeworks, many=True).data
+        })
+
+class ReleaseHomeworkClaimView(generics.GenericAPIView):
+    """Give a claimed homework back to the review queue"""
+    permission_classes = [IsAuthenticated, IsTeacherOfGroup]
+    
+    def post(self, request, pk):
+        claims = Homework.objects.filter(id=pk, status='under_review')
+        if not request.user.is_admin:
+            claims = claims.filter(review_claimed_by=request.user)
+        
+        released = claims.update(
+            status='submitted',
+            review_claimed_by=None,
+            review_lease_expires_at=None,
+            updated_at=timezone.now()
+        )
+        if not released:
+            return Response(
+                {'error': 'Homework is not claimed by you'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response({'message': 'Homework returned to the review queue'})
+
+class TranscriptionCacheStatsView(generics.GenericAPIView):
+    """Transcription cache hit/miss counters (Admins only)"""
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        from django.db.models import Count, Sum
+        
+        stats = TranscriptionCache.objects.aggregate(entries=Count('id'), hits=Sum('hit_count'))
+        hits = stats['hits'] or 0
+        # Every entry was created by exactly one miss that reached Whisper
+        misses = stats['entries']
+        
+        return Response({
+            'entries': stats['entries'],
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0
+        })
+
+class TranscriptionStatsView(generics.GenericAPIView):
+    """Per-backend transcription throughput and latency over the last ?hours=24 (Admins only)"""
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        from datetime import timedelta
+        from django.db.models import Avg, Count, Max, Sum
+        
+        try:
+            hours = max(int(request.query_params.get('hours', 24)), 1)
+        except ValueError:
+            hours = 24
+        
+        rows = HomeworkTranscript.objects.filter(
+            created_at__gte=timezone.now() - timedelta(hours=hours)
+        ).values('transcription_backend').annotate(
+            transcriptions=Count('id'),
+            avg_latency=Avg('transcription_latency_seconds'),
+            max_latency=Max('transcription_latency_seconds'),
+            trimmed=Sum('trimmed_seconds')
+        ).order_by('transcription_backend')
+        
+        return Response({
+            'hours': hours,
+            'backends': [
+                {
+                    'backend': row['transcription_backend'] or 'unknown',
+                    'transcriptions': row['transcriptions'],
+                    'per_hour': round(row['transcriptions'] / hours, 2),
+                    'avg_latency_seconds': round(row['avg_latency'], 3) if row['avg_latency'] is not None else None,
+                    'max_latency_seconds': round(row['max_latency'], 3) if row['max_latency'] is not None else None,
+                    'trimmed_seconds': round(row['trimmed'] or 0.0, 1),
+                    'estimated_cost_saved': round((row['trimmed'] or 0.0) / 60 * settings.TRANSCRIPTION_COST_PER_MINUTE, 4)
+                }
+                for row in rows
+            ]
+        })
+
+class AudioStorageStatsView(generics.GenericAPIView):
+    """Disk saved by storing submissions as Opus (Admins only)"""
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        from django.db.models import Count, Sum
+        
+        stats = Homework.objects.filter(stored_audio_bytes__isnull=False).aggregate(
+            files=Count('id'),
+            original_bytes=Sum('original_audio_bytes'),
+            stored_bytes=Sum('stored_audio_bytes')
+        )
+        original_bytes = stats['original_bytes'] or 0
+        stored_bytes = stats['stored_bytes'] or 0
+        pending = Homework.objects.filter(
+            processing_status='done',
+            stored_audio_bytes__isnull=True
+        ).exclude(audio_submission='').count()
+        
+        return Response({
+            'transcoded_files': stats['files'],
+            'pending_files': pending,
+            'original_bytes': original_bytes,
+            'stored_bytes': stored_bytes,
+            'bytes_saved': original_bytes - stored_bytes,
+            'compression_ratio': round(stored_bytes / original_bytes, 4) if original_bytes else None
+        })
 
 class LessonHomeworkView(generics.ListAPIView):
     """List homeworks for a lesson"""
@@ -132,6 +452,39 @@ class LessonHomeworkView(generics.ListAPIView):
         
         return Homework.objects.none()
 
+class LessonPlagiarismView(generics.ListAPIView):
+    """Near-duplicate transcript pairs in a lesson (Teacher of the group or admin)"""
+    serializer_class = PlagiarismFlagSerializer
+    permission_classes = [IsAuthenticated, IsTeacherOfGroup]
+    
+    def get_queryset(self):
+        lesson = get_object_or_404(Lesson.objects.select_related('group'), id=self.kwargs['lesson_id'])
+        
+        user = self.request.user
+        if not (user.is_admin or lesson.group.teacher_id == user.id):
+            return PlagiarismFlag.objects.none()
+        
+        flags = PlagiarismFlag.objects.filter(lesson=lesson).select_related(
+            'homework__student', 'matched_homework__student'
+        )
+        if self.request.query_params.get('include_dismissed') != 'true':
+            flags = flags.filter(is_dismissed=False)
+        return flags
+
+class DismissPlagiarismFlagView(generics.GenericAPIView):
+    """Mark a flagged pair as reviewed and not copied"""
+    permission_classes = [IsAuthenticated, IsTeacherOfGroup]
+    
+    def post(self, request, pk):
+        flags = PlagiarismFlag.objects.filter(id=pk)
+        if not request.user.is_admin:
+            flags = flags.filter(lesson__group__teacher=request.user)
+        
+        if not flags.update(is_dismissed=True):
+            return Response({'error': 'Flag not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'message': 'Flag dismissed'})
+
 class StudentHomeworkView(generics.ListAPIView):
     """List homeworks for a student"""
     serializer_class = HomeworkListSerializer
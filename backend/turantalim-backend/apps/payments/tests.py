@@ -0,0 +1,60 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.courses.models import Course, Group
+from apps.homework.tasks import mark_payments_overdue
+from apps.payments.models import Payment, PaymentHistory
+from apps.settings.models import SystemSettings
+
+
+class MarkPaymentsOverdueTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.group = Group.objects.create(
+            name='A1', course=Course.objects.create(name='Turkish A1'),
+            start_date=today, end_date=today + timedelta(days=90)
+        )
+        self.cutoff = today - timedelta(days=SystemSettings.load().overdue_payment_day)
+
+    def make_payments(self, count, due_date, status='pending'):
+        students = [
+            User.objects.create_user(
+                email=f'student-{status}-{due_date}-{i}@example.com', username=f'student-{status}-{due_date}-{i}',
+                password='x', role='student'
+            )
+            for i in range(count)
+        ]
+        return Payment.objects.bulk_create([
+            Payment(student=student, group=self.group, amount=Decimal('500000'), due_date=due_date, status=status)
+            for student in students
+        ])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.make_payments(1, self.cutoff - timedelta(days=1))
+        with self.assertNumQueries(5):
+            self.assertEqual(mark_payments_overdue()['payments_marked_overdue'], 1)
+
+        self.make_payments(60, self.cutoff - timedelta(days=3))
+        with self.assertNumQueries(5):
+            self.assertEqual(mark_payments_overdue()['payments_marked_overdue'], 60)
+
+    def test_only_pending_payments_past_cutoff_change(self):
+        overdue = self.make_payments(2, self.cutoff - timedelta(days=1))
+        self.make_payments(1, self.cutoff)
+        self.make_payments(1, self.cutoff - timedelta(days=1), status='paid')
+
+        result = mark_payments_overdue()
+
+        self.assertEqual(result['payments_marked_overdue'], 2)
+        self.assertEqual(
+            set(Payment.objects.filter(status='overdue').values_list('id', flat=True)),
+            {payment.id for payment in overdue}
+        )
+        self.assertEqual(
+            set(PaymentHistory.objects.values_list('payment_id', 'old_status', 'new_status')),
+            {(payment.id, 'pending', 'overdue') for payment in overdue}
+        )
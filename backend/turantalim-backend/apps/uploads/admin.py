@@ -0,0 +1,12 @@
+from django.contrib import admin
+from apps.uploads.models import UploadSession
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'user', 'purpose', 'status', 'received_bytes', 'total_size', 'expires_at', 'created_at']
+    list_filter = ['purpose', 'status', 'created_at']
+    search_fields = ['filename', 'user__username', 'sha256']
+    readonly_fields = ['id', 'received_bytes', 'sha256', 'created_at', 'updated_at']
+    raw_id_fields = ['user', 'homework', 'lesson', 'resource']
+    ordering = ['-created_at']
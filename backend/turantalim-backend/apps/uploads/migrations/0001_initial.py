@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:10
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('homework', '0006_homeworktranscript_segments'),
+        ('lessons', '0001_initial'),
+        ('resources', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('purpose', models.CharField(choices=[('homework_audio', 'Homework Audio'), ('lesson_resource', 'Lesson Resource')], max_length=20)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('completed', 'Completed')], default='uploading', max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(max_length=100)),
+                ('total_size', models.BigIntegerField(help_text='Expected file size in bytes')),
+                ('sha256', models.CharField(help_text='Expected SHA-256 of the whole file', max_length=64)),
+                ('received_bytes', models.BigIntegerField(default=0, help_text='Bytes written so far; the next chunk must start here')),
+                ('resource_data', models.JSONField(blank=True, default=dict, help_text='LessonResource fields (title, resource_type, ...) applied on finalize')),
+                ('expires_at', models.DateTimeField(help_text='Abandoned sessions are removed after this time')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('homework', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='homework.homework')),
+                ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='lessons.lesson')),
+                ('resource', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='resources.lessonresource')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload Session',
+                'verbose_name_plural': 'Upload Sessions',
+                'db_table': 'upload_sessions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='upload_sess_status_bb43bc_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,241 @@
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.accounts.models import User
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Rejected chunk or finalize request; status is the HTTP status to answer with"""
+    
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadSession(models.Model):
+    """Resumable upload: chunks are appended to a part file until finalized"""
+    
+    PURPOSE_CHOICES = (
+        ('homework_audio', _('Homework Audio')),
+        ('lesson_resource', _('Lesson Resource')),
+    )
+    
+    STATUS_CHOICES = (
+        ('uploading', _('Uploading')),
+        ('completed', _('Completed')),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='uploading'
+    )
+    
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    
+    total_size = models.BigIntegerField(
+        help_text=_("Expected file size in bytes")
+    )
+    
+    sha256 = models.CharField(
+        max_length=64,
+        help_text=_("Expected SHA-256 of the whole file")
+    )
+    
+    received_bytes = models.BigIntegerField(
+        default=0,
+        help_text=_("Bytes written so far; the next chunk must start here")
+    )
+    
+    # Targets
+    homework = models.ForeignKey(
+        'homework.Homework',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='upload_sessions'
+    )
+    
+    lesson = models.ForeignKey(
+        'lessons.Lesson',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='upload_sessions'
+    )
+    
+    resource_data = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=_("LessonResource fields (title, resource_type, ...) applied on finalize")
+    )
+    
+    resource = models.ForeignKey(
+        'resources.LessonResource',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    
+    expires_at = models.DateTimeField(
+        help_text=_("Abandoned sessions are removed after this time")
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        ordering = ['-created_at']
+        verbose_name = _('Upload Session')
+        verbose_name_plural = _('Upload Sessions')
+        indexes = [models.Index(fields=['status', 'expires_at'])]
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size})"
+    
+    def save(self, *args, **kwargs):
+        if not self.expires_at:
+            self.expires_at = self.next_expiry()
+        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def next_expiry():
+        return timezone.now() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    
+    @property
+    def part_path(self):
+        return os.path.join(settings.UPLOAD_TEMP_DIR, f'{self.id}.part')
+    
+    @property
+    def is_complete(self):
+        return self.received_bytes >= self.total_size
+    
+    def write_chunk(self, stream, offset, length, chunk_sha256=''):
+        """
+        Stream length bytes at offset into the part file. The offset must be
+        the number of bytes already received; a checksum mismatch or short
+        body leaves the session where it was.
+        """
+        if length <= 0 or length > settings.UPLOAD_MAX_CHUNK_SIZE:
+            raise UploadError(f'Chunk size must be between 1 and {settings.UPLOAD_MAX_CHUNK_SIZE} bytes')
+        
+        with transaction.atomic():
+            # Claim the offset before touching the part file: a concurrent PUT
+            # for the same offset waits here, then finds it already taken
+            session = UploadSession.objects.select_for_update().get(id=self.id)
+            self.status, self.received_bytes = session.status, session.received_bytes
+            if self.status != 'uploading':
+                raise UploadError('Upload session is already finalized', status=409)
+            if offset != self.received_bytes:
+                raise UploadError(f'Expected offset {self.received_bytes}', status=409)
+            if offset + length > self.total_size:
+                raise UploadError('Chunk goes past the declared file size')
+            
+            if offset and not os.path.exists(self.part_path):
+                raise UploadError('Uploaded data is gone; restart the upload', status=410)
+            
+            os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+            digest = hashlib.sha256()
+            written = 0
+            with open(self.part_path, 'wb' if offset == 0 else 'r+b') as part:
+                part.seek(offset)
+                part.truncate()
+                while written < length:
+                    block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+                    if not block:
+                        break
+                    part.write(block)
+                    digest.update(block)
+                    written += len(block)
+                
+                if written != length:
+                    part.truncate(offset)
+                    raise UploadError(f'Chunk ended after {written} of {length} bytes')
+                if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+                    part.truncate(offset)
+                    raise UploadError('Chunk checksum mismatch')
+            
+            self.received_bytes = offset + length
+            self.expires_at = self.next_expiry()
+            self.save(update_fields=['received_bytes', 'expires_at', 'updated_at'])
+    
+    def finalize(self):
+        """Verify the whole file and attach it to its homework or lesson"""
+        from django.core.files import File
+        
+        if self.status != 'uploading':
+            raise UploadError('Upload session is already finalized', status=409)
+        if not self.is_complete:
+            raise UploadError(f'Upload incomplete: {self.received_bytes} of {self.total_size} bytes', status=409)
+        
+        digest = hashlib.sha256()
+        with open(self.part_path, 'rb') as part:
+            for block in iter(lambda: part.read(STREAM_BLOCK_SIZE), b''):
+                digest.update(block)
+        if digest.hexdigest() != self.sha256:
+            raise UploadError('File checksum mismatch; restart the upload')
+        
+        with transaction.atomic(), open(self.part_path, 'rb') as part:
+            session = UploadSession.objects.select_for_update().get(id=self.id)
+            if session.status != 'uploading':
+                raise UploadError('Upload session is already finalized', status=409)
+            
+            upload = File(part, name=self.filename)
+            if self.purpose == 'homework_audio':
+                if not self.homework.can_submit:
+                    raise UploadError('Cannot submit homework in current status')
+                self.homework.submit_audio(upload, self.sha256)
+            else:
+                self.resource = self._create_resource(upload)
+            
+            self.status = 'completed'
+            self.save(update_fields=['status', 'resource', 'updated_at'])
+        
+        os.remove(self.part_path)
+    
+    def _create_resource(self, upload):
+        from apps.homework.audio import probe_audio
+        from apps.resources.models import LessonResource
+        
+        duration_seconds = None
+        if self.resource_data.get('resource_type') == 'audio':
+            try:
+                duration_seconds = int(probe_audio(self.part_path)['duration'])
+            except Exception:
+                duration_seconds = None
+        
+        return LessonResource.objects.create(
+            lesson=self.lesson,
+            file=upload,
+            file_size=self.total_size,
+            duration_seconds=duration_seconds,
+            **self.resource_data
+        )
+    
+    def discard(self):
+        """Remove the part file and the session"""
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        self.delete()
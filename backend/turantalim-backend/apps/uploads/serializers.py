@@ -0,0 +1,116 @@
+import re
+
+from django.conf import settings
+from rest_framework import serializers
+
+from apps.uploads.models import UploadSession
+from apps.resources.models import LessonResource
+from core.serializers import AudioFileField, DocumentFileField
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Upload session state; offset is where the next chunk must start"""
+    
+    offset = serializers.IntegerField(source='received_bytes', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'purpose', 'status', 'filename', 'content_type', 'total_size',
+            'sha256', 'offset', 'chunk_size', 'homework', 'lesson', 'resource',
+            'expires_at', 'created_at'
+        ]
+        read_only_fields = fields
+    
+    def get_chunk_size(self, obj):
+        return settings.UPLOAD_MAX_CHUNK_SIZE
+
+
+class UploadSessionCreateSerializer(serializers.ModelSerializer):
+    """Start a resumable upload for a homework recording or a lesson resource"""
+    
+    # LessonResource fields, applied when the upload is finalized
+    title = serializers.CharField(max_length=255, required=False)
+    resource_type = serializers.ChoiceField(choices=LessonResource.RESOURCE_TYPE_CHOICES, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    is_required = serializers.BooleanField(required=False)
+    order = serializers.IntegerField(min_value=0, required=False)
+    
+    RESOURCE_FIELDS = ['title', 'resource_type', 'description', 'is_required', 'order']
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'purpose', 'filename', 'content_type', 'total_size', 'sha256',
+            'homework', 'lesson', 'title', 'resource_type', 'description',
+            'is_required', 'order'
+        ]
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if not SHA256_RE.match(value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest")
+        return value
+    
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("File is empty")
+        return value
+    
+    def validate(self, attrs):
+        user = self.context['request'].user
+        
+        if attrs['purpose'] == 'homework_audio':
+            homework = attrs.get('homework')
+            if homework is None or homework.student_id != user.id:
+                raise serializers.ValidationError({'homework': "Homework not found"})
+            if not homework.can_submit:
+                raise serializers.ValidationError({'homework': "Cannot submit homework in current status"})
+            self._validate_file(attrs, AudioFileField.ALLOWED_FORMATS, AudioFileField.MAX_SIZE)
+            attrs['lesson'] = None
+        else:
+            if not user.is_admin:
+                raise serializers.ValidationError("Only admins can upload lesson resources")
+            if attrs.get('lesson') is None:
+                raise serializers.ValidationError({'lesson': "This field is required"})
+            for field in ['title', 'resource_type']:
+                if not attrs.get(field):
+                    raise serializers.ValidationError({field: "This field is required"})
+            if attrs['resource_type'] == 'audio':
+                self._validate_file(attrs, AudioFileField.ALLOWED_FORMATS, AudioFileField.MAX_SIZE)
+            elif attrs['resource_type'] == 'document':
+                self._validate_file(attrs, DocumentFileField.ALLOWED_FORMATS, DocumentFileField.MAX_SIZE)
+            else:
+                self._validate_file(
+                    attrs,
+                    AudioFileField.ALLOWED_FORMATS + DocumentFileField.ALLOWED_FORMATS,
+                    max(AudioFileField.MAX_SIZE, DocumentFileField.MAX_SIZE)
+                )
+            attrs['homework'] = None
+        
+        return attrs
+    
+    def _validate_file(self, attrs, allowed_formats, max_size):
+        if attrs['content_type'] not in allowed_formats:
+            raise serializers.ValidationError({'content_type': "File format not supported"})
+        if attrs['total_size'] > max_size:
+            raise serializers.ValidationError(
+                {'total_size': f"File too large. Maximum size is {max_size // (1024 * 1024)}MB"}
+            )
+    
+    def create(self, validated_data):
+        resource_data = {
+            field: validated_data.pop(field)
+            for field in self.RESOURCE_FIELDS
+            if field in validated_data
+        }
+        if validated_data['purpose'] != 'lesson_resource':
+            resource_data = {}
+        return UploadSession.objects.create(
+            user=self.context['request'].user,
+            resource_data=resource_data,
+            **validated_data
+        )
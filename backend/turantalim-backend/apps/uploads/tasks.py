@@ -0,0 +1,46 @@
+from celery import shared_task
+from django.conf import settings
+import os
+import time
+from datetime import timedelta
+from django.utils import timezone
+
+@shared_task
+def cleanup_upload_sessions():
+    """Remove abandoned upload sessions, their part files and stray part files"""
+    from apps.uploads.models import UploadSession
+    
+    try:
+        now = timezone.now()
+        
+        expired = 0
+        for session in UploadSession.objects.filter(status='uploading', expires_at__lt=now).iterator():
+            session.discard()
+            expired += 1
+        
+        # Completed sessions only matter while the client reads the result
+        completed, _ = UploadSession.objects.filter(
+            status='completed',
+            updated_at__lt=now - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+        ).delete()
+        
+        # Part files whose session row is gone (e.g. deleted in the admin)
+        orphaned = 0
+        if os.path.isdir(settings.UPLOAD_TEMP_DIR):
+            active_ids = {str(session_id) for session_id in UploadSession.objects.values_list('id', flat=True)}
+            cutoff = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+            for name in os.listdir(settings.UPLOAD_TEMP_DIR):
+                path = os.path.join(settings.UPLOAD_TEMP_DIR, name)
+                if (name.endswith('.part') and name[:-len('.part')] not in active_ids
+                        and os.path.getmtime(path) < cutoff):
+                    os.remove(path)
+                    orphaned += 1
+        
+        return {
+            'status': 'success',
+            'expired_sessions': expired,
+            'completed_sessions': completed,
+            'orphaned_files': orphaned
+        }
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
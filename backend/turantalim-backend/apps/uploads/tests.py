@@ -0,0 +1,161 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.courses.models import Course, Group
+from apps.homework.models import Homework
+from apps.lessons.models import Lesson
+from apps.settings.models import SystemSettings
+from apps.uploads.models import UploadError, UploadSession
+
+
+class SlowStream(io.BytesIO):
+    """Request body that stalls after its first block until released"""
+
+    def __init__(self, data, release):
+        super().__init__(data)
+        self.release = release
+        self.started = threading.Event()
+
+    def read(self, size=-1):
+        if self.tell():
+            self.started.set()
+            self.release.wait()
+        return super().read(size)
+
+
+def make_session(data, username='student'):
+    user = User.objects.create_user(
+        email=f'{username}@example.com', username=username, password='x', role='student'
+    )
+    return UploadSession.objects.create(
+        user=user, purpose='lesson_resource', filename='notes.pdf', content_type='application/pdf',
+        total_size=len(data), sha256=hashlib.sha256(data).hexdigest()
+    )
+
+
+@override_settings(UPLOAD_TEMP_DIR=tempfile.mkdtemp())
+class WriteChunkTests(TestCase):
+    def test_chunks_resume_from_offset(self):
+        data = bytes(range(256)) * 4
+        session = make_session(data)
+
+        session.write_chunk(io.BytesIO(data[:600]), 0, 600)
+        with self.assertRaises(UploadError) as error:
+            session.write_chunk(io.BytesIO(data[:600]), 0, 600)
+        self.assertEqual(error.exception.status, 409)
+        session.write_chunk(io.BytesIO(data[600:]), 600, len(data) - 600)
+
+        self.assertTrue(session.is_complete)
+        with open(session.part_path, 'rb') as part:
+            self.assertEqual(part.read(), data)
+
+    def test_bad_checksum_leaves_offset(self):
+        data = b'x' * 100
+        session = make_session(data)
+
+        with self.assertRaises(UploadError):
+            session.write_chunk(io.BytesIO(data), 0, 100, chunk_sha256='0' * 64)
+
+        session.refresh_from_db()
+        self.assertEqual(session.received_bytes, 0)
+
+
+@override_settings(UPLOAD_TEMP_DIR=tempfile.mkdtemp(), MEDIA_ROOT=tempfile.mkdtemp(), HOMEWORK_QUEUE_MAX_DEPTH=0)
+class FinalizeHomeworkUploadTests(TestCase):
+    """Finalize goes through Homework.submit_audio; the queue is always full here"""
+
+    def setUp(self):
+        today = timezone.localdate()
+        group = Group.objects.create(
+            name='A1', course=Course.objects.create(name='Turkish A1'),
+            start_date=today, end_date=today + timedelta(days=90)
+        )
+        lesson = Lesson.objects.create(group=group, title='Lesson 1', scheduled_date=today, start_time='10:00')
+        self.data = b'RIFF' + b'\0' * 996
+        self.session = make_session(self.data)
+        self.homework = Homework.objects.create(
+            lesson=lesson, student=self.session.user, description='Bugün hava güzel',
+            deadline=timezone.now() + timedelta(days=1)
+        )
+        self.session.purpose = 'homework_audio'
+        self.session.homework = self.homework
+        self.session.save()
+        self.session.write_chunk(io.BytesIO(self.data), 0, len(self.data))
+        self.client = APIClient()
+        self.client.force_authenticate(self.session.user)
+
+    def finalize(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('upload-finalize', args=[self.session.id]))
+
+    def test_full_queue_keeps_the_upload_for_a_retry(self):
+        response = self.finalize()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'uploading')
+        self.assertTrue(os.path.exists(self.session.part_path))
+
+    @mock.patch('apps.homework.tasks.process_homework_audio.apply_async')
+    def test_processing_disabled_accepts_without_queueing(self, apply_async):
+        SystemSettings.objects.update_or_create(pk=1, defaults={'audio_processing_enabled': False})
+
+        response = self.finalize()
+
+        self.assertEqual(response.status_code, 202)
+        self.homework.refresh_from_db()
+        self.assertEqual((self.homework.status, self.homework.processing_status), ('submitted', 'none'))
+        apply_async.assert_not_called()
+
+
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(UPLOAD_TEMP_DIR=tempfile.mkdtemp())
+class WriteChunkConcurrencyTests(TransactionTestCase):
+    """Two PUTs for the same offset (needs row-level locking, e.g. PostgreSQL)"""
+
+    def test_slow_duplicate_cannot_overwrite_claimed_chunk(self):
+        session = make_session(b'a' * 200_000)
+        release = threading.Event()
+        bodies = [SlowStream(b'a' * 200_000, release), io.BytesIO(b'b' * 200_000)]
+        outcomes = [None, None]
+
+        def put(index):
+            try:
+                UploadSession.objects.get(id=session.id).write_chunk(bodies[index], 0, 200_000)
+                outcomes[index] = 'written'
+            except UploadError as e:
+                outcomes[index] = e.status
+            finally:
+                connection.close()
+
+        slow = threading.Thread(target=put, args=(0,))
+        slow.start()
+        bodies[0].started.wait(5)
+        fast = threading.Thread(target=put, args=(1,))
+        fast.start()
+        # The fast PUT gets its chance to race before the slow one finishes
+        time.sleep(0.5)
+        release.set()
+        slow.join()
+        fast.join()
+
+        self.assertEqual(sorted(outcomes, key=str), [409, 'written'])
+        winner = b'a' if outcomes[0] == 'written' else b'b'
+        with open(session.part_path, 'rb') as part:
+            self.assertEqual(part.read(), winner * 200_000)
+        session.refresh_from_db()
+        self.assertEqual(session.received_bytes, 200_000)
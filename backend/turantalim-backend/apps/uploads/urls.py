@@ -0,0 +1,9 @@
+from django.urls import path
+from apps.uploads import views
+
+urlpatterns = [
+    path('', views.UploadSessionCreateView.as_view(), name='upload-create'),
+    path('<uuid:pk>/', views.UploadSessionDetailView.as_view(), name='upload-detail'),
+    path('<uuid:pk>/chunk/', views.UploadChunkView.as_view(), name='upload-chunk'),
+    path('<uuid:pk>/finalize/', views.UploadFinalizeView.as_view(), name='upload-finalize'),
+]
@@ -0,0 +1,94 @@
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.shortcuts import get_object_or_404
+
+from apps.uploads.models import UploadSession, UploadError
+from apps.uploads.serializers import UploadSessionSerializer, UploadSessionCreateSerializer
+
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """Start a resumable upload"""
+    serializer_class = UploadSessionCreateSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save()
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(generics.RetrieveDestroyAPIView):
+    """Upload session state (to resume from its offset) or abort it"""
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+    
+    def perform_destroy(self, instance):
+        instance.discard()
+
+
+class UploadChunkView(generics.GenericAPIView):
+    """
+    Append a chunk: PUT the raw bytes with an Upload-Offset header (and
+    optionally X-Chunk-SHA256). The body is streamed to disk, never parsed.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def put(self, request, pk):
+        session = get_object_or_404(UploadSession, id=pk, user=request.user)
+        
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return Response(
+                {'error': 'Upload-Offset and Content-Length headers are required', 'offset': session.received_bytes},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            session.write_chunk(
+                request._request,
+                offset,
+                length,
+                request.headers.get('X-Chunk-SHA256', '')
+            )
+        except UploadError as e:
+            return Response({'error': str(e), 'offset': session.received_bytes}, status=e.status)
+        
+        return Response({'offset': session.received_bytes, 'complete': session.is_complete})
+
+
+class UploadFinalizeView(generics.GenericAPIView):
+    """Verify the uploaded file and attach it to its homework or lesson"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, pk):
+        from apps.homework.models import Homework, ProcessingQueueFull
+        from apps.homework.views import processing_queue_full_response, processing_ticket
+        from apps.resources.serializers import LessonResourceSerializer
+        
+        session = get_object_or_404(UploadSession, id=pk, user=request.user)
+        
+        # The part file is kept, so the client just retries finalize later.
+        # Checked up front to skip hashing the file; submit_audio decides.
+        if session.purpose == 'homework_audio' and Homework.admission_closed():
+            return processing_queue_full_response()
+        
+        try:
+            session.finalize()
+        except ProcessingQueueFull:
+            return processing_queue_full_response()
+        except UploadError as e:
+            return Response({'error': str(e), 'offset': session.received_bytes}, status=e.status)
+        
+        if session.purpose == 'homework_audio':
+            return Response(processing_ticket(session.homework), status=status.HTTP_202_ACCEPTED)
+        return Response(
+            LessonResourceSerializer(session.resource, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
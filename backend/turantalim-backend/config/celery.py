@@ -14,14 +14,26 @@ app.conf.beat_schedule = {
         'task': 'apps.homework.tasks.mark_payments_overdue',
         'schedule': crontab(hour=0, minute=0),
     },
-    'update-leaderboards-hourly': {
+    'update-leaderboards-dirty': {
         'task': 'apps.homework.tasks.update_leaderboards',
-        'schedule': crontab(minute=0),
+        'schedule': crontab(minute='*/5'),  # Only groups marked dirty
+    },
+    'recover-stale-homework-processing': {
+        'task': 'apps.homework.tasks.recover_stale_homework_processing',
+        'schedule': crontab(minute='*/10'),
     },
     'check-homework-deadlines-hourly': {
         'task': 'apps.homework.tasks.check_homework_deadlines',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
+    'rebuild-dashboard-snapshots-nightly': {
+        'task': 'apps.accounts.tasks.rebuild_dashboard_snapshots',
+        'schedule': crontab(hour=0, minute=5),
+    },
+    'cleanup-upload-sessions-hourly': {
+        'task': 'apps.uploads.tasks.cleanup_upload_sessions',
+        'schedule': crontab(minute=30),
+    },
 }
 
 @app.task(bind=True)
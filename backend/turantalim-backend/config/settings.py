@@ -138,6 +138,7 @@ INSTALLED_APPS = [
     'apps.gamification',
     'apps.notifications',
     'apps.settings',
+    'apps.uploads',
 ]
 
 MIDDLEWARE = [
@@ -185,6 +186,15 @@ DATABASES = {
     }
 }
 
+# Cache (use django.core.cache.backends.redis.RedisCache in production so
+# every worker shares it)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -246,3 +256,60 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Media Files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Resumable uploads: part files live here until the upload is finalized
+UPLOAD_TEMP_DIR = os.getenv('UPLOAD_TEMP_DIR', str(BASE_DIR / 'upload_sessions'))
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', '24'))
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('UPLOAD_MAX_CHUNK_SIZE', str(8 * 1024 * 1024)))
+
+# Celery
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+HOMEWORK_AUDIO_QUEUE = os.getenv('HOMEWORK_AUDIO_QUEUE', 'homework_audio')
+# Transcription is slow; keep it off the default queue so beat tasks are not stuck behind it
+CELERY_TASK_ROUTES = {
+    'apps.homework.tasks.process_homework_audio': {'queue': HOMEWORK_AUDIO_QUEUE},
+    'apps.homework.tasks.transcode_homework_audio': {'queue': HOMEWORK_AUDIO_QUEUE},
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(os.getenv('CELERY_WORKER_PREFETCH_MULTIPLIER', '1'))
+# Submissions are refused with 503 while this many wait for processing
+HOMEWORK_QUEUE_MAX_DEPTH = int(os.getenv('HOMEWORK_QUEUE_MAX_DEPTH', '500'))
+HOMEWORK_QUEUE_RETRY_AFTER = int(os.getenv('HOMEWORK_QUEUE_RETRY_AFTER', '30'))
+# Rows queued or processing for longer than this (seconds) are presumed lost:
+# they stop counting against the limit and are requeued or failed
+HOMEWORK_PROCESSING_TIMEOUT = int(os.getenv('HOMEWORK_PROCESSING_TIMEOUT', '3600'))
+
+# Homework transcription
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'apps.homework.transcription.OpenAITranscriptionBackend')
+TRANSCRIPTION_MODEL = os.getenv('TRANSCRIPTION_MODEL', 'whisper-1')
+TRANSCRIPTION_LANGUAGE = os.getenv('TRANSCRIPTION_LANGUAGE', 'tr')
+TRANSCRIPTION_TIMEOUT = int(os.getenv('TRANSCRIPTION_TIMEOUT', '120'))
+# Limits are shared through CACHES, so they are global only with a shared cache
+TRANSCRIPTION_MAX_CONCURRENCY = int(os.getenv('TRANSCRIPTION_MAX_CONCURRENCY', '4'))
+TRANSCRIPTION_RATE_PER_MINUTE = int(os.getenv('TRANSCRIPTION_RATE_PER_MINUTE', '50'))
+TRANSCRIPTION_MAX_RETRIES = int(os.getenv('TRANSCRIPTION_MAX_RETRIES', '8'))
+TRANSCRIPTION_RETRY_BACKOFF = int(os.getenv('TRANSCRIPTION_RETRY_BACKOFF', '15'))
+TRANSCRIPTION_RETRY_MAX_DELAY = int(os.getenv('TRANSCRIPTION_RETRY_MAX_DELAY', '600'))
+# Long recordings are split into segments of at most AUDIO_CHUNK_DURATION seconds
+AUDIO_CHUNK_DURATION = int(os.getenv('AUDIO_CHUNK_DURATION', '60'))
+TRANSCRIPTION_SEGMENT_WORKERS = int(os.getenv('TRANSCRIPTION_SEGMENT_WORKERS', '4'))
+TRANSCRIPTION_SEGMENT_RETRIES = int(os.getenv('TRANSCRIPTION_SEGMENT_RETRIES', '3'))
+# Used to report savings from silence trimming (USD)
+TRANSCRIPTION_COST_PER_MINUTE = float(os.getenv('TRANSCRIPTION_COST_PER_MINUTE', '0.006'))
+# Scored submissions are kept as mono Opus at this bitrate (bits per second)
+AUDIO_STORAGE_BITRATE = int(os.getenv('AUDIO_STORAGE_BITRATE', '24000'))
+FAKE_TRANSCRIPTION_TEXT = os.getenv('FAKE_TRANSCRIPTION_TEXT', '')
+FAKE_TRANSCRIPTION_LATENCY = float(os.getenv('FAKE_TRANSCRIPTION_LATENCY', '0'))
+
+# Homework scoring
+SIMILARITY_NGRAM_WEIGHT = float(os.getenv('SIMILARITY_NGRAM_WEIGHT', '0.0'))
+RESCORE_WORKERS = int(os.getenv('RESCORE_WORKERS', str(os.cpu_count() or 1)))
+# Classmates' transcripts at or above this estimated similarity are flagged
+PLAGIARISM_THRESHOLD = float(os.getenv('PLAGIARISM_THRESHOLD', '0.6'))
+# Review queue: claimed homework returns to the queue after the lease
+REVIEW_LEASE_MINUTES = int(os.getenv('REVIEW_LEASE_MINUTES', '15'))
+REVIEW_QUEUE_MAX_CLAIM = int(os.getenv('REVIEW_QUEUE_MAX_CLAIM', '20'))
+
+# Gamification
+LEADERBOARD_CACHE_TIMEOUT = int(os.getenv('LEADERBOARD_CACHE_TIMEOUT', '300'))
@@ -28,6 +28,7 @@ urlpatterns = [
     path('api/v1/gamification/', include('apps.gamification.urls')),
     path('api/v1/notifications/', include('apps.notifications.urls')),
     path('api/v1/system/', include('apps.settings.urls')),
+    path('api/v1/uploads/', include('apps.uploads.urls')),
     
     # API Documentation
     path('api/v1/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -16,9 +16,12 @@ class MultiLanguageCharField(drf_serializers.CharField):
 class AudioFileField(drf_serializers.FileField):
     """Field for validating audio files"""
     
+    ALLOWED_FORMATS = ['audio/mpeg', 'audio/wav', 'audio/ogg', 'audio/mp4']
+    MAX_SIZE = 50 * 1024 * 1024  # 50MB limit
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.allowed_formats = ['audio/mpeg', 'audio/wav', 'audio/ogg', 'audio/mp4']
+        self.allowed_formats = self.ALLOWED_FORMATS
     
     def to_internal_value(self, data):
         file = super().to_internal_value(data)
@@ -26,7 +29,7 @@ class AudioFileField(drf_serializers.FileField):
             raise drf_serializers.ValidationError(
                 _("Audio format not supported. Use MP3, WAV, OGG, or M4A")
             )
-        if file.size > 50 * 1024 * 1024:  # 50MB limit
+        if file.size > self.MAX_SIZE:
             raise drf_serializers.ValidationError(
                 _("Audio file too large. Maximum size is 50MB")
             )
@@ -35,9 +38,12 @@ class AudioFileField(drf_serializers.FileField):
 class DocumentFileField(drf_serializers.FileField):
     """Field for validating document files (Word documents)"""
     
+    ALLOWED_FORMATS = ['application/vnd.openxmlformats-officedocument.wordprocessingml.document']
+    MAX_SIZE = 20 * 1024 * 1024  # 20MB limit
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.allowed_formats = ['application/vnd.openxmlformats-officedocument.wordprocessingml.document']
+        self.allowed_formats = self.ALLOWED_FORMATS
     
     def to_internal_value(self, data):
         file = super().to_internal_value(data)
@@ -45,7 +51,7 @@ class DocumentFileField(drf_serializers.FileField):
             raise drf_serializers.ValidationError(
                 _("Only Word documents (.docx) are supported")
             )
-        if file.size > 20 * 1024 * 1024:  # 20MB limit
+        if file.size > self.MAX_SIZE:
             raise drf_serializers.ValidationError(
                 _("Document file too large. Maximum size is 20MB")
             )